@@ -0,0 +1,27 @@
+"""add FSRS memory state to user_cards
+
+Revision ID: 0001_fsrs_memory_state
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_fsrs_memory_state'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Tables come from scripts/init-db.sql / create_all, so the columns may already exist
+    op.execute("ALTER TABLE user_cards ADD COLUMN IF NOT EXISTS stability DOUBLE PRECISION")
+    op.execute("ALTER TABLE user_cards ADD COLUMN IF NOT EXISTS difficulty DOUBLE PRECISION")
+
+
+def downgrade() -> None:
+    op.drop_column('user_cards', 'difficulty')
+    op.drop_column('user_cards', 'stability')
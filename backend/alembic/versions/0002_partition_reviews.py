@@ -0,0 +1,124 @@
+"""partition reviews by month
+
+Revision ID: 0002_partition_reviews
+Revises: 0001_fsrs_memory_state
+Create Date: 2026-10-19 12:00:00
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_partition_reviews'
+down_revision = '0001_fsrs_memory_state'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "id, user_id, word_pair_id, user_card_id, quality, response_time_ms, source, session_id, "
+    "ease_factor_before, ease_factor_after, interval_before, interval_after, reviewed_at"
+)
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rename_primary_key(table: str, new_name: str) -> None:
+    bind = op.get_bind()
+    name = bind.execute(sa.text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass) AND contype = 'p'"
+    ), {"table": table}).scalar()
+    if name:
+        op.execute(f'ALTER TABLE {table} RENAME CONSTRAINT "{name}" TO {new_name}')
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    # Databases created from the current init-db.sql are partitioned already
+    relkind = bind.execute(sa.text("SELECT relkind FROM pg_class WHERE relname = 'reviews'")).scalar()
+    if relkind == 'p':
+        return
+
+    op.execute("ALTER TABLE reviews RENAME TO reviews_legacy")
+    _rename_primary_key("reviews_legacy", "reviews_legacy_pkey")
+
+    op.execute("""
+        CREATE TABLE reviews (
+            id BIGINT NOT NULL DEFAULT nextval('reviews_id_seq'),
+            user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            word_pair_id BIGINT NOT NULL REFERENCES word_pairs(id) ON DELETE CASCADE,
+            user_card_id BIGINT NOT NULL REFERENCES user_cards(id) ON DELETE CASCADE,
+            quality SMALLINT NOT NULL CHECK (quality >= 0 AND quality <= 5),
+            response_time_ms INTEGER,
+            source VARCHAR(50) DEFAULT 'web',
+            session_id UUID,
+            ease_factor_before INTEGER,
+            ease_factor_after INTEGER,
+            interval_before INTEGER,
+            interval_after INTEGER,
+            reviewed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT reviews_pkey PRIMARY KEY (id, reviewed_at)
+        ) PARTITION BY RANGE (reviewed_at)
+    """)
+    op.execute("CREATE TABLE reviews_default PARTITION OF reviews DEFAULT")
+
+    # One partition per month from the oldest review up to MONTHS_AHEAD months from now
+    oldest = bind.execute(sa.text("SELECT min(reviewed_at) FROM reviews_legacy")).scalar()
+    current = date.today().replace(day=1)
+    month = oldest.date().replace(day=1) if oldest else current
+    while month <= _add_months(current, MONTHS_AHEAD):
+        op.execute(
+            f"CREATE TABLE reviews_y{month.year}m{month.month:02d} PARTITION OF reviews "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+    op.execute(f"""
+        INSERT INTO reviews ({COLUMNS})
+        SELECT {COLUMNS.replace('reviewed_at', 'coalesce(reviewed_at, CURRENT_TIMESTAMP)')}
+        FROM reviews_legacy
+    """)
+    op.execute("ALTER SEQUENCE reviews_id_seq OWNED BY reviews.id")
+    op.execute("DROP TABLE reviews_legacy")
+
+    # Indexes on the parent are created on every partition
+    op.execute("CREATE INDEX ix_reviews_reviewed_at ON reviews (reviewed_at)")
+    op.execute("CREATE INDEX ix_reviews_user_date ON reviews (user_id, reviewed_at)")
+    op.execute("ANALYZE reviews")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE reviews RENAME TO reviews_partitioned")
+    _rename_primary_key("reviews_partitioned", "reviews_partitioned_pkey")
+    op.execute("""
+        CREATE TABLE reviews (
+            id BIGINT PRIMARY KEY DEFAULT nextval('reviews_id_seq'),
+            user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            word_pair_id BIGINT NOT NULL REFERENCES word_pairs(id) ON DELETE CASCADE,
+            user_card_id BIGINT NOT NULL REFERENCES user_cards(id) ON DELETE CASCADE,
+            quality SMALLINT NOT NULL CHECK (quality >= 0 AND quality <= 5),
+            response_time_ms INTEGER,
+            source VARCHAR(50) DEFAULT 'web',
+            session_id UUID,
+            ease_factor_before INTEGER,
+            ease_factor_after INTEGER,
+            interval_before INTEGER,
+            interval_after INTEGER,
+            reviewed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    op.execute(f"INSERT INTO reviews ({COLUMNS}) SELECT {COLUMNS} FROM reviews_partitioned")
+    op.execute("ALTER SEQUENCE reviews_id_seq OWNED BY reviews.id")
+    op.execute("DROP TABLE reviews_partitioned")
+
+    op.execute("CREATE INDEX ix_reviews_user_id ON reviews (user_id)")
+    op.execute("CREATE INDEX ix_reviews_reviewed_at ON reviews (reviewed_at)")
+    op.execute("CREATE INDEX ix_reviews_user_date ON reviews (user_id, reviewed_at)")
@@ -0,0 +1,37 @@
+"""replace stale due-card indexes with a partial covering due-queue index
+
+Revision ID: 0003_due_queue_index
+Revises: 0002_partition_reviews
+Create Date: 2026-10-19 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_due_queue_index'
+down_revision = '0002_partition_reviews'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_cards_due_queue "
+            "ON user_cards (user_id, due_date) INCLUDE (word_pair_id) WHERE NOT is_suspended"
+        )
+        # ix_user_cards_due_now had its CURRENT_TIMESTAMP predicate frozen at creation time;
+        # the plain (user_id, due_date) indexes are superseded by the due queue index
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_user_cards_due_now")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_user_cards_user_due")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_user_cards_due")
+    op.execute("ANALYZE user_cards")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_cards_due ON user_cards (user_id, due_date)")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_user_cards_due_queue")
@@ -0,0 +1,36 @@
+"""index word pairs in new-card order
+
+Revision ID: 0004_new_card_order
+Revises: 0003_due_queue_index
+Create Date: 2026-10-19 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_new_card_order'
+down_revision = '0003_due_queue_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Must match WordPair.new_card_order() for the planner to use them
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_word_pairs_new_card_order "
+            "ON word_pairs ((coalesce(frequency_rank, 2147483647)), id) WHERE is_active"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_word_pairs_level_new_card_order "
+            "ON word_pairs (cefr_level, (coalesce(frequency_rank, 2147483647)), id) WHERE is_active"
+        )
+    op.execute("ANALYZE word_pairs")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_word_pairs_level_new_card_order")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_word_pairs_new_card_order")
@@ -0,0 +1,32 @@
+"""add client review ids for offline sync
+
+Revision ID: 0005_review_client_id
+Revises: 0004_new_card_order
+Create Date: 2026-10-19 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_review_client_id'
+down_revision = '0004_new_card_order'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('reviews', sa.Column('client_review_id', postgresql.UUID(as_uuid=True), nullable=True))
+    # Indexes on a partitioned table cannot be built CONCURRENTLY; the column is
+    # empty, so the partial index stays small and the build only scans the partitions
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_reviews_client_review "
+        "ON reviews (user_id, client_review_id, reviewed_at) WHERE client_review_id IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_reviews_client_review")
+    op.drop_column('reviews', 'client_review_id')
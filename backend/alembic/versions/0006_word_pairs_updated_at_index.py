@@ -0,0 +1,49 @@
+"""index word pairs by update time for the catalog change feed
+
+updated_at becomes NOT NULL with a server default first: the feed filters
+and orders on it, so rows without one would never reach a client.
+
+Revision ID: 0006_catalog_changes
+Revises: 0005_review_client_id
+Create Date: 2026-10-19 17:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_catalog_changes'
+down_revision = '0005_review_client_id'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Pairs without updated_at were left out of every snapshot and delta so far:
+    # stamping them now makes them show up as changes for existing clients too
+    op.execute("UPDATE word_pairs SET updated_at = now() WHERE updated_at IS NULL")
+    op.alter_column(
+        'word_pairs', 'updated_at',
+        existing_type=sa.DateTime(),
+        nullable=False,
+        server_default=sa.text('now()')
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_word_pairs_updated_at "
+            "ON word_pairs (updated_at, id)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_word_pairs_updated_at")
+
+    op.alter_column(
+        'word_pairs', 'updated_at',
+        existing_type=sa.DateTime(),
+        nullable=True,
+        server_default=None
+    )
@@ -0,0 +1,40 @@
+"""index reviews by study session
+
+Revision ID: 0007_reviews_session_id
+Revises: 0006_catalog_changes
+Create Date: 2026-10-19 18:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_reviews_session_id'
+down_revision = '0006_catalog_changes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A partitioned index cannot be built CONCURRENTLY: create it invalid on the
+    # parent only, build each partition's index concurrently and attach it
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_reviews_session_id "
+        "ON ONLY reviews (session_id) WHERE session_id IS NOT NULL"
+    )
+    partitions = op.get_bind().execute(sa.text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'reviews'::regclass"
+    )).scalars().all()
+
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition}_session_id_idx "
+                f"ON {partition} (session_id) WHERE session_id IS NOT NULL"
+            )
+            op.execute(f"ALTER INDEX ix_reviews_session_id ATTACH PARTITION {partition}_session_id_idx")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_reviews_session_id")
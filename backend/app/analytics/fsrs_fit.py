@@ -0,0 +1,311 @@
+"""
+Fit FSRS weights offline from the reviews table.
+
+Reviews are streamed out with COPY, grouped into per-card sequences and
+simulated step by step: at step k every card with more than k reviews is
+advanced at once, so a pass over millions of rows is a few dozen NumPy
+operations per step. Weights are optimised with Adam on the log loss of the
+predicted recall probability, using finite-difference gradients.
+
+    poetry install --with analytics
+    python -m app.analytics.fsrs_fit --output fsrs_weights.json
+
+Then set FSRS_WEIGHTS_PATH=fsrs_weights.json and SCHEDULER=fsrs.
+"""
+import argparse
+import io
+import json
+from datetime import datetime
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.fsrs_service import FSRSService
+
+DECAY = FSRSService.DECAY
+FACTOR = FSRSService.FACTOR
+EPSILON = 1e-6
+
+# (lower, upper) bounds keep the optimiser inside the region where the model is well-defined
+WEIGHT_BOUNDS = np.array([
+    (0.1, 100.0), (0.1, 100.0), (0.1, 100.0), (0.1, 100.0),
+    (1.0, 10.0), (0.1, 5.0), (0.1, 5.0), (0.0, 0.5),
+    (0.0, 3.0), (0.1, 0.8), (0.01, 2.5),
+    (0.5, 5.0), (0.01, 0.2), (0.01, 0.9), (0.01, 2.0),
+    (0.0, 1.0), (1.0, 6.0),
+])
+
+REVIEWS_QUERY = """
+    SELECT user_card_id, extract(epoch FROM reviewed_at), quality,
+           coalesce(ease_factor_before, 250), coalesce(interval_before, 0)
+    FROM reviews
+    WHERE reviewed_at >= %s
+    ORDER BY user_card_id, reviewed_at
+"""
+
+# One step of the simulation: (grades, elapsed_days) for the cards still active at that step
+Step = Tuple[np.ndarray, np.ndarray]
+
+
+class ReviewLog(NamedTuple):
+    grades: np.ndarray      # FSRS grade (1-4) per review
+    elapsed: np.ndarray     # days since the card's previous review (0 for the first)
+    ease: np.ndarray        # SM-2 ease factor before the review
+    interval: np.ndarray    # SM-2 interval before the review
+    starts: np.ndarray      # index of each card's first review
+    lengths: np.ndarray     # reviews per card
+
+
+def load_reviews(database_url: str, since: datetime) -> np.ndarray:
+    """Stream reviews out of PostgreSQL as an (n, 5) float array"""
+
+    import psycopg2
+
+    connection = psycopg2.connect(database_url.replace("postgresql+psycopg2://", "postgresql://"))
+    buffer = io.StringIO()
+    try:
+        with connection.cursor() as cursor:
+            query = cursor.mogrify(REVIEWS_QUERY, (since,)).decode()
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH CSV", buffer)
+    finally:
+        connection.close()
+
+    if not buffer.tell():
+        return np.empty((0, 5))
+    buffer.seek(0)
+    return np.loadtxt(buffer, delimiter=",", ndmin=2)
+
+
+def build_review_log(rows: np.ndarray) -> ReviewLog:
+    card_ids = rows[:, 0].astype(np.int64)
+    is_first = np.empty(len(card_ids), dtype=bool)
+    is_first[:1] = True
+    is_first[1:] = card_ids[1:] != card_ids[:-1]
+
+    starts = np.flatnonzero(is_first)
+    lengths = np.diff(np.append(starts, len(card_ids)))
+
+    elapsed = np.zeros(len(card_ids))
+    elapsed[1:] = np.diff(rows[:, 1]) / 86400
+    elapsed[is_first] = 0.0
+
+    quality = rows[:, 2]
+    return ReviewLog(
+        grades=np.where(quality < 3, 1, quality - 1).astype(np.int8),
+        elapsed=np.maximum(elapsed, 0.0),
+        ease=rows[:, 3] / 100,
+        interval=rows[:, 4],
+        starts=starts,
+        lengths=lengths,
+    )
+
+
+def build_steps(log: ReviewLog, cards: np.ndarray, max_reviews: int) -> List[Step]:
+    """Transpose card sequences into per-step arrays, longest sequences first"""
+
+    cards = cards[log.lengths[cards] >= 2]
+    if not len(cards):
+        return []
+
+    cards = cards[np.argsort(-log.lengths[cards], kind="stable")]
+    starts = log.starts[cards]
+    lengths = np.minimum(log.lengths[cards], max_reviews)
+
+    steps = []
+    for k in range(int(lengths[0])):
+        # lengths is descending, so the cards with more than k reviews are a prefix
+        active = int(np.searchsorted(-lengths, -k, side="left"))
+        index = starts[:active] + k
+        steps.append((log.grades[index], log.elapsed[index]))
+    return steps
+
+
+def retrievability(elapsed: np.ndarray, stability: np.ndarray) -> np.ndarray:
+    return (1 + FACTOR * elapsed / stability) ** DECAY
+
+
+def initial_state(w: np.ndarray, grade: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized FSRSService.initial_stability / initial_difficulty"""
+    return np.maximum(FSRSService.MIN_STABILITY, w[grade - 1]), np.clip(w[4] - (grade - 3) * w[5], 1, 10)
+
+
+def next_state(
+    w: np.ndarray,
+    stability: np.ndarray,
+    difficulty: np.ndarray,
+    retrievability: np.ndarray,
+    grade: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized FSRSService recall/forget stability and next_difficulty"""
+
+    hard_penalty = np.where(grade == 2, w[15], 1.0)
+    easy_bonus = np.where(grade == 4, w[16], 1.0)
+    recall_stability = stability * (
+        1 + np.exp(w[8]) * (11 - difficulty) * stability ** -w[9]
+        * (np.exp(w[10] * (1 - retrievability)) - 1) * hard_penalty * easy_bonus
+    )
+    forget_stability = np.minimum(
+        stability,
+        w[11] * difficulty ** -w[12] * ((stability + 1) ** w[13] - 1) * np.exp(w[14] * (1 - retrievability))
+    )
+
+    new_stability = np.maximum(
+        FSRSService.MIN_STABILITY, np.where(grade > 1, recall_stability, forget_stability)
+    )
+    new_difficulty = np.clip(
+        w[7] * np.clip(w[4], 1, 10) + (1 - w[7]) * (difficulty - w[6] * (grade - 3)), 1, 10
+    )
+    return new_stability, new_difficulty
+
+
+def fsrs_loss(weights: np.ndarray, steps: List[Step]) -> Tuple[float, int]:
+    """Summed log loss of FSRS recall predictions and the number of predictions"""
+
+    if not steps:
+        return 0.0, 0
+
+    stability, difficulty = initial_state(weights, steps[0][0])
+
+    total = 0.0
+    count = 0
+    for grade, elapsed in steps[1:]:
+        active = len(grade)
+        s = stability[:active]
+        d = difficulty[:active]
+
+        r = np.clip(retrievability(elapsed, s), EPSILON, 1 - EPSILON)
+        total -= np.sum(np.where(grade > 1, np.log(r), np.log(1 - r)))
+        count += active
+
+        stability[:active], difficulty[:active] = next_state(weights, s, d, r, grade)
+
+    return float(total), count
+
+
+def sm2_loss(log: ReviewLog, cards: np.ndarray) -> Tuple[float, int]:
+    """Log loss of SM2Service.calculate_retention_probability on the same reviews"""
+
+    in_cards = np.zeros(len(log.lengths), dtype=bool)
+    in_cards[cards] = True
+    row_cards = np.repeat(np.arange(len(log.lengths)), log.lengths)
+
+    mask = in_cards[row_cards]
+    mask[log.starts] = False
+
+    interval = log.interval[mask]
+    decay = 1 / np.maximum(log.ease[mask] * interval, EPSILON)
+    probability = np.where(interval > 0, np.exp(-decay * log.elapsed[mask]), 1.0)
+    probability = np.clip(probability, EPSILON, 1 - EPSILON)
+
+    recalled = log.grades[mask] > 1
+    total = -np.sum(np.where(recalled, np.log(probability), np.log(1 - probability)))
+    return float(total), int(mask.sum())
+
+
+def mean_loss(weights: np.ndarray, batches: List[List[Step]]) -> float:
+    totals = [fsrs_loss(weights, steps) for steps in batches]
+    count = sum(c for _, c in totals)
+    return sum(t for t, _ in totals) / count if count else float("nan")
+
+
+def gradient(weights: np.ndarray, steps: List[Step], delta: float = 1e-4) -> np.ndarray:
+    base, count = fsrs_loss(weights, steps)
+    grad = np.zeros_like(weights)
+    if not count:
+        return grad
+
+    for i in range(len(weights)):
+        shifted = weights.copy()
+        shifted[i] += delta
+        grad[i] = (fsrs_loss(shifted, steps)[0] - base) / (delta * count)
+    return grad
+
+
+def fit(
+    batches: List[List[Step]],
+    weights: np.ndarray,
+    epochs: int,
+    learning_rate: float,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """Adam over mini-batches of cards"""
+
+    lower, upper = WEIGHT_BOUNDS.T
+    beta1, beta2 = 0.9, 0.999
+    m = np.zeros_like(weights)
+    v = np.zeros_like(weights)
+    t = 0
+
+    for epoch in range(epochs):
+        for index in rng.permutation(len(batches)):
+            grad = gradient(weights, batches[index])
+            t += 1
+            m = beta1 * m + (1 - beta1) * grad
+            v = beta2 * v + (1 - beta2) * grad ** 2
+            step = learning_rate * (m / (1 - beta1 ** t)) / (np.sqrt(v / (1 - beta2 ** t)) + 1e-8)
+            weights = np.clip(weights - step, lower, upper)
+
+        print(f"epoch {epoch + 1}/{epochs}: train log loss {mean_loss(weights, batches):.4f}")
+
+    return weights
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fit FSRS weights from the reviews table")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--since", type=datetime.fromisoformat, default=datetime(1970, 1, 1),
+                        help="Only use reviews after this date (ISO format)")
+    parser.add_argument("--output", required=True, help="Where to write the fitted weights (JSON)")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=50000, help="Cards per optimisation step")
+    parser.add_argument("--learning-rate", type=float, default=0.04)
+    parser.add_argument("--max-reviews", type=int, default=64, help="Reviews used per card")
+    parser.add_argument("--holdout", type=float, default=0.1, help="Share of cards kept for evaluation")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+
+    rows = load_reviews(args.database_url, args.since)
+    if not len(rows):
+        parser.exit(1, "No reviews to fit on\n")
+
+    log = build_review_log(rows)
+    cards = rng.permutation(len(log.lengths))
+    holdout_size = int(len(cards) * args.holdout)
+    test_cards, train_cards = cards[:holdout_size], cards[holdout_size:]
+
+    batches = [
+        steps for steps in (
+            build_steps(log, train_cards[i:i + args.batch_size], args.max_reviews)
+            for i in range(0, len(train_cards), args.batch_size)
+        ) if steps
+    ]
+    test_steps = [build_steps(log, test_cards, args.max_reviews)]
+    print(f"{len(rows)} reviews, {len(log.lengths)} cards, {len(batches)} batches")
+
+    default_weights = np.array(FSRSService.DEFAULT_WEIGHTS)
+    weights = fit(batches, default_weights.copy(), args.epochs, args.learning_rate, rng)
+
+    sm2_total, sm2_count = sm2_loss(log, test_cards)
+    evaluation = {
+        "sm2": sm2_total / sm2_count if sm2_count else None,
+        "fsrs_default": mean_loss(default_weights, test_steps),
+        "fsrs_fitted": mean_loss(weights, test_steps),
+    }
+    for name, value in evaluation.items():
+        print(f"holdout log loss {name}: {value}")
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "weights": [round(float(w), 4) for w in weights],
+            "log_loss": evaluation,
+            "reviews": int(len(rows)),
+            "cards": int(len(log.lengths)),
+            "fitted_at": datetime.utcnow().isoformat(),
+        }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
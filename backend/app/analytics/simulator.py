@@ -0,0 +1,324 @@
+"""
+Simulate review load, retention and backlog for a scheduler over a year.
+
+Every card of every simulated learner lives in flat NumPy arrays (due day,
+scheduler state, true memory state), and each simulated day processes all
+due cards in a handful of vectorized operations. 100k learners with 60
+cards each run 365 days in seconds.
+
+Recall is drawn from a "true" FSRS memory model that is independent of the
+scheduler under test, so SM-2 and FSRS are compared on the same learners:
+
+    python -m app.analytics.simulator --users 100000 --scheduler sm2 fsrs
+    python -m app.analytics.simulator --replay --scheduler sm2 fsrs --output sim.json
+
+--replay takes learners and the day each card was first studied from the
+reviews table instead of generating them.
+"""
+import argparse
+import io
+import json
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from app.analytics import fsrs_fit
+from app.core.config import settings
+from app.services.fsrs_service import FSRSService
+from app.services.scheduler_service import load_fsrs_weights
+from app.services.sm2_service import SM2Service
+
+# Chance a learner already gets a word right the first time it is shown
+NEW_CARD_RECALL = 0.6
+
+# Share of quality 3/4/5 among correct answers and 0/1/2 among lapses
+CORRECT_QUALITIES = (np.array([3, 4, 5]), np.array([0.2, 0.6, 0.2]))
+LAPSE_QUALITIES = (np.array([0, 1, 2]), np.array([0.3, 0.4, 0.3]))
+
+CARD_ARRIVALS_QUERY = """
+    SELECT dense_rank() OVER (ORDER BY user_id) - 1,
+           floor(extract(epoch FROM first_review - min(first_review) OVER ()) / 86400)
+    FROM (
+        SELECT user_id, user_card_id, min(reviewed_at) AS first_review
+        FROM reviews
+        GROUP BY user_id, user_card_id
+    ) AS cards
+"""
+
+
+class Population(NamedTuple):
+    user: np.ndarray            # owning learner per card
+    introduced_day: np.ndarray  # day the card is first studied
+    users: int
+
+
+class SM2Batch:
+    """Vectorized SM2Service.calculate_next_interval + adjust_for_overdue"""
+
+    name = "sm2"
+
+    def __init__(self, size: int):
+        self.ease = np.full(size, SM2Service.INITIAL_EASE_FACTOR, dtype=np.float32)
+        self.interval = np.zeros(size, dtype=np.int32)
+        self.repetitions = np.zeros(size, dtype=np.int16)
+
+    def schedule(self, cards: np.ndarray, quality: np.ndarray, days_overdue: np.ndarray) -> np.ndarray:
+        q = 5 - quality
+        ease = np.maximum(SM2Service.MIN_EASE_FACTOR, self.ease[cards] + (0.1 - q * (0.08 + q * 0.02)))
+
+        correct = quality >= 3
+        repetitions = np.where(correct, self.repetitions[cards] + 1, 0)
+        interval = np.select(
+            [~correct | (repetitions == 1), repetitions == 2],
+            [1, 6],
+            np.maximum(1, np.round(self.interval[cards] * ease))
+        )
+        interval = np.minimum(interval, 365)
+
+        overdue = correct & (days_overdue > 0) & (self.interval[cards] > 0)
+        adjustment = 1.0 - np.minimum(1.0, days_overdue / interval) * 0.2
+        interval = np.where(overdue, np.maximum(1, np.round(interval * adjustment)), interval).astype(np.int32)
+
+        self.ease[cards] = ease
+        self.interval[cards] = interval
+        self.repetitions[cards] = repetitions
+        return interval
+
+
+class FSRSBatch:
+    """Vectorized FSRSService.calculate_next_interval"""
+
+    name = "fsrs"
+
+    def __init__(self, size: int, weights: np.ndarray, desired_retention: float):
+        self.weights = weights
+        self.stability = np.zeros(size, dtype=np.float32)
+        self.difficulty = np.zeros(size, dtype=np.float32)
+        self.interval_factor = (desired_retention ** (1 / FSRSService.DECAY) - 1) / FSRSService.FACTOR
+
+    def schedule(self, cards: np.ndarray, grade: np.ndarray, elapsed: np.ndarray, is_new: np.ndarray) -> np.ndarray:
+        stability = self.stability[cards]
+        difficulty = self.difficulty[cards]
+
+        new_stability, new_difficulty = fsrs_fit.initial_state(self.weights, grade)
+        seen = ~is_new
+        if seen.any():
+            r = fsrs_fit.retrievability(elapsed[seen], stability[seen])
+            new_stability[seen], new_difficulty[seen] = fsrs_fit.next_state(
+                self.weights, stability[seen], difficulty[seen], r, grade[seen]
+            )
+
+        self.stability[cards] = new_stability
+        self.difficulty[cards] = new_difficulty
+        return np.clip(np.round(new_stability * self.interval_factor), 1, FSRSService.MAX_INTERVAL_DAYS).astype(np.int32)
+
+
+def synthetic_population(
+    users: int,
+    cards_per_user: int,
+    new_per_day: int,
+    ramp_days: int,
+    rng: np.random.Generator
+) -> Population:
+    """Learners join over ramp_days and each studies new_per_day new cards a day"""
+    start_day = rng.integers(0, max(ramp_days, 1), size=users)
+    position = np.tile(np.arange(cards_per_user), users)
+    user = np.repeat(np.arange(users), cards_per_user)
+    return Population(
+        user=user.astype(np.int32),
+        introduced_day=(start_day[user] + position // max(new_per_day, 1)).astype(np.int32),
+        users=users,
+    )
+
+
+def replay_population(database_url: str) -> Population:
+    """Learners and card arrival days taken from the reviews table"""
+
+    import psycopg2
+
+    connection = psycopg2.connect(database_url.replace("postgresql+psycopg2://", "postgresql://"))
+    buffer = io.StringIO()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY ({CARD_ARRIVALS_QUERY}) TO STDOUT WITH CSV", buffer)
+    finally:
+        connection.close()
+
+    if not buffer.tell():
+        raise SystemExit("No reviews to replay")
+    buffer.seek(0)
+    rows = np.loadtxt(buffer, delimiter=",", ndmin=2).astype(np.int32)
+    return Population(user=rows[:, 0], introduced_day=rows[:, 1], users=int(rows[:, 0].max()) + 1)
+
+
+def simulate(
+    population: Population,
+    scheduler_name: str,
+    days: int,
+    review_limit: Optional[int],
+    true_weights: np.ndarray,
+    scheduler_weights: np.ndarray,
+    desired_retention: float,
+    seed: int
+) -> Dict[str, List[float]]:
+    """Run one scheduler over the population and return per-day metrics"""
+
+    rng = np.random.default_rng(seed)
+    size = len(population.user)
+
+    if scheduler_name == SM2Batch.name:
+        scheduler = SM2Batch(size)
+    else:
+        scheduler = FSRSBatch(size, scheduler_weights, desired_retention)
+
+    due_day = population.introduced_day.copy()
+    last_review = np.full(size, -1, dtype=np.int32)
+    true_stability = np.zeros(size, dtype=np.float32)
+    true_difficulty = np.zeros(size, dtype=np.float32)
+
+    metrics = {"reviews": [], "new_cards": [], "recalled": [], "backlog": [], "retained": []}
+
+    for day in range(days):
+        due = np.flatnonzero(due_day <= day)
+        backlog = 0
+        if review_limit is not None and len(due):
+            # Per-learner daily cap: most overdue cards first, the rest roll over
+            order = np.lexsort((due_day[due], population.user[due]))
+            due = due[order]
+            users = population.user[due]
+            group_start = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+            rank = np.arange(len(due)) - np.repeat(group_start, np.diff(np.r_[group_start, len(due)]))
+            backlog = int(np.count_nonzero(rank >= review_limit))
+            due = due[rank < review_limit]
+
+        is_new = last_review[due] < 0
+        elapsed = (day - last_review[due]).astype(np.float32)
+
+        # Ground truth: did the learner remember the card?
+        recall_probability = np.where(
+            is_new,
+            NEW_CARD_RECALL,
+            fsrs_fit.retrievability(elapsed, np.maximum(true_stability[due], FSRSService.MIN_STABILITY))
+        )
+        recalled = rng.random(len(due)) < recall_probability
+        quality = np.where(
+            recalled,
+            rng.choice(CORRECT_QUALITIES[0], size=len(due), p=CORRECT_QUALITIES[1]),
+            rng.choice(LAPSE_QUALITIES[0], size=len(due), p=LAPSE_QUALITIES[1]),
+        )
+        grade = np.where(quality < 3, 1, quality - 1)
+
+        stability, difficulty = fsrs_fit.initial_state(true_weights, grade)
+        seen = ~is_new
+        stability[seen], difficulty[seen] = fsrs_fit.next_state(
+            true_weights, true_stability[due][seen], true_difficulty[due][seen],
+            recall_probability[seen], grade[seen]
+        )
+        true_stability[due] = stability
+        true_difficulty[due] = difficulty
+
+        if isinstance(scheduler, SM2Batch):
+            interval = scheduler.schedule(due, quality, day - due_day[due])
+        else:
+            interval = scheduler.schedule(due, grade, elapsed, is_new)
+
+        last_review[due] = day
+        due_day[due] = day + interval
+
+        metrics["reviews"].append(int(len(due)))
+        metrics["new_cards"].append(int(np.count_nonzero(is_new)))
+        metrics["recalled"].append(int(np.count_nonzero(recalled & seen)))
+        metrics["backlog"].append(backlog)
+
+        # Expected number of remembered cards, sampled monthly since it touches every card
+        retained = None
+        if day % 30 == 29 or day == days - 1:
+            studied = last_review >= 0
+            retained = float(fsrs_fit.retrievability(
+                (day + 1 - last_review[studied]).astype(np.float32),
+                np.maximum(true_stability[studied], FSRSService.MIN_STABILITY)
+            ).sum())
+        metrics["retained"].append(retained)
+
+    return metrics
+
+
+def summarize(metrics: Dict[str, List[float]]) -> Dict[str, float]:
+    reviews = np.array(metrics["reviews"])
+    repeat_reviews = int(reviews.sum() - sum(metrics["new_cards"]))
+    retained = next(value for value in reversed(metrics["retained"]) if value is not None)
+    total_reviews = int(reviews.sum())
+    return {
+        "total_reviews": total_reviews,
+        "peak_daily_reviews": int(reviews.max()),
+        "mean_daily_reviews_last_30": float(reviews[-30:].mean()),
+        "recall_rate": sum(metrics["recalled"]) / repeat_reviews if repeat_reviews else 0.0,
+        "final_backlog": metrics["backlog"][-1],
+        "retained_cards": retained,
+        "reviews_per_retained_card": total_reviews / retained if retained else float("inf"),
+    }
+
+
+def print_report(results: Dict[str, Dict]) -> None:
+    print(f"{'scheduler':<10}{'reviews':>14}{'peak/day':>10}{'last30/day':>12}"
+          f"{'recall':>8}{'backlog':>10}{'retained':>12}{'rev/retained':>14}")
+    for name, result in results.items():
+        s = result["summary"]
+        print(
+            f"{name:<10}{s['total_reviews']:>14}{s['peak_daily_reviews']:>10}"
+            f"{s['mean_daily_reviews_last_30']:>12.0f}{s['recall_rate']:>8.3f}"
+            f"{s['final_backlog']:>10}{s['retained_cards']:>12.0f}{s['reviews_per_retained_card']:>14.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate scheduler review load and retention")
+    parser.add_argument("--scheduler", nargs="+", choices=[SM2Batch.name, FSRSBatch.name], default=[SM2Batch.name])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--cards-per-user", type=int, default=60)
+    parser.add_argument("--new-per-day", type=int, default=5, help="New cards a learner starts per day")
+    parser.add_argument("--ramp-days", type=int, default=30, help="Learners join uniformly over this many days")
+    parser.add_argument("--review-limit", type=int, help="Max reviews per learner per day (unlimited by default)")
+    parser.add_argument("--replay", action="store_true", help="Take learners and card arrivals from the reviews table")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--weights", default=settings.FSRS_WEIGHTS_PATH, help="FSRS weights used by the fsrs scheduler")
+    parser.add_argument("--true-weights", help="FSRS weights of the simulated learners (defaults to --weights)")
+    parser.add_argument("--desired-retention", type=float, default=settings.FSRS_DESIRED_RETENTION)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write per-day metrics and summaries as JSON")
+    args = parser.parse_args()
+    if args.days < 1:
+        parser.error("--days must be at least 1")
+
+    scheduler_weights = np.array(load_fsrs_weights(args.weights) or FSRSService.DEFAULT_WEIGHTS)
+    true_weights = np.array(load_fsrs_weights(args.true_weights) or scheduler_weights)
+
+    if args.replay:
+        population = replay_population(args.database_url)
+    else:
+        population = synthetic_population(
+            args.users, args.cards_per_user, args.new_per_day, args.ramp_days, np.random.default_rng(args.seed)
+        )
+    print(f"{population.users} learners, {len(population.user)} cards, {args.days} days")
+
+    results = {}
+    for name in args.scheduler:
+        started = time.perf_counter()
+        metrics = simulate(
+            population, name, args.days, args.review_limit,
+            true_weights, scheduler_weights, args.desired_retention, args.seed
+        )
+        results[name] = {"summary": summarize(metrics), "daily": metrics}
+        print(f"{name}: simulated in {time.perf_counter() - started:.1f}s")
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f)
+
+
+if __name__ == "__main__":
+    main()
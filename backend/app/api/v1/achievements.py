@@ -1,8 +1,12 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.cache import catalog_cache
+from app.core.config import settings
+from app.core.database import get_db, read_only
+from app.core.http_cache import conditional_response, make_etag
 from app.api.v1.auth import get_current_user
 from app.models.user import User
 from app.models.achievement import Achievement, UserAchievement
@@ -18,11 +22,12 @@ router = APIRouter()
     description="Get list of all available achievements"
 )
 async def get_achievements(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all available achievements"""
-    try:
+    def load_achievements():
         achievements = db.query(Achievement).filter(
             Achievement.is_active == True
         ).all()
@@ -40,6 +45,17 @@ async def get_achievements(
             }
             for achievement in achievements
         ]
+    
+    try:
+        async with read_only(db):
+            achievements = await catalog_cache.get_or_load("achievements:active", load_achievements)
+        
+        return conditional_response(
+            request,
+            achievements,
+            etag=make_etag("achievements", orjson.dumps(achievements)),
+            max_age=settings.HTTP_CACHE_CATALOG_MAX_AGE
+        )
         
     except Exception as e:
         raise HTTPException(
@@ -60,26 +76,27 @@ async def get_my_achievements(
 ):
     """Get achievements earned by current user"""
     try:
-        user_achievements = db.query(UserAchievement).join(Achievement).filter(
-            UserAchievement.user_id == current_user.id,
-            Achievement.is_active == True
-        ).all()
-        
-        return [
-            {
-                "id": ua.achievement.id,
-                "code": ua.achievement.code,
-                "title": ua.achievement.title,
-                "description": ua.achievement.description,
-                "icon": ua.achievement.icon,
-                "category": ua.achievement.category,
-                "difficulty": ua.achievement.difficulty,
-                "points": ua.achievement.points,
-                "earned_at": ua.earned_at.isoformat(),
-                "context_data": ua.context_data
-            }
-            for ua in user_achievements
-        ]
+        async with read_only(db, str(current_user.id)):
+            user_achievements = db.query(UserAchievement).join(Achievement).filter(
+                UserAchievement.user_id == current_user.id,
+                Achievement.is_active == True
+            ).all()
+            
+            return [
+                {
+                    "id": ua.achievement.id,
+                    "code": ua.achievement.code,
+                    "title": ua.achievement.title,
+                    "description": ua.achievement.description,
+                    "icon": ua.achievement.icon,
+                    "category": ua.achievement.category,
+                    "difficulty": ua.achievement.difficulty,
+                    "points": ua.achievement.points,
+                    "earned_at": ua.earned_at.isoformat(),
+                    "context_data": ua.context_data
+                }
+                for ua in user_achievements
+            ]
         
     except Exception as e:
         raise HTTPException(
@@ -1,12 +1,14 @@
 import logging
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Cookie
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Request, Cookie
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.rate_limit import account_identity, enforce, rate_limit
 from app.services.auth_service import AuthService
+from app.services.card_service import seed_starter_deck
 from app.schemas.auth import (
     UserRegister, UserLogin, Token, TokenRefresh, 
     TokenRefreshResponse, PasswordReset, PasswordResetConfirm
@@ -24,10 +26,12 @@ logger = logging.getLogger(__name__)
     response_model=Token,
     status_code=status.HTTP_201_CREATED,
     summary="Register new user",
-    description="Create a new user account with email and password"
+    description="Create a new user account with email and password",
+    dependencies=[Depends(rate_limit("register", per_ip=True))]
 )
 async def register(
         user_data: UserRegister,
+        background_tasks: BackgroundTasks,
         db: Session = Depends(get_db)
 ):
     """Register a new user and return access tokens"""
@@ -36,9 +40,12 @@ async def register(
         auth_service = AuthService(db)
 
         # Create user
-        await auth_service.register_user(user_data)
+        user = await auth_service.register_user(user_data)
         logger.info(f"Пользователь {user_data.email} успешно зарегистрирован")
 
+        # Стартовая колода создаётся после ответа, не задерживая регистрацию
+        background_tasks.add_task(seed_starter_deck, str(user.id))
+
         # Authenticate and return tokens
         login_data = UserLogin(email=user_data.email, password=user_data.password)
         tokens = await auth_service.authenticate_user(login_data)
@@ -57,8 +64,16 @@ async def register(
         )
 
 
-@router.post("/login", summary="User login", description="Authenticate user and set tokens in httpOnly cookies")
+@router.post(
+    "/login",
+    summary="User login",
+    description="Authenticate user and set tokens in httpOnly cookies",
+    dependencies=[Depends(rate_limit("login", per_ip=True))]
+)
 async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+    # Per account as well as per IP: guessing one password from many addresses is limited too
+    await enforce("login_account", account_identity(credentials.email))
+    
     auth_service = AuthService(db)
     try:
         tokens = await auth_service.authenticate_user(credentials)
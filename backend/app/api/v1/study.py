@@ -1,14 +1,27 @@
 
+import asyncio
+import time
+import zlib
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db
+from app.core.rate_limit import rate_limit
+from app.core.security import decode_token
+from app.services.auth_service import AuthService, is_token_revoked
+from app.services.study_channel import StudyChannel
+from app.services.session_stats_service import SessionStatsService
 from app.services.study_service import StudyService
 from app.schemas.study import (
     StudyCardsRequest, StudyCardsResponse, 
     ReviewBatch, ReviewBatchResponse,
+    ReviewSyncChunk, ReviewSyncResponse,
     SessionReplaceRequest, SessionReplaceResponse,
     StudySessionStats, LeaderboardResponse
 )
@@ -17,7 +30,7 @@ from app.models.user import User
 from app.core.exceptions import PairLinguaException
 from sqlalchemy.sql import func
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 @router.get(
@@ -45,7 +58,8 @@ async def get_due_cards(
             cefr_levels=cefr_levels
         )
         
-        return await study_service.get_due_cards(str(current_user.id), request)
+        payload = await study_service.get_due_cards_payload(str(current_user.id), request)
+        return Response(content=payload, media_type="application/json")
         
     except PairLinguaException as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
@@ -55,7 +69,8 @@ async def get_due_cards(
     "/cards/review",
     response_model=ReviewBatchResponse,
     summary="Submit review results",
-    description="Submit batch of review results and update SM-2 intervals"
+    description="Submit batch of review results and update SM-2 intervals",
+    dependencies=[Depends(rate_limit("review"))]
 )
 async def submit_reviews(
     review_batch: ReviewBatch,
@@ -71,6 +86,114 @@ async def submit_reviews(
         raise HTTPException(status_code=e.status_code, detail=e.message)
 
 
+async def read_sync_body(request: Request) -> bytes:
+    """Request body, gunzipped when sent with Content-Encoding: gzip, capped at SYNC_MAX_BODY_BYTES"""
+    
+    body = await request.body()
+    encoding = request.headers.get("content-encoding", "identity").lower()
+    if encoding == "identity":
+        decoded = body
+    elif encoding == "gzip":
+        # Bounded decompression: a small gzip bomb cannot expand past the limit
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            decoded = decompressor.decompress(body, settings.SYNC_MAX_BODY_BYTES + 1)
+        except zlib.error:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid gzip body")
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported Content-Encoding: {encoding}"
+        )
+    
+    if len(decoded) > settings.SYNC_MAX_BODY_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Sync chunk too large")
+    return decoded
+
+
+@router.post(
+    "/sync",
+    response_model=ReviewSyncResponse,
+    summary="Sync offline reviews",
+    description="Upload a chunk of an offline review log (JSON, optionally gzip-compressed); "
+                "resent reviews are recognised by client_review_id and applied once; "
+                "409 while another chunk of the same user is being applied",
+    dependencies=[Depends(rate_limit("review"))]
+)
+async def sync_reviews(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Apply offline reviews in client order; safe to resend after a dropped connection"""
+    try:
+        chunk = ReviewSyncChunk.model_validate_json(await read_sync_body(request))
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    
+    try:
+        study_service = StudyService(db)
+        return await study_service.sync_reviews(str(current_user.id), chunk)
+        
+    except PairLinguaException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+
+@router.websocket("/ws")
+async def study_session_socket(
+    websocket: WebSocket,
+    limit: int = Query(20, ge=1, le=50),
+    include_new: bool = Query(True),
+    cefr_levels: Optional[List[str]] = Query(None)
+):
+    """
+    Study session over one WebSocket: the server sends the cards, the client
+    sends reviews as they happen and gets each result with a replacement card.
+    Authenticated from the access_token cookie on the handshake, which must
+    come from an allowed origin; the socket is closed once the token expires
+    or is revoked, and the client reconnects with a refreshed one.
+    """
+    # Browsers send cookies with cross-site handshakes too: only allowed origins may use them
+    origin = websocket.headers.get("origin")
+    access_token = websocket.cookies.get("access_token")
+    if not access_token or (origin is not None and origin not in settings.CORS_ORIGINS):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    # The socket may stay open for a long time: don't hold a DB session for it
+    db = SessionLocal()
+    try:
+        user = await AuthService(db).get_current_user(access_token)
+        user_id = str(user.id)
+        claims = decode_token(access_token)
+    except (PairLinguaException, HTTPException):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    finally:
+        db.close()
+
+    await websocket.accept()
+    channel = StudyChannel(
+        user_id,
+        StudyCardsRequest(limit=limit, include_new=include_new, cefr_levels=cefr_levels)
+    )
+    try:
+        await websocket.send_text(await channel.start())
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive(), timeout=claims["exp"] - time.time())
+            except asyncio.TimeoutError:
+                break
+            if message["type"] == "websocket.disconnect":
+                return
+            if await is_token_revoked(claims["jti"]):
+                break
+            await websocket.send_text(await channel.handle(message.get("text")))
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token expired or revoked")
+    except WebSocketDisconnect:
+        pass
+
+
 @router.post(
     "/session/replace",
     response_model=SessionReplaceResponse,
@@ -104,18 +227,8 @@ async def get_session_stats(
 ):
     """Get statistics for a study session"""
     try:
-        # Implementation would fetch session stats
-        # For now, return placeholder
-        return StudySessionStats(
-            session_id=session_id,
-            started_at=func.now(),
-            cards_studied=0,
-            cards_correct=0,
-            average_response_time=None,
-            accuracy=0.0,
-            points_earned=0,
-            time_spent_minutes=0
-        )
+        session_stats_service = SessionStatsService(db)
+        return await session_stats_service.get(str(current_user.id), session_id)
         
     except PairLinguaException as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
@@ -162,10 +275,14 @@ async def get_progress_overview(
         # Get basic stats for overview
         from app.services.user_service import UserService
         user_service = UserService(db)
-        stats = user_service.get_user_stats(str(current_user.id))
+        stats = await user_service.get_user_stats(str(current_user.id))
+        due_counts = await user_service.due_forecast_service.count_due(
+            str(current_user.id), current_user.timezone
+        )
         
         return {
             "cards_due": stats.cards_due,
+            "cards_due_week": due_counts.week,
             "cards_learned": stats.cards_learned,
             "current_streak": stats.current_streak,
             "accuracy": stats.accuracy,
@@ -1,9 +1,11 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_db, replica_allowed
 from app.services.user_service import UserService
+from app.services.export_service import ExportService
 from app.schemas.user import (
     User, UserUpdate, UserStats, UserStatsDetailed
 )
@@ -45,7 +47,7 @@ async def update_my_profile(
     """Update current user profile"""
     try:
         user_service = UserService(db)
-        return user_service.update_user_profile(str(current_user.id), update_data)
+        return await user_service.update_user_profile(str(current_user.id), update_data)
     except PairLinguaException as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
 
@@ -63,7 +65,7 @@ async def get_my_stats(
     """Get user learning statistics"""
     try:
         user_service = UserService(db)
-        return user_service.get_user_stats(str(current_user.id))
+        return await user_service.get_user_stats(str(current_user.id))
     except PairLinguaException as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
 
@@ -88,11 +90,39 @@ async def get_my_detailed_stats(
             )
         
         user_service = UserService(db)
-        return user_service.get_user_detailed_stats(str(current_user.id), date_range)
+        return await user_service.get_user_detailed_stats(str(current_user.id), date_range)
     except PairLinguaException as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
 
 
+@router.get(
+    "/me/export/{kind}",
+    summary="Export review history or cards",
+    description="Stream all reviews or cards of the current user as NDJSON or CSV"
+)
+async def export_my_data(
+    kind: str,
+    format: str = Query("ndjson", description="ndjson or csv"),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream the user's reviews or cards with constant memory"""
+    if kind not in ("reviews", "cards"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown export")
+    
+    try:
+        user_id = str(current_user.id)
+        export_service = ExportService(user_id, format, use_replica=await replica_allowed(user_id))
+    except PairLinguaException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    
+    rows = export_service.stream_reviews() if kind == "reviews" else export_service.stream_cards()
+    return StreamingResponse(
+        rows,
+        media_type=export_service.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export_service.filename(kind)}"'}
+    )
+
+
 @router.post(
     "/me/change-password",
     status_code=status.HTTP_200_OK,
@@ -1,8 +1,18 @@
+from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.core.cache import catalog_cache
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.rate_limit import rate_limit
+from app.core.http_cache import (
+    conditional_response, is_not_modified, make_etag, read_version, user_progress_key
+)
+from app.services.card_state_service import CardStateService
+from app.services.catalog_service import CatalogFeedService
 from app.services.word_service import WordService
 from app.schemas.word import (
     WordPair, WordPairCreate, WordPairUpdate, WordPairSearch,
@@ -12,16 +22,18 @@ from app.api.v1.auth import get_current_user
 from app.models.user import User
 from app.core.exceptions import PairLinguaException
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 @router.get(
     "/pairs",
     response_model=List[WordPairWithUserProgress],
     summary="Search word pairs",
-    description="Search word pairs with optional filters and user progress"
+    description="Search word pairs with optional filters and user progress",
+    dependencies=[Depends(rate_limit("search"))]
 )
 async def search_word_pairs(
+    request: Request,
     query: Optional[str] = Query(None, description="Search term"),
     cefr_level: Optional[str] = Query(None, description="CEFR level filter"),
     tags: Optional[List[str]] = Query(None, description="Tags filter"),
@@ -40,19 +52,42 @@ async def search_word_pairs(
             cursor=cursor
         )
         
+        # Results change with the catalog, the user's own progress and, through
+        # is_due, whenever one of the user's cards becomes due
+        user_id = str(current_user.id)
+        catalog_version = await read_version(catalog_cache.VERSION_KEY)
+        progress_version = await read_version(user_progress_key(user_id))
+        etag = None
+        if catalog_version is not None and progress_version is not None:
+            snapshot = await CardStateService(db).get(user_id)
+            etag = make_etag(
+                "search",
+                catalog_version,
+                user_id,
+                progress_version,
+                snapshot.next_due(datetime.utcnow()),
+                search_params.model_dump_json()
+            )
+            if is_not_modified(request, etag):
+                return conditional_response(
+                    request, None, etag, max_age=settings.HTTP_CACHE_PRIVATE_MAX_AGE
+                )
+        
         word_service = WordService(db)
-        word_pairs, next_cursor = word_service.get_word_pairs(
+        word_pairs, next_cursor = await word_service.get_word_pairs(
             search_params, 
-            user_id=str(current_user.id)
+            user_id=user_id
         )
-        if not word_pairs:
-            # Вернуть пустой список с описанием в заголовке (например)
-            # Или просто пустой список: FastAPI сериализует его в []
-            return []
+        
+        # Without the versions (Redis unavailable) the response cannot be validated
+        if etag is None:
+            return word_pairs
         
         # Add pagination header
         # In real implementation, you'd add Link header with next_cursor
-        return word_pairs
+        return conditional_response(
+            request, word_pairs, etag, max_age=settings.HTTP_CACHE_PRIVATE_MAX_AGE
+        )
         
     except PairLinguaException as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
@@ -89,6 +124,29 @@ async def get_random_word_pairs_simple_route(
 
 
 
+@router.get(
+    "/catalog",
+    summary="Catalog snapshot or changes",
+    description="Stream all active word pairs, or the pairs changed since a catalog version, as NDJSON"
+)
+async def get_catalog_feed(
+    request: Request,
+    since: Optional[str] = Query(None, description="Catalog version from the last line of a previous response"),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream the catalog for client-side caching; the last line carries the next version"""
+    try:
+        gzip = "gzip" in request.headers.get("accept-encoding", "")
+        feed = CatalogFeedService(since, gzip=gzip)
+    except PairLinguaException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    
+    headers = {"Cache-Control": "no-store", "Vary": "Accept-Encoding"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(feed.stream(), media_type="application/x-ndjson", headers=headers)
+
+
 @router.get(
     "/pairs/{word_pair_id}",
     response_model=WordPair,
@@ -97,13 +155,24 @@ async def get_random_word_pairs_simple_route(
 )
 async def get_word_pair(
     word_pair_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get word pair by ID"""
     try:
         word_service = WordService(db)
-        return word_service.get_word_pair(word_pair_id)
+        word_pair = await word_service.get_word_pair_cached(word_pair_id)
+        
+        # Rows loaded with an explicit NULL updated_at fall back to created_at
+        modified = word_pair["updated_at"] or word_pair["created_at"]
+        return conditional_response(
+            request,
+            word_pair,
+            etag=make_etag("word_pair", word_pair_id, modified),
+            last_modified=datetime.fromisoformat(modified) if modified else None,
+            max_age=settings.HTTP_CACHE_CATALOG_MAX_AGE
+        )
     except PairLinguaException as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
 
@@ -124,7 +193,7 @@ async def create_word_pair(
     try:
         # In real implementation, check if user is admin
         word_service = WordService(db)
-        return word_service.create_word_pair(word_data)
+        return await word_service.create_word_pair(word_data)
     except PairLinguaException as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
 
@@ -145,7 +214,7 @@ async def create_word_pairs_batch(
     try:
         # In real implementation, check if user is admin
         word_service = WordService(db)
-        return word_service.create_word_pairs_batch(batch_data)
+        return await word_service.create_word_pairs_batch(batch_data)
     except PairLinguaException as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
 
@@ -166,7 +235,7 @@ async def update_word_pair(
     try:
         # In real implementation, check if user is admin
         word_service = WordService(db)
-        return word_service.update_word_pair(word_pair_id, update_data)
+        return await word_service.update_word_pair(word_pair_id, update_data)
     except PairLinguaException as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
 
@@ -186,7 +255,7 @@ async def delete_word_pair(
     try:
         # In real implementation, check if user is admin
         word_service = WordService(db)
-        success = word_service.delete_word_pair(word_pair_id)
+        success = await word_service.delete_word_pair(word_pair_id)
         
         if success:
             return {"message": f"Word pair {word_pair_id} deleted successfully"}
@@ -0,0 +1,223 @@
+import asyncio
+import inspect
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import redis_client, redis_service
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCache:
+    """
+    Process-local LRU cache with per-entry TTL and a hard size bound.
+
+    With max_bytes, values must support len() (bytes, str) and the least
+    recently used entries are also evicted once their total length exceeds it.
+    """
+
+    def __init__(self, max_size: int, ttl: int, max_bytes: Optional[int] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value, size = entry
+            if expires_at < time.monotonic():
+                self._pop(key)
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        size = len(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._pop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._data[key] = (expires_at, value, size)
+            self._bytes += size
+            while len(self._data) > self.max_size or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._pop(next(iter(self._data)))
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _pop(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+
+class CatalogCache:
+    """
+    Two-tier cache for rarely changing catalog data (word pairs, achievements,
+    CEFR level lists).
+
+    Reads hit the in-process LRU first, then Redis, then the caller's loader.
+    Invalidation drops both tiers and is broadcast over Redis pub/sub so every
+    worker evicts its local copy. Values must be JSON-serializable.
+    """
+
+    KEY_PREFIX = "catalog:"
+    CHANNEL = "catalog:invalidate"
+    VERSION_KEY = "catalog:version"
+
+    def __init__(self, max_size: int, ttl: int):
+        self.ttl = ttl
+        self.local = LocalCache(max_size, ttl)
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        try:
+            cached = await redis_service.get(self.KEY_PREFIX + key)
+        except RedisError as e:
+            logger.warning(f"Catalog cache read failed for {key}: {e}")
+            return None
+
+        if cached is None:
+            return None
+
+        value = json.loads(cached)
+        self.local.set(key, value)
+        return value
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+
+        if not missing:
+            return found
+
+        try:
+            cached_values = await redis_service.mget([self.KEY_PREFIX + key for key in missing])
+        except RedisError as e:
+            logger.warning(f"Catalog cache read failed for {len(missing)} keys: {e}")
+            return found
+
+        for key, cached in zip(missing, cached_values):
+            if cached is None:
+                continue
+            value = json.loads(cached)
+            self.local.set(key, value)
+            found[key] = value
+
+        return found
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.set_many({key: value})
+
+    async def set_many(self, values: Dict[str, Any]) -> None:
+        if not values:
+            return
+
+        for key, value in values.items():
+            self.local.set(key, value)
+
+        try:
+            await redis_service.set_many(
+                {self.KEY_PREFIX + key: json.dumps(value) for key, value in values.items()},
+                ex=self.ttl
+            )
+        except RedisError as e:
+            logger.warning(f"Catalog cache write failed: {e}")
+
+    async def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Return cached value or compute it with loader and cache the result"""
+
+        value = await self.get(key)
+        if value is None:
+            value = loader()
+            if inspect.isawaitable(value):
+                value = await value
+            await self.set(key, value)
+        return value
+
+    async def version(self) -> int:
+        """Catalog version counter, bumped on every invalidation"""
+
+        try:
+            return int(await redis_service.get(self.VERSION_KEY) or 0)
+        except RedisError as e:
+            logger.warning(f"Catalog version read failed: {e}")
+            return 0
+
+    async def invalidate(self, *keys: str) -> None:
+        """Drop keys from both tiers and tell other workers to do the same"""
+
+        if not keys:
+            return
+
+        self.local.delete(*keys)
+        try:
+            await redis_service.delete(*[self.KEY_PREFIX + key for key in keys])
+            await redis_service.incr(self.VERSION_KEY)
+            await redis_service.publish(self.CHANNEL, json.dumps(list(keys)))
+        except RedisError as e:
+            logger.warning(f"Catalog cache invalidation failed: {e}")
+
+    async def listen(self) -> None:
+        """Evict local entries whenever any worker invalidates catalog keys"""
+
+        while True:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    keys: List[str] = json.loads(message["data"])
+                    self.local.delete(*keys)
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, ValueError) as e:
+                # Invalidations may have been missed while disconnected
+                logger.warning(f"Catalog cache subscriber error: {e}")
+                self.local.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.reset()
+
+
+catalog_cache = CatalogCache(
+    max_size=settings.CATALOG_CACHE_MAX_SIZE,
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,181 @@
+import hashlib
+import zlib
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import LocalCache
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # poetry install --with compression
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported coding from Accept-Encoding: br, then gzip"""
+
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+class StreamCompressor:
+    """Incremental compressor flushing after every chunk, for streaming responses"""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self.encoding = encoding
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON and text responses with Brotli (when installed) or gzip,
+    as the client's Accept-Encoding allows.
+
+    Complete bodies under COMPRESSION_MIN_SIZE are sent as is. Compressed
+    variants are kept in a process-local LRU keyed by a digest of the body,
+    so bodies served from a cache (due cards, catalog entries, search pages
+    revalidated by ETag) are compressed once rather than on every hit.
+    Streaming responses are compressed chunk by chunk, flushing after each
+    so the client can decode as data arrives. Responses that already carry
+    a Content-Encoding are left alone. ETags become weak on compressed
+    responses; conditional requests compare them weakly.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.variants = LocalCache(settings.COMPRESSION_CACHE_SIZE, settings.COMPRESSION_CACHE_TTL_SECONDS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        streamer: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def compressing_send(message: Message) -> None:
+            nonlocal start, streamer, passthrough
+
+            if message["type"] == "http.response.start":
+                start = message
+                headers = Headers(raw=message.get("headers", []))
+                passthrough = (
+                    message["status"] < 200
+                    or message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if streamer is not None:
+                chunk = streamer.compress(body) if body else b""
+                if not more_body:
+                    chunk += streamer.finish()
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            if not more_body:
+                # Complete body in one message
+                if len(body) < settings.COMPRESSION_MIN_SIZE:
+                    await send(start)
+                    await send(message)
+                    return
+                compressed = self._compressed(body, encoding)
+                await send(self._encoded_start(start, encoding, len(compressed)))
+                await send({"type": "http.response.body", "body": compressed})
+                return
+
+            streamer = StreamCompressor(encoding)
+            await send(self._encoded_start(start, encoding, None))
+            await send({"type": "http.response.body", "body": streamer.compress(body), "more_body": True})
+
+        await self.app(scope, receive, compressing_send)
+
+    def _compressed(self, body: bytes, encoding: str) -> bytes:
+        if len(body) > settings.COMPRESSION_CACHE_MAX_BODY_BYTES:
+            return compress(body, encoding)
+
+        key = f"{encoding}:{hashlib.blake2b(body, digest_size=16).hexdigest()}"
+        compressed = self.variants.get(key)
+        if compressed is None:
+            compressed = compress(body, encoding)
+            self.variants.set(key, compressed)
+        return compressed
+
+    @staticmethod
+    def _encoded_start(start: Message, encoding: str, length: Optional[int]) -> Message:
+        raw_headers: List[Tuple[bytes, bytes]] = list(start.get("headers", []))
+        headers = MutableHeaders(raw=raw_headers)
+        headers["content-encoding"] = encoding
+        headers.add_vary_header("Accept-Encoding")
+        if length is None:
+            del headers["content-length"]
+        else:
+            headers["content-length"] = str(length)
+
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["etag"] = f"W/{etag}"
+
+        return {**start, "headers": headers.raw}
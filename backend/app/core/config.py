@@ -19,10 +19,30 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     ENVIRONMENT: str = "development"
 
+    # Сервер (gunicorn + uvicorn-воркеры): 0 воркеров — по одному на доступное ядро
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_PRELOAD: bool = True
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_KEEPALIVE: int = 5
+    SERVER_MAX_REQUESTS: int = 10000
+    SERVER_MAX_REQUESTS_JITTER: int = 1000
+    # Адреса прокси (через запятую), которым верим в X-Forwarded-For; иначе клиент — адрес соединения
+    TRUSTED_PROXIES: str = "127.0.0.1"
+    # Таблицы и разделы reviews при старте воркера; мастер gunicorn с preload делает это сам, один раз
+    SERVER_STARTUP_MAINTENANCE: bool = True
+
     # База данных и редис
     DATABASE_URL: str
     REDIS_URL: str
 
+    # Реплики для чтения (статистика, поиск, достижения); пусто — всё читается с primary
+    REPLICA_DATABASE_URLS: Optional[Union[str, List[str]]] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    REPLICA_STICKY_SECONDS: int = 30
+
     # JWT ключи
     JWT_SECRET_KEY: str
     JWT_REFRESH_SECRET_KEY: str
@@ -33,7 +53,7 @@ class Settings(BaseSettings):
     # CORS origins, валидатор для парсинга строки в список
     CORS_ORIGINS: Optional[Union[str, List[str]]] = "http://localhost:5173"
 
-    @field_validator("CORS_ORIGINS", mode="before")
+    @field_validator("CORS_ORIGINS", "REPLICA_DATABASE_URLS", mode="before")
     @classmethod
     def assemble_cors_origins(cls, v: Union[str, List[str], None]) -> List[str]:
         if not v:
@@ -46,7 +66,94 @@ class Settings(BaseSettings):
                 import json
                 return json.loads(v)
             return [item.strip() for item in v.split(",") if item.strip()]
-        raise ValueError("Invalid CORS_ORIGINS value")
+        raise ValueError("Invalid list value")
+
+    # Кэш каталога (слова, достижения, списки по уровням CEFR)
+    CATALOG_CACHE_MAX_SIZE: int = 10000
+    CATALOG_CACHE_TTL_SECONDS: int = 300
+
+    # HTTP-кэширование (Cache-Control max-age, секунды)
+    HTTP_CACHE_CATALOG_MAX_AGE: int = 300
+    HTTP_CACHE_PRIVATE_MAX_AGE: int = 60
+
+    # Профилирование запросов (счётчики SQL/Redis, Server-Timing, медленные запросы)
+    PROFILING_ENABLED: bool = True
+    PROFILING_SAMPLE_RATE: float = 1.0
+    SLOW_QUERY_THRESHOLD_MS: int = 200
+
+    # Планировщик повторений: "sm2" или "fsrs" (веса FSRS подбираются app.analytics.fsrs_fit)
+    SCHEDULER: str = "sm2"
+    FSRS_DESIRED_RETENTION: float = 0.9
+    FSRS_WEIGHTS_PATH: Optional[str] = None
+
+    # Балансировка нагрузки: сдвиг даты повторения в пределах разброса на наименее загруженный день
+    DUE_LOAD_BALANCING: bool = True
+    DUE_FORECAST_DAYS: int = 400
+    DUE_FORECAST_TTL_SECONDS: int = 86400 * 30
+
+    # Снимок состояния карточек пользователя (упакованные массивы в Redis) для выбора карточек и статистики
+    CARD_STATE_TTL_SECONDS: int = 86400 * 7
+
+    # Статистика учебных сессий: счётчики в Redis, для старых сессий — агрегат по reviews
+    SESSION_STATS_TTL_SECONDS: int = 86400 * 7
+
+    # Новые карточки: указатель на следующее неизученное слово и стартовая колода (0 — не создавать)
+    CARD_FRONTIER_TTL_SECONDS: int = 86400 * 30
+    STARTER_DECK_SIZE: int = 20
+
+    # Партиционирование reviews по месяцам и архив старых партиций в Parquet
+    REVIEWS_PARTITION_MONTHS_AHEAD: int = 3
+    REVIEWS_RETENTION_MONTHS: int = 24
+    REVIEWS_ARCHIVE_ENABLED: bool = False
+    REVIEWS_ARCHIVE_DIR: str = "archive/reviews"
+    REVIEWS_ARCHIVE_BATCH_SIZE: int = 50000
+
+    # Ограничение частоты запросов (token bucket в Redis): "<ёмкость>/<second|minute|hour|day>"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN: str = "10/minute"
+    RATE_LIMIT_LOGIN_ACCOUNT: str = "30/hour"   # попытки входа в один аккаунт с любых адресов
+    RATE_LIMIT_REGISTER: str = "5/hour"
+    RATE_LIMIT_REVIEW: str = "120/minute"
+    RATE_LIMIT_SEARCH: str = "60/minute"
+
+    # Объединение одновременных одинаковых запросов (single-flight)
+    SINGLE_FLIGHT_LOCK_SECONDS: int = 10
+    SINGLE_FLIGHT_WAIT_SECONDS: float = 3.0
+
+    # Идемпотентность изменяющих запросов (заголовок Idempotency-Key)
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_SECONDS: int = 60
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    IDEMPOTENCY_MAX_BODY_BYTES: int = 1024 * 1024
+    # Локальная копия записей только на время недоступности Redis
+    IDEMPOTENCY_LOCAL_MAX_SIZE: int = 1000
+    IDEMPOTENCY_LOCAL_MAX_BYTES: int = 64 * 1024 * 1024
+    IDEMPOTENCY_LOCAL_TTL_SECONDS: int = 600
+
+    # Офлайн-синхронизация повторений: предельный размер части после распаковки gzip
+    SYNC_MAX_BODY_BYTES: int = 5 * 1024 * 1024
+    # Насколько часы клиента могут спешить: более поздние повторения отклоняются
+    SYNC_MAX_CLOCK_SKEW_SECONDS: int = 300
+
+    # Сжатие ответов (brotli при установленной группе compression, иначе gzip); сжатые варианты кэшируются по хэшу тела
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_CACHE_SIZE: int = 512
+    COMPRESSION_CACHE_TTL_SECONDS: int = 300
+    COMPRESSION_CACHE_MAX_BODY_BYTES: int = 1024 * 1024
+
+    # Лента изменений каталога: изменений за один запрос и задержка, за которую успевают завершиться транзакции
+    CATALOG_CHANGES_LIMIT: int = 5000
+    CATALOG_CHANGES_LAG_SECONDS: int = 5
+    CATALOG_FEED_BATCH_SIZE: int = 1000
+
+    # Учебная сессия через WebSocket: карточки в очереди на замену отвеченных
+    STUDY_WS_PREFETCH: int = 10
+
+    # Потоковый экспорт повторений и карточек (строк на одну выборку курсора)
+    EXPORT_BATCH_SIZE: int = 2000
 
     # Почта (опционально)
     SMTP_SERVER: Optional[str] = None
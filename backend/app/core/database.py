@@ -1,25 +1,100 @@
-from sqlalchemy import create_engine, MetaData
+import functools
+import inspect
+import logging
+import random
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy import create_engine, MetaData, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import NullPool
 
 from app.core.config import settings
+from app.core.profiling import install_query_profiler
+from app.core.redis import redis_service
+
+logger = logging.getLogger(__name__)
+
+
+def _create_engine(url: str) -> Engine:
+    if settings.ENVIRONMENT == "testing":
+        new_engine = create_engine(url, poolclass=NullPool, echo=settings.DEBUG)
+    else:
+        new_engine = create_engine(url, pool_pre_ping=True, echo=settings.DEBUG)
+    install_query_profiler(new_engine)
+    return new_engine
+
+
+# Create engines: the primary takes every write, replicas serve read_only() blocks
+engine = _create_engine(settings.DATABASE_URL)
+replica_engines = [_create_engine(url) for url in settings.REPLICA_DATABASE_URLS]
+
+# Seconds of replay lag; 0 on a primary or a replica that has replayed everything it received
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class ReplicaPool:
+    """Replica engines whose lag is checked at most every REPLICA_LAG_CHECK_SECONDS"""
+
+    def __init__(self, engines: List[Engine]):
+        self.engines = engines
+        self._status: Dict[Engine, Tuple[float, bool]] = {}
+
+    def choose(self) -> Optional[Engine]:
+        """A random replica within REPLICA_MAX_LAG_SECONDS, or None to use the primary"""
+        healthy = [replica for replica in self.engines if self._is_fresh(replica)]
+        return random.choice(healthy) if healthy else None
+
+    def _is_fresh(self, replica: Engine) -> bool:
+        now = time.monotonic()
+        checked_at, fresh = self._status.get(replica, (0.0, False))
+        if now - checked_at < settings.REPLICA_LAG_CHECK_SECONDS:
+            return fresh
+
+        try:
+            with replica.connect() as connection:
+                lag = float(connection.execute(text(REPLICA_LAG_QUERY)).scalar())
+            fresh = lag <= settings.REPLICA_MAX_LAG_SECONDS
+            if not fresh:
+                logger.warning(f"Replica {replica.url.host} lags {lag:.1f}s, reading from primary")
+        except SQLAlchemyError as e:
+            logger.warning(f"Replica {replica.url.host} unavailable: {e}")
+            fresh = False
+
+        self._status[replica] = (now, fresh)
+        return fresh
 
-# Create engine
-if settings.ENVIRONMENT == "testing":
-    engine = create_engine(
-        settings.DATABASE_URL,
-        poolclass=NullPool,
-        echo=settings.DEBUG,
-    )
-else:
-    engine = create_engine(
-        settings.DATABASE_URL,
-        pool_pre_ping=True,
-        echo=settings.DEBUG,
-    )
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+replica_pool = ReplicaPool(replica_engines)
+
+
+class RoutingSession(Session):
+    """Session that sends reads to a replica inside read_only() and everything else to the primary"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.read_only = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.read_only and not self._flushing:
+            replica = replica_pool.choose()
+            if replica is not None:
+                return replica
+        return engine
+
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 Base = declarative_base()
 
 # Naming convention for constraints
@@ -34,9 +109,99 @@ convention = {
 Base.metadata = MetaData(naming_convention=convention)
 
 
+def dispose_engines(close: bool = True) -> None:
+    """
+    Drop the primary's and replicas' pooled connections: on shutdown, or
+    with close=False in a freshly forked worker, which must not reuse
+    sockets inherited from the parent process.
+    """
+    for pooled_engine in [engine, *replica_engines]:
+        pooled_engine.dispose(close=close)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def _sticky_key(user_id: str) -> str:
+    return f"db_primary:{user_id}"
+
+
+async def stick_to_primary(user_id: str) -> None:
+    """Read the user's data from the primary until replicas have caught up with their writes"""
+    if not replica_engines:
+        return
+    try:
+        await redis_service.set(_sticky_key(user_id), "1", ex=settings.REPLICA_STICKY_SECONDS)
+    except RedisError:
+        pass
+
+
+async def replica_allowed(user_id: Optional[str] = None) -> bool:
+    """Whether reads may go to a replica: replicas are configured and the user is not sticky"""
+    if not replica_engines:
+        return False
+    if user_id is None:
+        return True
+    try:
+        return not await redis_service.exists(_sticky_key(user_id))
+    except RedisError:
+        return False
+
+
+@asynccontextmanager
+async def read_only(db: Session, user_id: Optional[str] = None) -> AsyncIterator[Session]:
+    """
+    Route the session's queries to a replica for the duration of the block.
+
+    With a user_id, reads stay on the primary while that user is sticky
+    (see stick_to_primary), so they always see their own reviews.
+    """
+
+    if not isinstance(db, RoutingSession) or db.read_only or not await replica_allowed(user_id):
+        yield db
+        return
+
+    db.read_only = True
+    try:
+        yield db
+    finally:
+        db.read_only = False
+
+
+@contextmanager
+def primary_reads(db: Session) -> Iterator[Session]:
+    """
+    Route the session's queries to the primary, even inside read_only().
+
+    For results cached beyond the request (tagged with the user's progress
+    version), which must not miss writes a lagging replica has not replayed.
+    """
+
+    if not isinstance(db, RoutingSession) or not db.read_only:
+        yield db
+        return
+
+    db.read_only = False
+    try:
+        yield db
+    finally:
+        db.read_only = True
+
+
+def replica_reads(method):
+    """Run an async service method inside read_only(self.db, user_id)"""
+
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        user_id = signature.bind(self, *args, **kwargs).arguments.get("user_id")
+        async with read_only(self.db, str(user_id) if user_id is not None else None):
+            return await method(self, *args, **kwargs)
+
+    return wrapper
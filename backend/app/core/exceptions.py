@@ -1,3 +1,5 @@
+from typing import Optional
+
 from fastapi import status
 
 
@@ -34,5 +36,6 @@ class ConflictException(PairLinguaException):
 
 
 class RateLimitException(PairLinguaException):
-    def __init__(self, message: str = "Rate limit exceeded"):
+    def __init__(self, message: str = "Rate limit exceeded", retry_after: Optional[int] = None):
         super().__init__(message, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.retry_after = retry_after  # seconds, sent as the Retry-After header
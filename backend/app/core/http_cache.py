@@ -0,0 +1,96 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from redis.exceptions import RedisError
+
+from app.core.redis import redis_service
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from the values that determine a response"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def user_progress_key(user_id: str) -> str:
+    return f"progress_version:{user_id}"
+
+
+async def read_version(key: str) -> Optional[int]:
+    """Read a Redis version counter (0 if missing, None if Redis is unavailable)"""
+    try:
+        return int(await redis_service.get(key) or 0)
+    except RedisError:
+        return None
+
+
+async def get_version(key: str) -> int:
+    """Read a Redis version counter (0 if missing or Redis is unavailable)"""
+    return await read_version(key) or 0
+
+
+async def bump_version(key: str) -> Optional[int]:
+    """Increment a Redis version counter; the new version, or None if Redis is unavailable"""
+    try:
+        return await redis_service.incr(key)
+    except RedisError:
+        return None
+
+
+def is_not_modified(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime] = None
+) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the current representation"""
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Weak comparison: gzip proxies may prefix our tags with W/
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified).replace(microsecond=0) <= since
+
+    return False
+
+
+def conditional_response(
+    request: Request,
+    content: Any,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    max_age: int = 0,
+    public: bool = False
+) -> Response:
+    """Return 304 when the client copy is current, otherwise the JSON body with validators"""
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"{'public' if public else 'private'}, max-age={max_age}",
+    }
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return ORJSONResponse(content=jsonable_encoder(content), headers=headers)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
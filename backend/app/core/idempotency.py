@@ -0,0 +1,275 @@
+import asyncio
+import base64
+import hashlib
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import LocalCache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis import redis_service
+from app.core.security import access_payload_from_headers
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+KEY_PREFIX = "idempotency:"
+REPLAYED_HEADER = b"idempotent-replayed"
+
+# Response headers never replayed to another retry
+SKIPPED_HEADERS = {b"set-cookie"}
+
+# Client errors a retry would get again; 401/403/409/423/429 depend on the moment and are not stored
+REPLAYED_CLIENT_ERRORS = {400, 404, 422}
+
+
+def is_replayable(status: int) -> bool:
+    return 200 <= status < 300 or status in REPLAYED_CLIENT_ERRORS
+
+
+class IdempotencyStore:
+    """
+    Completed responses by idempotency key, plus a lock per key while the
+    original request runs. Redis is shared by all workers; records Redis
+    failed to take are kept in a small process-local LocalCache instead,
+    bounded by count, total size and IDEMPOTENCY_LOCAL_TTL_SECONDS.
+    """
+
+    def __init__(self):
+        self.local = LocalCache(
+            settings.IDEMPOTENCY_LOCAL_MAX_SIZE,
+            settings.IDEMPOTENCY_LOCAL_TTL_SECONDS,
+            max_bytes=settings.IDEMPOTENCY_LOCAL_MAX_BYTES
+        )
+
+    async def get(self, key: str) -> Optional[bytes]:
+        record = self.local.get(key)
+        if record is not None:
+            return record
+        try:
+            return await redis_service.get_raw(KEY_PREFIX + key)
+        except RedisError:
+            return None
+
+    async def put(self, key: str, record: bytes) -> None:
+        try:
+            await redis_service.set_raw(KEY_PREFIX + key, record, ex=settings.IDEMPOTENCY_TTL_SECONDS)
+        except RedisError as e:
+            logger.warning(f"Idempotency record write failed, keeping it in this worker: {e}")
+            self.local.set(key, record)
+
+    async def acquire(self, key: str) -> bool:
+        try:
+            return await redis_service.set_nx(
+                f"{KEY_PREFIX}{key}:lock", "1", ex=settings.IDEMPOTENCY_LOCK_SECONDS
+            )
+        except RedisError:
+            # Duplicates within this worker are still coalesced by the middleware
+            return True
+
+    async def release(self, key: str) -> None:
+        try:
+            await redis_service.delete(f"{KEY_PREFIX}{key}:lock")
+        except RedisError:
+            pass
+
+
+class IdempotencyMiddleware:
+    """
+    Replays the stored response of an authenticated write request retried with
+    the same Idempotency-Key header instead of running it again.
+
+    Keys are scoped to the user from the access token; a token revoked by
+    logout is passed through to the app, which rejects it, and never gets a
+    replay. 2xx responses and the deterministic 400/404/422 are stored for
+    IDEMPOTENCY_TTL_SECONDS, anything else runs again when retried. A
+    duplicate arriving while the original is still running waits for its
+    response (directly within one worker, by polling the store across
+    workers) for up to IDEMPOTENCY_WAIT_SECONDS. Reusing a key with a
+    different request body is rejected with 422.
+    """
+
+    def __init__(self, app: ASGIApp, store: Optional[IdempotencyStore] = None):
+        self.app = app
+        self.store = store or IdempotencyStore()
+        self._in_flight: Dict[str, "asyncio.Future[Optional[bytes]]"] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get("idempotency-key")
+        payload = access_payload_from_headers(headers) if idempotency_key else None
+        user_id = payload.get("sub") if payload else None
+        if user_id is None or await self._revoked(payload):
+            await self.app(scope, receive, send)
+            return
+
+        if len(idempotency_key) > 255:
+            await self._send_error(send, 400, "Idempotency-Key is too long")
+            return
+
+        body = await self._read_body(receive)
+        key = f"{user_id}:{hashlib.sha256(idempotency_key.encode()).hexdigest()}"
+        fingerprint = hashlib.sha256(
+            b"\0".join([scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body])
+        ).hexdigest()
+
+        # A duplicate in this worker waits for the original's response
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            record = await asyncio.shield(in_flight)
+            if record is None:
+                await self._send_error(send, 409, "The request with this Idempotency-Key did not complete")
+            else:
+                await self._replay(record, fingerprint, send)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        record = None
+        try:
+            record, acquired = await self._wait_for_turn(key)
+            if record is not None:
+                await self._replay(record, fingerprint, send)
+            elif not acquired:
+                await self._send_error(send, 409, "A request with this Idempotency-Key is still in progress")
+            else:
+                try:
+                    record, status = await self._execute(scope, receive, send, body, fingerprint)
+                    if record is not None and is_replayable(status):
+                        await self.store.put(key, record)
+                finally:
+                    await self.store.release(key)
+        finally:
+            future.set_result(record)
+            del self._in_flight[key]
+
+    async def _wait_for_turn(self, key: str) -> Tuple[Optional[bytes], bool]:
+        """(stored record, lock acquired): waits while another worker runs the original request"""
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        delay = 0.05
+        while True:
+            record = await self.store.get(key)
+            if record is not None:
+                return record, False
+
+            if await self.store.acquire(key):
+                # The original may have stored its response and released the lock in between
+                record = await self.store.get(key)
+                if record is not None:
+                    await self.store.release(key)
+                    return record, False
+                return None, True
+
+            if time.monotonic() >= deadline:
+                return None, False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def _execute(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        body: bytes,
+        fingerprint: str
+    ) -> Tuple[Optional[bytes], int]:
+        """Run the request, forwarding its response and recording it for replays"""
+
+        body_sent = False
+        status = 500
+        response_headers: List[List[str]] = []
+        chunks: List[bytes] = []
+        size = 0
+
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers.extend(
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in message.get("headers", [])
+                    if name.lower() not in SKIPPED_HEADERS
+                )
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size <= settings.IDEMPOTENCY_MAX_BODY_BYTES:
+                    chunks.append(chunk)
+            await send(message)
+
+        await self.app(scope, replay_receive, capture_send)
+
+        if size > settings.IDEMPOTENCY_MAX_BODY_BYTES:
+            return None, status
+        return orjson.dumps({
+            "fingerprint": fingerprint,
+            "status": status,
+            "headers": response_headers,
+            "body": base64.b64encode(b"".join(chunks)).decode("ascii"),
+        }), status
+
+    async def _replay(self, record: bytes, fingerprint: str, send: Send) -> None:
+        stored = orjson.loads(record)
+        if stored["fingerprint"] != fingerprint:
+            await self._send_error(send, 422, "Idempotency-Key was already used for a different request")
+            return
+
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored["headers"]]
+        headers.append((REPLAYED_HEADER, b"true"))
+        await send({"type": "http.response.start", "status": stored["status"], "headers": headers})
+        await send({"type": "http.response.body", "body": base64.b64decode(stored["body"])})
+
+    @staticmethod
+    async def _revoked(payload: dict) -> bool:
+        """Whether the access token was revoked by logout"""
+
+        # Imported here: auth_service pulls in the models
+        from app.services.auth_service import AuthService
+
+        jti = payload.get("jti")
+        if not jti:
+            return True
+        db = SessionLocal()
+        try:
+            return await AuthService(db).is_token_blacklisted(jti)
+        except RedisError:
+            return False
+        finally:
+            db.close()
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    @staticmethod
+    async def _send_error(send: Send, status: int, detail: str) -> None:
+        body = orjson.dumps({"detail": detail})
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,112 @@
+import functools
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestProfile:
+    """Per-request database and Redis counters"""
+    route: str
+    sampled: bool
+    query_count: int = 0
+    db_time: float = 0.0
+    redis_calls: int = 0
+
+    def server_timing(self, total_time: float) -> str:
+        """Format counters as a Server-Timing header value (durations in ms)"""
+        return ", ".join([
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.query_count} queries"',
+            f'redis;desc="{self.redis_calls} calls"',
+            f"app;dur={total_time * 1000:.2f}",
+        ])
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND_PARAM = re.compile(r"%\(\w+\)s|%s")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def start_request_profile(route: str) -> Token:
+    """Attach a profile to the current request context, sampled per PROFILING_SAMPLE_RATE"""
+    sampled = settings.PROFILING_ENABLED and random.random() < settings.PROFILING_SAMPLE_RATE
+    return _current_profile.set(RequestProfile(route=route, sampled=sampled))
+
+
+def finish_request_profile(token: Token) -> Optional[RequestProfile]:
+    profile = _current_profile.get()
+    _current_profile.reset(token)
+    return profile
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current_profile.get()
+
+
+def track_redis_call(method):
+    """Count Redis commands issued through RedisService against the current request"""
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        profile = _current_profile.get()
+        if profile is not None and profile.sampled:
+            profile.redis_calls += 1
+        return await method(*args, **kwargs)
+
+    return wrapper
+
+
+def normalize_sql(statement: str) -> str:
+    """Strip literals and bind parameters so equivalent queries log identically"""
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _BIND_PARAM.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _IN_LIST.sub("(...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def install_query_profiler(engine: Engine) -> None:
+    """Time every statement on engine, attribute it to the request and log slow ones"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute: drop its start
+        # time so it does not pile up on the pooled connection
+        if context.connection is not None and context.cursor is not None:
+            started = context.connection.info.get("query_start_time")
+            if started:
+                started.pop()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+
+        profile = _current_profile.get()
+        if profile is not None and profile.sampled:
+            profile.query_count += 1
+            profile.db_time += elapsed
+
+        if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            logger.warning(
+                f"Slow query ({elapsed * 1000:.1f}ms) "
+                f"[{profile.route if profile else 'background'}]: {normalize_sql(statement)}"
+            )
@@ -0,0 +1,150 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Tuple
+
+from fastapi import Request
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.exceptions import RateLimitException
+from app.core.redis import redis_service
+from app.core.security import user_id_from_headers
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Refills the bucket for the time elapsed since the last request, then takes
+# `cost` tokens if there are enough. Returns {allowed, tokens left, retry after ms}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = math.ceil((cost - tokens) / rate * 1000)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, math.floor(tokens), retry_after}
+"""
+
+
+class RateLimit(NamedTuple):
+    capacity: int
+    refill_per_second: float
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """'10/minute' -> bucket of 10 tokens refilled at 10 per minute"""
+        count, _, period = value.partition("/")
+        return cls(int(count), int(count) / PERIODS[period.strip()])
+
+
+class LocalTokenBuckets:
+    """Process-local buckets used while Redis is unavailable; limits then apply per worker"""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: RateLimit, now: float, cost: int = 1) -> Tuple[bool, int]:
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + max(0.0, now - ts) * limit.refill_per_second)
+
+            allowed = tokens >= cost
+            retry_after_ms = 0
+            if allowed:
+                tokens -= cost
+            else:
+                retry_after_ms = math.ceil((cost - tokens) / limit.refill_per_second * 1000)
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after_ms
+
+
+class RateLimiter:
+    KEY_PREFIX = "rate_limit:"
+
+    def __init__(self):
+        self.local = LocalTokenBuckets()
+
+    async def hit(self, name: str, identity: str, limit: RateLimit, cost: int = 1) -> None:
+        """Take tokens from the identity's bucket for the named limit or raise RateLimitException"""
+
+        key = f"{self.KEY_PREFIX}{name}:{identity}"
+        now = time.time()
+        try:
+            allowed, _, retry_after_ms = await redis_service.run_script(
+                TOKEN_BUCKET_SCRIPT, [key], [limit.capacity, limit.refill_per_second, now, cost]
+            )
+        except RedisError as e:
+            logger.warning(f"Rate limit check fell back to local buckets: {e}")
+            allowed, retry_after_ms = self.local.take(key, limit, now, cost)
+
+        if not allowed:
+            raise RateLimitException(retry_after=max(1, math.ceil(retry_after_ms / 1000)))
+
+
+rate_limiter = RateLimiter()
+
+
+def client_ip(request: Request) -> str:
+    # Behind nginx uvicorn takes this from X-Forwarded-For, but only for
+    # connections from TRUSTED_PROXIES; request headers are never trusted here
+    return request.client.host if request.client else "unknown"
+
+
+def account_identity(email: str) -> str:
+    """Bucket identity of a submitted email; hashed so Redis keys hold no addresses"""
+    return "account:" + hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+
+
+async def enforce(name: str, identity: str) -> None:
+    """Take a token from the RATE_LIMIT_<NAME> bucket of an explicit identity"""
+
+    if settings.RATE_LIMIT_ENABLED:
+        limit = RateLimit.parse(getattr(settings, f"RATE_LIMIT_{name.upper()}"))
+        await rate_limiter.hit(name, identity, limit)
+
+
+def rate_limit(name: str, per_ip: bool = False) -> Callable:
+    """
+    Route dependency enforcing the RATE_LIMIT_<NAME> token bucket.
+
+    Buckets are per user for authenticated requests and per client IP
+    otherwise; per_ip=True always limits by IP (login, register).
+    """
+
+    limit = RateLimit.parse(getattr(settings, f"RATE_LIMIT_{name.upper()}"))
+
+    async def dependency(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+
+        user_id = None if per_ip else user_id_from_headers(request.headers)
+        identity = f"user:{user_id}" if user_id else f"ip:{client_ip(request)}"
+        await rate_limiter.hit(name, identity, limit)
+
+    return dependency
@@ -1,5 +1,6 @@
 import redis.asyncio as redis
 from app.core.config import settings
+from app.core.profiling import track_redis_call
 
 # Redis connection
 redis_client = redis.from_url(
@@ -11,6 +12,15 @@ redis_client = redis.from_url(
     socket_keepalive_options={},
 )
 
+# Binary-safe connection for pre-serialized payloads
+redis_raw_client = redis.from_url(
+    settings.REDIS_URL,
+    decode_responses=False,
+    retry_on_timeout=True,
+    socket_keepalive=True,
+    socket_keepalive_options={},
+)
+
 
 async def get_redis():
     return redis_client
@@ -19,25 +29,103 @@ async def get_redis():
 class RedisService:
     def __init__(self):
         self.redis = redis_client
+        self.raw = redis_raw_client
+        self._scripts = {}
 
+    @track_redis_call
     async def get(self, key: str) -> str | None:
         return await self.redis.get(key)
 
+    @track_redis_call
     async def set(self, key: str, value: str, ex: int = None) -> bool:
         return await self.redis.set(key, value, ex=ex)
 
-    async def delete(self, key: str) -> int:
-        return await self.redis.delete(key)
+    @track_redis_call
+    async def set_nx(self, key: str, value: str, ex: int = None) -> bool:
+        """SET only if the key does not exist; True when it was set"""
+        return bool(await self.redis.set(key, value, ex=ex, nx=True))
+
+    @track_redis_call
+    async def delete(self, *keys: str) -> int:
+        return await self.redis.delete(*keys)
+
+    @track_redis_call
+    async def delete_pattern(self, pattern: str) -> int:
+        keys = [key async for key in self.redis.scan_iter(match=pattern, count=500)]
+        return await self.redis.delete(*keys) if keys else 0
+
+    @track_redis_call
+    async def get_raw(self, key: str) -> bytes | None:
+        return await self.raw.get(key)
+
+    @track_redis_call
+    async def set_raw(self, key: str, value: bytes, ex: int = None) -> bool:
+        return await self.raw.set(key, value, ex=ex)
+
+    @track_redis_call
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        return await self.redis.mget(keys)
+
+    @track_redis_call
+    async def set_many(self, values: dict[str, str], ex: int = None) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, value, ex=ex)
+            await pipe.execute()
+
+    @track_redis_call
+    async def hget(self, key: str, field: str) -> str | None:
+        return await self.redis.hget(key, field)
+
+    @track_redis_call
+    async def hset(self, key: str, field: str, value: str, ex: int = None) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, field, value)
+            if ex:
+                pipe.expire(key, ex)
+            await pipe.execute()
+
+    @track_redis_call
+    async def hgetall(self, key: str) -> dict[str, str]:
+        return await self.redis.hgetall(key)
+
+    @track_redis_call
+    async def hset_many(self, key: str, mapping: dict[str, int | str], ex: int = None) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping=mapping)
+            if ex:
+                pipe.expire(key, ex)
+            await pipe.execute()
+
+    @track_redis_call
+    async def run_script(self, script: str, keys: list[str], args: list = ()):
+        """Run a Lua script via EVALSHA, loading it on first use"""
+        if script not in self._scripts:
+            self._scripts[script] = self.redis.register_script(script)
+        return await self._scripts[script](keys=keys, args=list(args))
+
+    @track_redis_call
+    async def publish(self, channel: str, message: str) -> int:
+        return await self.redis.publish(channel, message)
+
+    @track_redis_call
+    async def incr(self, key: str) -> int:
+        return await self.redis.incr(key)
 
+    @track_redis_call
     async def exists(self, key: str) -> int:
         return await self.redis.exists(key)
 
+    @track_redis_call
     async def expire(self, key: str, time: int) -> bool:
         return await self.redis.expire(key, time)
 
+    @track_redis_call
     async def sadd(self, key: str, *values) -> int:
         return await self.redis.sadd(key, *values)
 
+    @track_redis_call
     async def sismember(self, key: str, value: str) -> bool:
         return await self.redis.sismember(key, value)
 
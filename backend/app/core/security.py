@@ -67,3 +67,31 @@ def decode_token(token: str, token_type: str = TOKEN_TYPE_ACCESS) -> dict:
         return payload
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+
+
+def access_payload_from_headers(headers) -> Optional[dict]:
+    """Claims of a valid access token from the Authorization header or the access_token cookie"""
+
+    token = None
+    authorization = headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    else:
+        for cookie in headers.get("cookie", "").split(";"):
+            name, _, value = cookie.strip().partition("=")
+            if name == "access_token":
+                token = value
+    if not token:
+        return None
+
+    try:
+        return decode_token(token)
+    except HTTPException:
+        return None
+
+
+def user_id_from_headers(headers) -> Optional[str]:
+    """User of a valid access token; signature and expiry only, revocation is not checked"""
+
+    payload = access_payload_from_headers(headers)
+    return payload.get("sub") if payload else None
@@ -0,0 +1,23 @@
+import os
+
+from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+
+
+class PairLinguaWorker(UvicornWorker):
+    """Uvicorn worker for gunicorn with the uvloop event loop and the httptools parser"""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+
+def worker_count() -> int:
+    """SERVER_WORKERS, or one worker per CPU this process may run on"""
+
+    if settings.SERVER_WORKERS > 0:
+        return settings.SERVER_WORKERS
+    try:
+        # Honors CPU affinity (e.g. docker --cpuset-cpus), unlike os.cpu_count()
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
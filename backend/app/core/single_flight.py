@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import redis_service
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one computation.
+
+    Within a worker, later callers await the first caller's future. Across
+    workers, the first caller holds a short Redis lock; the others poll
+    `fetch` (typically the cache the computation writes to) until the
+    result appears, and compute it themselves if it does not within
+    SINGLE_FLIGHT_WAIT_SECONDS or the lock cannot be checked.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def do(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[T]],
+        fetch: Callable[[], Awaitable[Optional[T]]]
+    ) -> T:
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                if not in_flight.cancelled():
+                    raise
+                # The first caller went away (client disconnect): start over
+                return await self.do(key, compute, fetch)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        lock_key = f"single_flight:{self.namespace}:{key}"
+        locked = False
+        try:
+            try:
+                locked = await redis_service.set_nx(lock_key, "1", ex=settings.SINGLE_FLIGHT_LOCK_SECONDS)
+            except RedisError:
+                locked = False
+            else:
+                if not locked:
+                    result = await self._wait(fetch)
+                    if result is not None:
+                        future.set_result(result)
+                        return result
+
+            result = await compute()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved: there may be no other caller waiting
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+            if locked:
+                try:
+                    await redis_service.delete(lock_key)
+                except RedisError:
+                    pass
+
+    @staticmethod
+    async def _wait(fetch: Callable[[], Awaitable[Optional[T]]]) -> Optional[T]:
+        """Poll for the other worker's result"""
+
+        deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT_SECONDS
+        delay = 0.02
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            try:
+                result = await fetch()
+            except RedisError as e:
+                logger.warning(f"Single-flight result fetch failed: {e}")
+                return None
+            if result is not None:
+                return result
+            delay = min(delay * 2, 0.2)
+        return None
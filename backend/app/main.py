@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import os
 from contextlib import asynccontextmanager
@@ -11,9 +12,14 @@ import logging
 
 from sqlalchemy import text
 from app.core.config import settings
-from app.core.database import Base, engine
-from app.core.redis import redis_client
-from app.core.exceptions import PairLinguaException
+from app.core.database import dispose_engines
+from app.core.redis import redis_client, redis_raw_client
+from app.core.cache import catalog_cache
+from app.core.compression import CompressionMiddleware
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.profiling import start_request_profile, finish_request_profile
+from app.core.exceptions import PairLinguaException, RateLimitException
+from app.services.partition_service import run_partition_maintenance, run_startup_maintenance
 from app.api.v1.router import api_router
 
 # Add app directory to path
@@ -28,6 +34,16 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def maintain_review_partitions():
+    """Create upcoming reviews partitions (and archive old ones) once a day"""
+    while True:
+        await asyncio.sleep(86400)
+        try:
+            await asyncio.to_thread(run_partition_maintenance)
+        except Exception as e:
+            logger.error(f"❌ Review partition maintenance failed: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application startup and shutdown events"""
@@ -36,13 +52,18 @@ async def lifespan(app: FastAPI):
     
     try:
         # Test database connection
-        Base.metadata.create_all(bind=engine)
+        if settings.SERVER_STARTUP_MAINTENANCE:
+            await asyncio.to_thread(run_startup_maintenance)
+        app.state.partition_maintenance = asyncio.create_task(maintain_review_partitions())
         logger.info("📊 Database connected")
         
         # Test Redis connection
         await redis_client.ping()
         logger.info("🔥 Redis connected")
         
+        # Listen for catalog cache invalidations from other workers
+        app.state.catalog_listener = asyncio.create_task(catalog_cache.listen())
+        
         logger.info("✅ PairLingua API started successfully")
         
     except Exception as e:
@@ -54,7 +75,11 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🛑 Shutting down PairLingua API...")
     try:
+        app.state.catalog_listener.cancel()
+        app.state.partition_maintenance.cancel()
         await redis_client.close()
+        await redis_raw_client.close()
+        dispose_engines()
         logger.info("✅ PairLingua API shutdown complete")
     except Exception as e:
         logger.error(f"❌ Shutdown error: {e}")
@@ -85,20 +110,40 @@ app.add_middleware(
     allowed_hosts=["*"] if settings.DEBUG else ["pairlingua.com", "*.pairlingua.com"]
 )
 
+# Retried writes with the same Idempotency-Key get the stored response
+app.add_middleware(IdempotencyMiddleware)
+
+# br/gzip for JSON and text bodies; outside idempotency so replays follow the retry's Accept-Encoding
+app.add_middleware(CompressionMiddleware)
+
 
 # Request logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start_time = time.time()
+    profile_token = start_request_profile(f"{request.method} {request.url.path}")
     
-    response = await call_next(request)
+    try:
+        response = await call_next(request)
+    finally:
+        profile = finish_request_profile(profile_token)
     
     process_time = time.time() - start_time
-    logger.info(
-        f"{request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Time: {process_time:.4f}s"
-    )
+    if profile.sampled:
+        logger.info(
+            f"{request.method} {request.url.path} - "
+            f"Status: {response.status_code} - "
+            f"Time: {process_time:.4f}s - "
+            f"Queries: {profile.query_count} ({profile.db_time:.4f}s) - "
+            f"Redis: {profile.redis_calls}"
+        )
+        response.headers["Server-Timing"] = profile.server_timing(process_time)
+    else:
+        logger.info(
+            f"{request.method} {request.url.path} - "
+            f"Status: {response.status_code} - "
+            f"Time: {process_time:.4f}s"
+        )
     
     response.headers["X-Process-Time"] = str(process_time)
     return response
@@ -107,7 +152,11 @@ async def log_requests(request: Request, call_next):
 # Exception handlers
 @app.exception_handler(PairLinguaException)
 async def pairlingua_exception_handler(request: Request, exc: PairLinguaException):
+    headers = None
+    if isinstance(exc, RateLimitException) and exc.retry_after:
+        headers = {"Retry-After": str(exc.retry_after)}
     return JSONResponse(
+        headers=headers,
         status_code=exc.status_code,
         content={
             "error": {
@@ -236,12 +285,14 @@ def custom_openapi():
 app.openapi = custom_openapi
 
 
+# Single-process development server; production runs gunicorn -c gunicorn.conf.py
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
+        "app.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
         reload=settings.DEBUG,
+        forwarded_allow_ips=settings.TRUSTED_PROXIES,
         log_level="info"
     )
@@ -1,5 +1,5 @@
-from sqlalchemy.sql import func
-from sqlalchemy import Column, Integer, SmallInteger, DateTime, String, ForeignKey, ColumnElement
+from datetime import datetime
+from sqlalchemy import Column, Integer, SmallInteger, DateTime, String, ForeignKey, Index, ColumnElement, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -9,6 +9,7 @@ from app.core.database import Base
 class Review(Base):
     __tablename__ = "reviews"
 
+    # Partitioned by month (see PartitionService), so the partition key is part of the primary key
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     word_pair_id = Column(Integer, ForeignKey("word_pairs.id"), nullable=False)
@@ -21,6 +22,7 @@ class Review(Base):
     
     # Context
     session_id = Column(UUID(as_uuid=True), nullable=True)  # Optional session grouping
+    client_review_id = Column(UUID(as_uuid=True), nullable=True)  # Idempotency key of offline sync
     
     # Before/after state for analysis
     ease_factor_before = Column(Integer, nullable=True)
@@ -29,13 +31,26 @@ class Review(Base):
     interval_after = Column(Integer, nullable=True)
     
     # Timestamp
-    reviewed_at = Column(DateTime, default=func.now(), index=True)
+    reviewed_at = Column(DateTime, primary_key=True, default=datetime.utcnow, index=True)
     
     # Relationships
     user = relationship("User", back_populates="reviews")
     word_pair = relationship("WordPair", back_populates="reviews")
     user_card = relationship("UserCard", back_populates="reviews")
 
+    __table_args__ = (
+        Index('ix_reviews_user_date', 'user_id', 'reviewed_at'),
+        # Unique per partition, so the partition key has to be part of it
+        Index(
+            'ix_reviews_client_review', 'user_id', 'client_review_id', 'reviewed_at',
+            unique=True,
+            postgresql_where=text('client_review_id IS NOT NULL')
+        ),
+        # Session statistics of sessions without Redis counters (see SessionStatsService)
+        Index('ix_reviews_session_id', 'session_id', postgresql_where=text('session_id IS NOT NULL')),
+        {'postgresql_partition_by': 'RANGE (reviewed_at)'},
+    )
+
     @property
     def is_correct(self) -> ColumnElement[bool]:
         """Quality >= 3 is considered correct in SM-2
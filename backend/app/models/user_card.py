@@ -1,7 +1,8 @@
 from datetime import datetime, timedelta
+from typing import Optional
 from sqlalchemy import (
-    Column, Integer, DateTime, Numeric, ForeignKey,
-    SmallInteger, Boolean, Index, CheckConstraint, func
+    Column, Integer, DateTime, Numeric, Float, ForeignKey,
+    SmallInteger, Boolean, Index, CheckConstraint, func, text
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -21,6 +22,10 @@ class UserCard(Base):
     repetition_count = Column(Integer, default=0)      # Number of successful reviews
     interval_days = Column(Integer, default=0)         # Days until next review
     due_date = Column(DateTime, nullable=True)          # When card is due for review
+
+    # FSRS memory state (filled when settings.SCHEDULER == "fsrs")
+    stability = Column(Float, nullable=True)            # Days until recall probability drops to 90%
+    difficulty = Column(Float, nullable=True)           # 1 (easy) - 10 (hard)
     
     # Review tracking
     last_quality = Column(SmallInteger, nullable=True)  # Last quality score (0-5)
@@ -47,7 +52,13 @@ class UserCard(Base):
     
     # Constraints
     __table_args__ = (
-        Index('ix_user_cards_due', 'user_id', 'due_date'),
+        # Due queue: range scan per user in due order; word_pair_id is included
+        # so the active-session filter and id lookups never touch the heap
+        Index(
+            'ix_user_cards_due_queue', 'user_id', 'due_date',
+            postgresql_include=['word_pair_id'],
+            postgresql_where=text('NOT is_suspended')
+        ),
         Index('ix_user_cards_user_word', 'user_id', 'word_pair_id', unique=True),
         CheckConstraint('ease_factor >= 1.3', name='ck_ease_factor_min'),
         CheckConstraint('ease_factor <= 5.0', name='ck_ease_factor_max'),
@@ -62,32 +73,33 @@ class UserCard(Base):
         """Check if card is due for review"""
         if self.due_date is None:
             return True
-        return func.now() >= self.due_date
+        return datetime.utcnow() >= self.due_date
     
     @property
     def days_overdue(self) -> int:
         """Days card is overdue (negative if not due)"""
         if self.due_date is None:
             return 0
-        delta = func.now() - self.due_date
+        delta = datetime.utcnow() - self.due_date
         return delta.days
     
-    def schedule_next_review(self, quality: int) -> None:
-        """Schedule next review using SM-2 algorithm"""
-        from app.services.sm2_service import SM2Service
-        sm2 = SM2Service()
+    def schedule_next_review(
+        self,
+        quality: int,
+        now: Optional[datetime] = None,
+        load_balancer=None
+    ) -> None:
+        """Schedule next review using the configured scheduler (SM-2 or FSRS)"""
+        from app.services.scheduler_service import get_scheduler
+        now = now or datetime.utcnow()
+        
+        get_scheduler().schedule(self, quality, now)
         
-        result = sm2.calculate_next_interval(
-            quality=quality,
-            ease_factor=float(self.ease_factor),
-            interval_days=self.interval_days,
-            repetition_count=self.repetition_count
-        )
+        # Spread the due date over the least loaded nearby day
+        if load_balancer is not None:
+            self.interval_days = load_balancer.balance(self.interval_days, now)
+            self.due_date = now + timedelta(days=self.interval_days)
         
-        self.ease_factor = result.ease_factor
-        self.interval_days = result.interval_days
-        self.repetition_count = result.repetition_count
-        self.due_date = func.now() + timedelta(days=result.interval_days)
         self.last_quality = quality
-        self.last_reviewed_at = func.now()
-        self.updated_at = func.now()
+        self.last_reviewed_at = now
+        self.updated_at = now
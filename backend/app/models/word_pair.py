@@ -1,12 +1,16 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, ARRAY, func
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, ARRAY, Index, func, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
 
 
+# Rank used for words without frequency_rank, so they are introduced last
+UNRANKED = 2147483647
+
+
 class WordPair(Base):
     __tablename__ = "word_pairs"
 
@@ -32,8 +36,29 @@ class WordPair(Base):
     
     # Timestamps
     created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime, nullable=False, default=func.now(), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     user_cards = relationship("UserCard", back_populates="word_pair", lazy="dynamic")
     reviews = relationship("Review", back_populates="word_pair", lazy="dynamic")
+    
+    # Order in which new words are introduced; new-card selection range-scans
+    # these indexes from the user's frontier (see StudyService._select_new_word_pairs)
+    __table_args__ = (
+        Index(
+            'ix_word_pairs_new_card_order',
+            func.coalesce(frequency_rank, UNRANKED), id,
+            postgresql_where=text('is_active')
+        ),
+        Index(
+            'ix_word_pairs_level_new_card_order',
+            cefr_level, func.coalesce(frequency_rank, UNRANKED), id,
+            postgresql_where=text('is_active')
+        ),
+        # Catalog change feed (see CatalogFeedService)
+        Index('ix_word_pairs_updated_at', updated_at, id),
+    )
+    
+    @classmethod
+    def new_card_order(cls):
+        return func.coalesce(cls.frequency_rank, UNRANKED)
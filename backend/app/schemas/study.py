@@ -71,6 +71,26 @@ class ReviewBatch(BaseModel):
         return v
 
 
+class SyncReviewItem(ReviewItem):
+    """Review recorded on the client, possibly offline"""
+    client_review_id: UUID  # Idempotency key: a resent review is applied once
+    reviewed_at: datetime   # When the review happened on the client
+
+
+class ReviewSyncChunk(BaseModel):
+    """One chunk of an offline review log; chunks are resent until acknowledged"""
+    items: List[SyncReviewItem]
+    session_id: Optional[UUID] = None
+    
+    @validator('items')
+    def validate_items(cls, v):
+        if len(v) > 1000:
+            raise ValueError('Cannot sync more than 1000 reviews per chunk')
+        if len(v) == 0:
+            raise ValueError('Must sync at least one review')
+        return v
+
+
 class ReviewResult(BaseModel):
     word_pair_id: int
     correct: bool
@@ -88,6 +108,12 @@ class ReviewBatchResponse(BaseModel):
     achievements_unlocked: List[str] = []
 
 
+class ReviewSyncResponse(ReviewBatchResponse):
+    applied: int                            # Reviews applied from this chunk
+    duplicates: int                         # Reviews already synced before, skipped
+    synced_until: Optional[datetime] = None # Client time of the latest review applied
+
+
 class SessionReplaceRequest(BaseModel):
     session_id: UUID
     completed_word_pair_id: int
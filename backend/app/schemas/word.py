@@ -43,8 +43,8 @@ class WordPairUpdate(BaseModel):
 class WordPair(WordPairBase):
     id: int
     is_active: bool
-    created_at: datetime
-    updated_at: datetime
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 from typing import Optional
 
+from redis.exceptions import RedisError
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
@@ -13,6 +14,7 @@ from app.core.security import (
 from app.core.exceptions import AuthenticationException, ConflictException
 from app.models.user import User, TokenBlacklist
 from app.schemas.auth import UserRegister, UserLogin, Token
+from app.core.database import SessionLocal
 from app.core.redis import redis_service
 
 
@@ -174,6 +176,13 @@ class AuthService:
             
             self.db.commit()
             
+            if access_jti:
+                # is_token_blacklisted may have cached "0" for this token
+                try:
+                    await redis_service.set(f"blacklist:{access_jti}", "1", ex=3600)
+                except RedisError:
+                    pass
+            
         except Exception:
             raise AuthenticationException("Could not logout user")
     
@@ -225,3 +234,13 @@ class AuthService:
             raise AuthenticationException("User not found")
         
         return user
+
+
+async def is_token_revoked(jti: str) -> bool:
+    """Blacklist check on a short session of its own, for long-lived connections"""
+
+    db = SessionLocal()
+    try:
+        return await AuthService(db).is_token_blacklisted(jti)
+    finally:
+        db.close()
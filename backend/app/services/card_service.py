@@ -0,0 +1,197 @@
+import logging
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy import exists, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.cache import catalog_cache
+from app.core.config import settings
+from app.core.database import SessionLocal, stick_to_primary
+from app.core.http_cache import bump_version, user_progress_key
+from app.core.redis import redis_service
+from app.models.user_card import UserCard
+from app.models.word_pair import WordPair, UNRANKED
+from app.services.due_forecast_service import DueForecastService
+
+logger = logging.getLogger(__name__)
+
+
+class CardService:
+    """
+    Creation of UserCard rows and the order in which new words are introduced.
+
+    Cards are inserted in bulk with ON CONFLICT DO NOTHING, so concurrent
+    requests for the same words never fail on ix_user_cards_user_word. New
+    words are picked by range-scanning word_pairs in new-card order from the
+    user's frontier: the first word, per CEFR filter, that may still lack a
+    card. Everything before the frontier already has one.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def ensure_cards(
+        self,
+        user_id: str,
+        word_pair_ids: Iterable[int],
+        due_date: Optional[datetime] = None
+    ) -> List[int]:
+        """Create missing cards in one statement; return word pair ids of the cards created"""
+
+        word_pair_ids = sorted(set(word_pair_ids))
+        if not word_pair_ids:
+            return []
+
+        now = datetime.utcnow()
+        statement = insert(UserCard).values([
+            {
+                "user_id": user_id,
+                "word_pair_id": word_pair_id,
+                "due_date": due_date,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for word_pair_id in word_pair_ids
+        ]).on_conflict_do_nothing(
+            index_elements=[UserCard.user_id, UserCard.word_pair_id]
+        ).returning(UserCard.word_pair_id)
+
+        return list(self.db.execute(statement).scalars())
+
+    @staticmethod
+    def new_card(user_id: str, word_pair_id: int, now: Optional[datetime] = None) -> UserCard:
+        """Unsaved card for a word the user has not reviewed yet; created on the first review"""
+        return UserCard(
+            user_id=user_id,
+            word_pair_id=word_pair_id,
+            ease_factor=2.50,
+            repetition_count=0,
+            interval_days=0,
+            due_date=now or datetime.utcnow(),
+            total_reviews=0,
+            correct_reviews=0
+        )
+
+    async def select_new_word_pairs(
+        self,
+        user_id: str,
+        cefr_levels: Optional[List[str]],
+        limit: int,
+        exclude_ids: Iterable[int] = ()
+    ) -> List[WordPair]:
+        """Next words without a card in frequency order, scanning forward from the frontier"""
+
+        exclude_ids = set(exclude_ids)
+        version, rank, word_pair_id = await self._get_frontier(user_id, cefr_levels)
+
+        # Excluded words are dropped afterwards, so the first row is always
+        # the first word still lacking a card: the new frontier
+        candidates = self._new_word_pairs_query(user_id, cefr_levels, (rank, word_pair_id)).limit(
+            limit + len(exclude_ids)
+        ).all()
+
+        if candidates:
+            await self._set_frontier(user_id, cefr_levels, version, candidates[0])
+        return [word_pair for word_pair in candidates if word_pair.id not in exclude_ids][:limit]
+
+    async def seed_starter_deck(self, user_id: str) -> int:
+        """Create due cards for the first STARTER_DECK_SIZE words, e.g. right after registration"""
+
+        if settings.STARTER_DECK_SIZE <= 0:
+            return 0
+
+        word_pair_ids = [
+            word_pair.id
+            for word_pair in self._new_word_pairs_query(user_id).limit(settings.STARTER_DECK_SIZE)
+        ]
+        created = self.ensure_cards(user_id, word_pair_ids, due_date=datetime.utcnow())
+        self.db.commit()
+
+        if created:
+            await stick_to_primary(user_id)
+            await DueForecastService(self.db).invalidate(user_id)
+            try:
+                await redis_service.delete_pattern(f"due_cards:{user_id}:*")
+            except RedisError:
+                pass
+            # Also marks the user's card state snapshot as outdated
+            await bump_version(user_progress_key(user_id))
+        return len(created)
+
+    def _new_word_pairs_query(
+        self,
+        user_id: str,
+        cefr_levels: Optional[List[str]] = None,
+        frontier: Tuple[int, int] = (-1, 0)
+    ):
+        order = WordPair.new_card_order()
+        query = self.db.query(WordPair).filter(
+            WordPair.is_active == True,
+            tuple_(order, WordPair.id) >= tuple_(*frontier),
+            # The frontier is only a lower bound; the anti-join keeps selection exact
+            ~exists().where(
+                UserCard.user_id == user_id,
+                UserCard.word_pair_id == WordPair.id
+            )
+        )
+        if cefr_levels:
+            query = query.filter(WordPair.cefr_level.in_(cefr_levels))
+        return query.order_by(order, WordPair.id)
+
+    @staticmethod
+    def _frontier_key(user_id: str) -> str:
+        return f"card_frontier:{user_id}"
+
+    @staticmethod
+    def _frontier_field(cefr_levels: Optional[List[str]]) -> str:
+        return ",".join(sorted(cefr_levels)) if cefr_levels else "all"
+
+    async def _get_frontier(self, user_id: str, cefr_levels: Optional[List[str]]) -> Tuple[int, int, int]:
+        """(catalog version, frequency rank, word pair id) of the user's frontier"""
+
+        version = await catalog_cache.version()
+        try:
+            stored = await redis_service.hget(self._frontier_key(user_id), self._frontier_field(cefr_levels))
+        except RedisError:
+            stored = None
+
+        if stored:
+            stored_version, rank, word_pair_id = (int(part) for part in stored.split(":"))
+            # A catalog change may add words before the frontier: scan from the start once
+            if stored_version == version:
+                return version, rank, word_pair_id
+        return version, -1, 0
+
+    async def _set_frontier(
+        self,
+        user_id: str,
+        cefr_levels: Optional[List[str]],
+        version: int,
+        word_pair: WordPair
+    ) -> None:
+        rank = word_pair.frequency_rank if word_pair.frequency_rank is not None else UNRANKED
+        try:
+            await redis_service.hset(
+                self._frontier_key(user_id),
+                self._frontier_field(cefr_levels),
+                f"{version}:{rank}:{word_pair.id}",
+                ex=settings.CARD_FRONTIER_TTL_SECONDS
+            )
+        except RedisError:
+            pass
+
+
+async def seed_starter_deck(user_id: str) -> None:
+    """Background task: seed a new learner's starter deck in a session of its own"""
+
+    db = SessionLocal()
+    try:
+        created = await CardService(db).seed_starter_deck(user_id)
+        logger.info(f"Seeded {created} starter cards for user {user_id}")
+    except Exception as e:
+        logger.error(f"Starter deck seeding failed for user {user_id}: {e}", exc_info=True)
+    finally:
+        db.close()
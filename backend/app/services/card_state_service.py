@@ -0,0 +1,303 @@
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, NamedTuple, Optional, Set
+
+from redis.exceptions import RedisError
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import primary_reads
+from app.core.http_cache import get_version, user_progress_key
+from app.core.redis import redis_service
+from app.models.user_card import UserCard
+
+EPOCH = datetime(1970, 1, 1)
+NO_DUE = 2 ** 63 - 1             # due timestamp of cards without a due date
+
+SUSPENDED = 1
+LEARNING = 2
+
+# Magic and the progress version the snapshot reflects, then the card count
+HEADER = struct.Struct("<4sqI")
+MAGIC = b"CST1"
+
+# (attribute, typecode) of the packed columns, in blob order
+COLUMNS = (
+    ("word_pair_ids", "q"),
+    ("due", "q"),          # naive UTC seconds since the epoch
+    ("ease", "H"),         # ease factor * 100
+    ("interval", "I"),
+    ("reps", "I"),
+    ("total", "I"),
+    ("correct", "I"),
+    ("flags", "B"),
+)
+
+# Replaces the snapshot only if it still holds the expected header: a review
+# batch committed in between drops it instead, and the next read rebuilds it
+REPLACE_SCRIPT = """
+if redis.call('GETRANGE', KEYS[1], 0, ARGV[3] - 1) ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[4])
+return 1
+"""
+
+
+class CardState(NamedTuple):
+    """The scheduling fields of one card, read from a snapshot instead of a UserCard"""
+
+    word_pair_id: int
+    due_date: Optional[datetime]
+    ease_factor: float
+    interval_days: int
+    repetition_count: int
+    total_reviews: int
+    correct_reviews: int
+    is_suspended: bool
+    is_learning: bool
+
+    @classmethod
+    def of(cls, card: UserCard) -> "CardState":
+        return cls(
+            word_pair_id=card.word_pair_id,
+            due_date=card.due_date,
+            ease_factor=float(card.ease_factor or 2.5),
+            interval_days=card.interval_days or 0,
+            repetition_count=card.repetition_count or 0,
+            total_reviews=card.total_reviews or 0,
+            correct_reviews=card.correct_reviews or 0,
+            is_suspended=bool(card.is_suspended),
+            is_learning=bool(card.is_learning)
+        )
+
+    @property
+    def accuracy(self) -> float:
+        return self.correct_reviews / self.total_reviews * 100 if self.total_reviews else 0.0
+
+
+def card_state_query(user_id: str) -> Select:
+    """Scheduling columns of all of a user's cards; a range scan of ix_user_cards_user_word"""
+
+    return select(
+        UserCard.word_pair_id,
+        UserCard.due_date,
+        UserCard.ease_factor,
+        UserCard.interval_days,
+        UserCard.repetition_count,
+        UserCard.total_reviews,
+        UserCard.correct_reviews,
+        UserCard.is_suspended,
+        UserCard.is_learning,
+    ).where(UserCard.user_id == user_id)
+
+
+def _timestamp(moment: Optional[datetime]) -> int:
+    return int((moment - EPOCH).total_seconds()) if moment is not None else NO_DUE
+
+
+class CardStateSnapshot:
+    """
+    A user's cards as parallel packed arrays sorted by word_pair_id.
+
+    A few bytes per card instead of an ORM instance with its identity-map
+    state; due selection and card statistics run over the arrays in
+    memory. Serialized to one little-endian blob for Redis.
+    """
+
+    def __init__(self, version: int = 0):
+        self.version = version
+        for attribute, typecode in COLUMNS:
+            setattr(self, attribute, array(typecode))
+
+    def __len__(self) -> int:
+        return len(self.word_pair_ids)
+
+    @classmethod
+    def from_cards(cls, cards: Iterable, version: int = 0) -> "CardStateSnapshot":
+        snapshot = cls(version)
+        for card in sorted(cards, key=lambda card: card.word_pair_id):
+            snapshot._append(card)
+        return snapshot
+
+    def upsert(self, card: CardState) -> None:
+        """Insert or overwrite the state of one card"""
+
+        index = bisect_left(self.word_pair_ids, card.word_pair_id)
+        if index == len(self) or self.word_pair_ids[index] != card.word_pair_id:
+            for attribute, typecode in COLUMNS:
+                getattr(self, attribute).insert(index, 0)
+        self._set(index, card)
+
+    def overdue(self, now: datetime, exclude_ids: Set[int] = frozenset()) -> Iterator[CardState]:
+        """Unsuspended cards due before now, most overdue first"""
+
+        cutoff = _timestamp(now)
+        indexes = [
+            index for index in range(len(self))
+            if self.due[index] < cutoff
+            and not self.flags[index] & SUSPENDED
+            and self.word_pair_ids[index] not in exclude_ids
+        ]
+        indexes.sort(key=self.due.__getitem__)
+        return (self._state(index) for index in indexes)
+
+    def next_due(self, now: datetime) -> Optional[datetime]:
+        """Earliest due date not yet passed (to the second): when a card next becomes due"""
+
+        cutoff = _timestamp(now)
+        upcoming = min((due for due in self.due if cutoff <= due < NO_DUE), default=None)
+        return EPOCH + timedelta(seconds=upcoming) if upcoming is not None else None
+
+    def learned_count(self, min_reviews: int = 3, min_accuracy: float = 70.0) -> int:
+        return sum(
+            1 for total, correct in zip(self.total, self.correct)
+            if total >= min_reviews and correct * 100 >= min_accuracy * total
+        )
+
+    def average_accuracy(self) -> float:
+        if not len(self):
+            return 0.0
+        return sum(
+            correct / total * 100 for total, correct in zip(self.total, self.correct) if total
+        ) / len(self)
+
+    def flag_count(self, flag: int) -> int:
+        return sum(1 for flags in self.flags if flags & flag)
+
+    def header(self) -> bytes:
+        """Magic and version: what REPLACE_SCRIPT compares"""
+        return HEADER.pack(MAGIC, self.version, len(self))[:12]
+
+    def to_bytes(self) -> bytes:
+        parts = [HEADER.pack(MAGIC, self.version, len(self))]
+        for attribute, _ in COLUMNS:
+            column = getattr(self, attribute)
+            if sys.byteorder == "big":
+                column = array(column.typecode, column)
+                column.byteswap()
+            parts.append(column.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> Optional["CardStateSnapshot"]:
+        if len(blob) < HEADER.size:
+            return None
+        magic, version, count = HEADER.unpack_from(blob)
+        if magic != MAGIC:
+            return None
+
+        snapshot = cls(version)
+        offset = HEADER.size
+        for attribute, typecode in COLUMNS:
+            column = getattr(snapshot, attribute)
+            size = count * column.itemsize
+            column.frombytes(blob[offset:offset + size])
+            if len(column) != count:
+                return None
+            if sys.byteorder == "big":
+                column.byteswap()
+            offset += size
+        return snapshot
+
+    def _append(self, card) -> None:
+        for attribute, typecode in COLUMNS:
+            getattr(self, attribute).append(0)
+        self._set(len(self) - 1, card)
+
+    def _set(self, index: int, card) -> None:
+        self.word_pair_ids[index] = card.word_pair_id
+        self.due[index] = _timestamp(card.due_date)
+        self.ease[index] = int(round(float(card.ease_factor or 2.5) * 100))
+        self.interval[index] = max(0, card.interval_days or 0)
+        self.reps[index] = max(0, card.repetition_count or 0)
+        self.total[index] = max(0, card.total_reviews or 0)
+        self.correct[index] = max(0, card.correct_reviews or 0)
+        self.flags[index] = (SUSPENDED if card.is_suspended else 0) | (LEARNING if card.is_learning else 0)
+
+    def _state(self, index: int) -> CardState:
+        due = self.due[index]
+        return CardState(
+            word_pair_id=self.word_pair_ids[index],
+            due_date=EPOCH + timedelta(seconds=due) if due != NO_DUE else None,
+            ease_factor=self.ease[index] / 100,
+            interval_days=self.interval[index],
+            repetition_count=self.reps[index],
+            total_reviews=self.total[index],
+            correct_reviews=self.correct[index],
+            is_suspended=bool(self.flags[index] & SUSPENDED),
+            is_learning=bool(self.flags[index] & LEARNING)
+        )
+
+
+class CardStateService:
+    """
+    Per-user card state snapshots kept in Redis.
+
+    A snapshot is tagged with the user's progress version (bumped after
+    every committed review batch) and is only used while the tag matches;
+    otherwise it is rebuilt from one column query over user_cards. Review
+    batches patch the snapshot with the cards' new absolute state, which
+    makes a patch safe to apply on top of a rebuild that already saw it.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"card_state:{user_id}"
+
+    async def get(self, user_id: str) -> CardStateSnapshot:
+        version = await get_version(user_progress_key(user_id))
+        try:
+            blob = await redis_service.get_raw(self._key(user_id))
+        except RedisError:
+            blob = None
+
+        snapshot = CardStateSnapshot.from_bytes(blob) if blob else None
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        snapshot = self._build(user_id, version)
+        try:
+            await redis_service.set_raw(self._key(user_id), snapshot.to_bytes(), ex=settings.CARD_STATE_TTL_SECONDS)
+        except RedisError:
+            pass
+        return snapshot
+
+    async def record(self, user_id: str, cards: Iterable[CardState], version: Optional[int]) -> None:
+        """Patch the snapshot with the cards of a review batch committed as progress `version`"""
+
+        if version is None:
+            return
+        try:
+            blob = await redis_service.get_raw(self._key(user_id))
+            snapshot = CardStateSnapshot.from_bytes(blob) if blob else None
+            # Only the snapshot of the previous version can be brought up to date
+            if snapshot is None or snapshot.version != version - 1:
+                return
+
+            expected = snapshot.header()
+            for card in cards:
+                snapshot.upsert(card)
+            snapshot.version = version
+
+            await redis_service.run_script(
+                REPLACE_SCRIPT,
+                [self._key(user_id)],
+                [expected, snapshot.to_bytes(), len(expected), settings.CARD_STATE_TTL_SECONDS]
+            )
+        except RedisError:
+            pass
+
+    def _build(self, user_id: str, version: int) -> CardStateSnapshot:
+        # Cached until the next review batch, so never read from a lagging replica
+        with primary_reads(self.db):
+            rows = self.db.execute(card_state_query(user_id)).all()
+        return CardStateSnapshot.from_cards(rows, version)
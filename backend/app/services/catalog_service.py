@@ -0,0 +1,114 @@
+import base64
+import zlib
+from datetime import datetime, timedelta
+from typing import Iterator, Optional, Tuple
+
+import orjson
+from sqlalchemy import func, select, tuple_
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.exceptions import ValidationException
+from app.models.word_pair import WordPair
+
+# Cursor id meaning "every row at this timestamp"
+MAX_ID = 2 ** 63 - 1
+
+FEED_COLUMNS = (
+    WordPair.id,
+    WordPair.spanish_word,
+    WordPair.russian_word,
+    WordPair.cefr_level,
+    WordPair.frequency_rank,
+    WordPair.tags,
+    WordPair.audio_url,
+    WordPair.examples,
+    WordPair.is_active,
+    WordPair.created_at,
+    WordPair.updated_at,
+)
+
+
+def encode_version(updated_at: datetime, word_pair_id: int) -> str:
+    raw = f"{updated_at.isoformat()}|{word_pair_id}".encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_version(version: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(version + "=" * (-len(version) % 4)).decode()
+        updated_at, word_pair_id = raw.split("|")
+        return datetime.fromisoformat(updated_at), int(word_pair_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationException("Invalid catalog version")
+
+
+class CatalogFeedService:
+    """
+    Catalog snapshot and change feed for clients keeping a local copy.
+
+    Without `since` the feed is a snapshot of all active pairs; with it,
+    every pair changed after that version in (updated_at, id) order,
+    soft-deleted ones included with is_active false, at most
+    CATALOG_CHANGES_LIMIT per call. Each line is a word pair as NDJSON; the
+    last line is {"version", "has_more"} and the client stores the version
+    only after reading it, so an interrupted download is simply repeated.
+
+    Rows updated within the last CATALOG_CHANGES_LAG_SECONDS are held back:
+    updated_at is set from the transaction start, so a transaction still
+    committing could otherwise appear behind an already served version.
+    The feed reads from the primary for the same reason.
+    """
+
+    def __init__(self, since: Optional[str] = None, gzip: bool = False):
+        self.since = decode_version(since) if since else None
+        self.gzip = gzip
+
+    def stream(self) -> Iterator[bytes]:
+        chunks = self._lines()
+        if not self.gzip:
+            yield from chunks
+            return
+
+        # Flush per batch so the client can parse while the rest downloads
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+    def _lines(self) -> Iterator[bytes]:
+        db = SessionLocal()
+        try:
+            cutoff = db.execute(
+                select(func.localtimestamp() - timedelta(seconds=settings.CATALOG_CHANGES_LAG_SECONDS))
+            ).scalar_one()
+
+            query = select(*FEED_COLUMNS).where(WordPair.updated_at <= cutoff)
+            if self.since is None:
+                query = query.where(WordPair.is_active == True).order_by(WordPair.id)
+            else:
+                # Served by ix_word_pairs_updated_at
+                query = query.where(
+                    tuple_(WordPair.updated_at, WordPair.id) > tuple_(*self.since)
+                ).order_by(WordPair.updated_at, WordPair.id).limit(settings.CATALOG_CHANGES_LIMIT)
+
+            result = db.execute(query.execution_options(yield_per=settings.CATALOG_FEED_BATCH_SIZE))
+            columns = list(result.keys())
+            count = 0
+            last = None
+            for rows in result.partitions():
+                count += len(rows)
+                last = rows[-1]
+                yield b"".join(
+                    orjson.dumps(dict(zip(columns, row)), option=orjson.OPT_APPEND_NEWLINE)
+                    for row in rows
+                )
+
+            has_more = self.since is not None and count == settings.CATALOG_CHANGES_LIMIT
+            if has_more:
+                version = encode_version(last.updated_at, last.id)
+            else:
+                version = encode_version(max(cutoff, self.since[0]) if self.since else cutoff, MAX_ID)
+            yield orjson.dumps({"version": version, "has_more": has_more}, option=orjson.OPT_APPEND_NEWLINE)
+        finally:
+            db.close()
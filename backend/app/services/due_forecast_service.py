@@ -0,0 +1,317 @@
+import random
+import secrets
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from redis.exceptions import RedisError
+from sqlalchemy import Select, cast, Date, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import primary_reads
+from app.core.redis import redis_service
+from app.models.user_card import UserCard
+from app.services.fsrs_service import FSRSService
+
+# (interval below, fuzz share): short intervals get a wider relative spread
+FUZZ_RANGES = ((3, 0.0), (7, 0.15), (20, 0.1), (None, 0.05))
+
+# Hash fields besides the per-day buckets
+BUILT_FIELD = "built"        # marks a complete hash; a partially expired one is rebuilt
+OVERDUE_FIELD = "overdue"    # cards whose due day has already passed
+FOLDED_FIELD = "folded"      # last local day for which past buckets were folded into overdue
+
+# Folds buckets of days before today into the overdue counter (once per local day),
+# then returns the requested fields or, without fields, the whole hash
+FOLD_SCRIPT = """
+local today = ARGV[1]
+if redis.call('EXISTS', KEYS[1]) == 1 and redis.call('HGET', KEYS[1], 'folded') ~= today then
+    local folded = 0
+    local entries = redis.call('HGETALL', KEYS[1])
+    for i = 1, #entries, 2 do
+        local day = tonumber(entries[i])
+        if day and day < tonumber(today) then
+            folded = folded + tonumber(entries[i + 1])
+            redis.call('HDEL', KEYS[1], entries[i])
+        end
+    end
+    if folded ~= 0 then
+        redis.call('HINCRBY', KEYS[1], 'overdue', folded)
+    end
+    redis.call('HSET', KEYS[1], 'folded', today)
+end
+if #ARGV > 1 then
+    return redis.call('HMGET', KEYS[1], unpack(ARGV, 2))
+end
+return redis.call('HGETALL', KEYS[1])
+"""
+
+# Adds a review batch's day bucket changes, but only to a complete hash: a
+# missing one is rebuilt from user_cards on read. Without one, a rebuild in
+# progress may or may not have seen the batch: dropping its marker makes it
+# discard its result
+APPLY_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'built') == 0 then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+for i = 2, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# Marks a rebuild from user_cards as started, unless the forecast exists
+REBUILD_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'built') == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'rebuilding', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# Stores a rebuilt forecast only if no batch was applied since the rebuild
+# started (its marker is still there) and nobody else stored one first
+STORE_REBUILT_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'rebuilding') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# Seconds a rebuild marker outlives a rebuild that never finished
+REBUILD_MARKER_TTL_SECONDS = 60
+
+
+class DueCounts(NamedTuple):
+    today: int
+    week: int
+
+
+def forecast_query(user_id: str, tz: ZoneInfo, horizon: datetime) -> Select:
+    """Unsuspended cards per local due day before horizon; an index-only scan of ix_user_cards_due_queue"""
+
+    # Naive UTC timestamp -> timestamptz -> the user's local date
+    due_day = cast(func.timezone(tz.key, func.timezone("UTC", UserCard.due_date)), Date)
+    return select(due_day, func.count()).where(
+        UserCard.user_id == user_id,
+        UserCard.is_suspended == False,
+        UserCard.due_date.isnot(None),
+        UserCard.due_date < horizon
+    ).group_by(due_day)
+
+
+def user_timezone(name: Optional[str]) -> ZoneInfo:
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def local_day(moment: datetime, tz: ZoneInfo) -> int:
+    """Date ordinal of a naive UTC timestamp in the user's timezone"""
+    return moment.replace(tzinfo=timezone.utc).astimezone(tz).date().toordinal()
+
+
+class DueForecast:
+    """
+    Per-user histogram of due cards by local day.
+
+    counts[i] is the number of cards due on base_day + i (date ordinals in
+    the user's timezone, base_day being today), kept as a compact
+    array('H') covering DUE_FORECAST_DAYS days; cards due on earlier days
+    are summed in `overdue`. Changes made while scheduling are collected in
+    `changes` and written back to Redis with HINCRBY, so concurrent batches
+    never overwrite each other.
+    """
+
+    def __init__(self, base_day: int, tz: ZoneInfo, counts: Optional[array] = None, overdue: int = 0):
+        self.base_day = base_day
+        self.tz = tz
+        self.counts = counts if counts is not None else array("H", bytes(2 * settings.DUE_FORECAST_DAYS))
+        self.overdue = overdue
+        self.changes: Dict[str, int] = defaultdict(int)
+
+    def day_of(self, moment: datetime) -> int:
+        return local_day(moment, self.tz)
+
+    def load(self, day: int) -> int:
+        index = day - self.base_day
+        if 0 <= index < len(self.counts):
+            return self.counts[index]
+        return 0
+
+    def due_counts(self) -> DueCounts:
+        return DueCounts(
+            today=self.overdue + self.counts[0],
+            week=self.overdue + sum(self.counts[:7])
+        )
+
+    def move(self, old_due: Optional[datetime], new_due: Optional[datetime]) -> None:
+        """Move one card between day buckets after it was rescheduled"""
+        if isinstance(old_due, datetime):
+            self._add(self.day_of(old_due), -1)
+        if isinstance(new_due, datetime):
+            self._add(self.day_of(new_due), 1)
+
+    def _add(self, day: int, amount: int) -> None:
+        index = day - self.base_day
+        if index < 0:
+            self.overdue = max(0, self.overdue + amount)
+            self.changes[OVERDUE_FIELD] += amount
+        elif index < len(self.counts):
+            self.counts[index] = max(0, min(0xFFFF, self.counts[index] + amount))
+            self.changes[str(day)] += amount
+
+
+class DueLoadBalancer:
+    """Fuzz new intervals and pick the least loaded day within the fuzz range"""
+
+    def __init__(self, forecast: DueForecast, rng: Optional[random.Random] = None):
+        self.forecast = forecast
+        self.rng = rng or random
+
+    @staticmethod
+    def fuzz_range(interval_days: int) -> int:
+        for upper, share in FUZZ_RANGES:
+            if upper is None or interval_days < upper:
+                return max(1, round(interval_days * share)) if share else 0
+        return 0
+
+    def balance(self, interval_days: int, now: datetime) -> int:
+        delta = self.fuzz_range(interval_days)
+        if not delta:
+            return interval_days
+
+        low = max(1, interval_days - delta)
+        high = min(FSRSService.MAX_INTERVAL_DAYS, interval_days + delta)
+
+        loads = {
+            interval: self.forecast.load(self.forecast.day_of(now + timedelta(days=interval)))
+            for interval in range(low, high + 1)
+        }
+        lowest = min(loads.values())
+        # Random choice among equally loaded days keeps identical cards from clustering again
+        return self.rng.choice([interval for interval, load in loads.items() if load == lowest])
+
+
+class DueForecastService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"due_forecast:{user_id}"
+
+    async def get_forecast(self, user_id: str, timezone_name: Optional[str] = None) -> DueForecast:
+        """Load the user's forecast from Redis, rebuilding it from user_cards on a miss"""
+
+        tz = user_timezone(timezone_name)
+        base_day = local_day(datetime.utcnow(), tz)
+        try:
+            entries = await redis_service.run_script(FOLD_SCRIPT, [self._key(user_id)], [base_day])
+        except RedisError:
+            entries = []
+
+        stored = dict(zip(entries[::2], entries[1::2]))
+        if BUILT_FIELD not in stored:
+            return await self._rebuild(user_id, base_day, tz)
+
+        forecast = DueForecast(base_day, tz, overdue=max(0, int(stored.get(OVERDUE_FIELD, 0))))
+        for field, value in stored.items():
+            if field.isdigit():
+                index = int(field) - base_day
+                if 0 <= index < len(forecast.counts):
+                    forecast.counts[index] = max(0, min(0xFFFF, int(value)))
+        return forecast
+
+    async def count_due(self, user_id: str, timezone_name: Optional[str] = None) -> DueCounts:
+        """Cards due by the end of today and of the coming week, in the user's timezone"""
+
+        tz = user_timezone(timezone_name)
+        base_day = local_day(datetime.utcnow(), tz)
+        fields: List[str] = [BUILT_FIELD, OVERDUE_FIELD] + [str(base_day + offset) for offset in range(7)]
+        try:
+            values = await redis_service.run_script(FOLD_SCRIPT, [self._key(user_id)], [base_day, *fields])
+        except RedisError:
+            values = [None]
+
+        if values[0] is None:
+            return (await self.get_forecast(user_id, timezone_name)).due_counts()
+
+        overdue = max(0, int(values[1] or 0))
+        days = [max(0, int(value or 0)) for value in values[2:]]
+        return DueCounts(today=overdue + days[0], week=overdue + sum(days))
+
+    async def save(self, user_id: str, forecast: DueForecast) -> None:
+        """Apply the forecast's pending changes to Redis"""
+
+        changes = [item for field, amount in forecast.changes.items() if amount for item in (field, amount)]
+        if not changes:
+            return
+        try:
+            await redis_service.run_script(
+                APPLY_SCRIPT, [self._key(user_id)], [settings.DUE_FORECAST_TTL_SECONDS, *changes]
+            )
+        except RedisError:
+            pass
+        forecast.changes.clear()
+
+    async def invalidate(self, user_id: str) -> None:
+        """Drop the forecast, e.g. after the user's timezone changed"""
+        try:
+            await redis_service.delete(self._key(user_id))
+        except RedisError:
+            pass
+
+    def _build_forecast(self, user_id: str, base_day: int, tz: ZoneInfo) -> DueForecast:
+        forecast = DueForecast(base_day, tz)
+        horizon = datetime.utcnow() + timedelta(days=len(forecast.counts) + 1)
+
+        # Cached and patched by later batches, so never read from a lagging replica
+        with primary_reads(self.db):
+            rows = self.db.execute(forecast_query(user_id, tz, horizon)).all()
+
+        for day, count in rows:
+            index = day.toordinal() - base_day
+            if index < 0:
+                forecast.overdue += count
+            elif index < len(forecast.counts):
+                forecast.counts[index] = min(0xFFFF, count)
+        return forecast
+
+    async def _rebuild(self, user_id: str, base_day: int, tz: ZoneInfo) -> DueForecast:
+        """Forecast built from user_cards, cached unless a batch raced the build"""
+
+        key = self._key(user_id)
+        token = secrets.token_hex(8)
+        try:
+            await redis_service.run_script(REBUILD_SCRIPT, [key], [token, REBUILD_MARKER_TTL_SECONDS])
+        except RedisError:
+            pass
+
+        forecast = self._build_forecast(user_id, base_day, tz)
+
+        mapping = {
+            str(forecast.base_day + index): count
+            for index, count in enumerate(forecast.counts) if count
+        }
+        mapping[OVERDUE_FIELD] = forecast.overdue
+        mapping[FOLDED_FIELD] = forecast.base_day
+        mapping[BUILT_FIELD] = 1
+        fields = [item for field, value in mapping.items() for item in (field, value)]
+        try:
+            await redis_service.run_script(
+                STORE_REBUILT_SCRIPT, [key], [token, settings.DUE_FORECAST_TTL_SECONDS, *fields]
+            )
+        except RedisError:
+            pass
+        return forecast
@@ -0,0 +1,121 @@
+import csv
+import io
+from datetime import datetime
+from typing import Iterator, List
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.exceptions import ValidationException
+from app.models.review import Review
+from app.models.user_card import UserCard
+from app.models.word_pair import WordPair
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+class ExportService:
+    """
+    Streams a user's reviews or cards as NDJSON or CSV.
+
+    Rows are read through a server-side cursor in EXPORT_BATCH_SIZE
+    batches and encoded one batch per chunk, so memory stays constant
+    however long the history is. Each export runs in a session of its own
+    that lives as long as the response stream; it reads from a replica
+    when use_replica is set.
+    """
+
+    def __init__(self, user_id: str, export_format: str = "ndjson", use_replica: bool = False):
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationException(f"Unsupported export format: {export_format}")
+        self.user_id = user_id
+        self.export_format = export_format
+        self.use_replica = use_replica
+
+    @property
+    def media_type(self) -> str:
+        return EXPORT_FORMATS[self.export_format]
+
+    def filename(self, kind: str) -> str:
+        return f"pairlingua-{kind}-{datetime.utcnow():%Y%m%d}.{self.export_format}"
+
+    def stream_reviews(self) -> Iterator[bytes]:
+        # Served in (user_id, reviewed_at) order by ix_reviews_user_date
+        query = select(
+            Review.id,
+            Review.reviewed_at,
+            Review.word_pair_id,
+            WordPair.spanish_word,
+            WordPair.russian_word,
+            Review.quality,
+            Review.response_time_ms,
+            Review.source,
+            Review.session_id,
+            Review.ease_factor_before,
+            Review.ease_factor_after,
+            Review.interval_before,
+            Review.interval_after,
+        ).join(WordPair, WordPair.id == Review.word_pair_id).where(
+            Review.user_id == self.user_id
+        ).order_by(Review.reviewed_at, Review.id)
+        return self._stream(query)
+
+    def stream_cards(self) -> Iterator[bytes]:
+        query = select(
+            UserCard.word_pair_id,
+            WordPair.spanish_word,
+            WordPair.russian_word,
+            WordPair.cefr_level,
+            UserCard.ease_factor,
+            UserCard.repetition_count,
+            UserCard.interval_days,
+            UserCard.due_date,
+            UserCard.stability,
+            UserCard.difficulty,
+            UserCard.total_reviews,
+            UserCard.correct_reviews,
+            UserCard.last_reviewed_at,
+            UserCard.is_suspended,
+            UserCard.created_at,
+        ).join(WordPair, WordPair.id == UserCard.word_pair_id).where(
+            UserCard.user_id == self.user_id
+        ).order_by(UserCard.word_pair_id)
+        return self._stream(query)
+
+    def _stream(self, query: Select) -> Iterator[bytes]:
+        db = SessionLocal()
+        db.read_only = self.use_replica
+        try:
+            # yield_per implies stream_results: a named cursor on psycopg2
+            result = db.execute(query.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+            columns = list(result.keys())
+
+            if self.export_format == "csv":
+                yield self._encode_csv([columns])
+            for rows in result.partitions():
+                if self.export_format == "csv":
+                    yield self._encode_csv(rows)
+                else:
+                    yield b"".join(
+                        orjson.dumps(dict(zip(columns, row)), default=str, option=orjson.OPT_APPEND_NEWLINE)
+                        for row in rows
+                    )
+        finally:
+            db.close()
+
+    @staticmethod
+    def _encode_csv(rows: List) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in row
+            ])
+        return buffer.getvalue().encode("utf-8")
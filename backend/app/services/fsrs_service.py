@@ -0,0 +1,147 @@
+from typing import NamedTuple, Optional, Sequence
+import math
+
+
+class FSRSResult(NamedTuple):
+    stability: float
+    difficulty: float
+    interval_days: int
+
+
+class FSRSService:
+    """
+    FSRS-4.5 (Free Spaced Repetition Scheduler) memory model.
+
+    Each card carries a stability S (days until retrievability drops to 90%)
+    and a difficulty D (1-10). Retrievability after t days is
+    R = (1 + FACTOR * t / S) ^ DECAY, and the next interval is the t at
+    which R reaches the desired retention.
+
+    FSRS grades are 1 (again), 2 (hard), 3 (good) and 4 (easy); SM-2
+    quality scores are mapped onto them by grade_from_quality.
+    """
+
+    DECAY = -0.5
+    FACTOR = 19 / 81
+    MIN_STABILITY = 0.1
+    MAX_INTERVAL_DAYS = 365
+
+    # Published FSRS-4.5 defaults; replaced by weights fitted with app.analytics.fsrs_fit
+    DEFAULT_WEIGHTS = (
+        0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+        0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755,
+    )
+
+    def __init__(
+        self,
+        weights: Optional[Sequence[float]] = None,
+        desired_retention: float = 0.9
+    ):
+        self.weights = tuple(weights) if weights is not None else self.DEFAULT_WEIGHTS
+        if len(self.weights) != len(self.DEFAULT_WEIGHTS):
+            raise ValueError(f"FSRS expects {len(self.DEFAULT_WEIGHTS)} weights, got {len(self.weights)}")
+        self.desired_retention = desired_retention
+
+    @staticmethod
+    def grade_from_quality(quality: int) -> int:
+        """Map SM-2 quality (0-5) to an FSRS grade (1-4)"""
+        if quality < 3:
+            return 1
+        return quality - 1
+
+    def calculate_next_interval(
+        self,
+        quality: int,
+        stability: Optional[float] = None,
+        difficulty: Optional[float] = None,
+        elapsed_days: float = 0.0
+    ) -> FSRSResult:
+        """
+        Update the memory state after a review.
+
+        Args:
+            quality: Response quality (0-5)
+            stability: Current stability in days (None for a new card)
+            difficulty: Current difficulty (None for a new card)
+            elapsed_days: Days since the previous review
+
+        Returns:
+            FSRSResult with new stability, difficulty and interval_days
+        """
+
+        grade = self.grade_from_quality(max(0, min(5, quality)))
+
+        if stability is None or difficulty is None:
+            new_stability = self.initial_stability(grade)
+            new_difficulty = self.initial_difficulty(grade)
+        else:
+            retrievability = self.retrievability(elapsed_days, stability)
+            new_difficulty = self.next_difficulty(difficulty, grade)
+            if grade == 1:
+                new_stability = self.forget_stability(difficulty, stability, retrievability)
+            else:
+                new_stability = self.recall_stability(difficulty, stability, retrievability, grade)
+
+        return FSRSResult(
+            stability=new_stability,
+            difficulty=new_difficulty,
+            interval_days=self.next_interval(new_stability)
+        )
+
+    def retrievability(self, elapsed_days: float, stability: float) -> float:
+        """Probability of recall after elapsed_days"""
+        if stability <= 0:
+            return 0.0
+        return (1 + self.FACTOR * max(0.0, elapsed_days) / stability) ** self.DECAY
+
+    def next_interval(self, stability: float) -> int:
+        interval = stability / self.FACTOR * (self.desired_retention ** (1 / self.DECAY) - 1)
+        return max(1, min(self.MAX_INTERVAL_DAYS, round(interval)))
+
+    def initial_stability(self, grade: int) -> float:
+        return max(self.MIN_STABILITY, self.weights[grade - 1])
+
+    def initial_difficulty(self, grade: int) -> float:
+        w = self.weights
+        return self._clamp_difficulty(w[4] - (grade - 3) * w[5])
+
+    def next_difficulty(self, difficulty: float, grade: int) -> float:
+        w = self.weights
+        new_difficulty = difficulty - w[6] * (grade - 3)
+        # Mean reversion towards the default difficulty of a "good" answer
+        return self._clamp_difficulty(w[7] * self.initial_difficulty(3) + (1 - w[7]) * new_difficulty)
+
+    def recall_stability(
+        self,
+        difficulty: float,
+        stability: float,
+        retrievability: float,
+        grade: int
+    ) -> float:
+        w = self.weights
+        hard_penalty = w[15] if grade == 2 else 1.0
+        easy_bonus = w[16] if grade == 4 else 1.0
+        growth = (
+            math.exp(w[8])
+            * (11 - difficulty)
+            * stability ** -w[9]
+            * (math.exp(w[10] * (1 - retrievability)) - 1)
+            * hard_penalty
+            * easy_bonus
+        )
+        return max(self.MIN_STABILITY, stability * (1 + growth))
+
+    def forget_stability(self, difficulty: float, stability: float, retrievability: float) -> float:
+        w = self.weights
+        new_stability = (
+            w[11]
+            * difficulty ** -w[12]
+            * ((stability + 1) ** w[13] - 1)
+            * math.exp(w[14] * (1 - retrievability))
+        )
+        # A lapse never makes the memory more stable than it was
+        return max(self.MIN_STABILITY, min(stability, new_stability))
+
+    @staticmethod
+    def _clamp_difficulty(difficulty: float) -> float:
+        return max(1.0, min(10.0, difficulty))
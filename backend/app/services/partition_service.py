@@ -0,0 +1,218 @@
+import logging
+import os
+import re
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import Base, SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "reviews"
+PARTITION_NAME = re.compile(r"^reviews_y(\d{4})m(\d{2})$")
+
+# Serializes partition DDL between workers
+MAINTENANCE_LOCK_ID = 7_301_001
+
+ARCHIVE_QUERY = """
+    SELECT id, user_id::text, word_pair_id, user_card_id, quality, response_time_ms, source,
+           session_id::text, ease_factor_before, ease_factor_after, interval_before,
+           interval_after, reviewed_at, client_review_id::text
+    FROM {partition}
+    ORDER BY user_id, reviewed_at
+"""
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year}m{month.month:02d}"
+
+
+class PartitionService:
+    """Monthly range partitions of the reviews log and their Parquet archive"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def ensure_partitions(self, months_ahead: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+        """Create partitions for the current month and months_ahead months after it"""
+
+        months_ahead = settings.REVIEWS_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+        current = month_start(today or datetime.utcnow().date())
+
+        self._lock()
+        existing = {name for name, _ in self.list_partitions()}
+        created = []
+        for offset in range(months_ahead + 1):
+            start = add_months(current, offset)
+            name = partition_name(start)
+            if name in existing:
+                continue
+            self.db.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{add_months(start, 1).isoformat()}')"
+            ))
+            created.append(name)
+
+        self.db.commit()
+        return created
+
+    def list_partitions(self) -> List[Tuple[str, date]]:
+        """Monthly partitions of reviews with the first day of their month, oldest first"""
+
+        rows = self.db.execute(text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+        """), {"parent": PARENT_TABLE}).scalars().all()
+
+        partitions = []
+        for name in rows:
+            match = PARTITION_NAME.match(name)
+            if match:
+                partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    def archive_partitions(
+        self,
+        retention_months: Optional[int] = None,
+        archive_dir: Optional[str] = None,
+        today: Optional[date] = None
+    ) -> List[Path]:
+        """
+        Export partitions older than the retention window to Parquet, then drop them.
+
+        Each partition is listed, exported and dropped in one transaction
+        under the maintenance lock, so a second process never exports the
+        same partition; a process that finds the lock taken stops instead
+        of waiting.
+        """
+
+        retention_months = settings.REVIEWS_RETENTION_MONTHS if retention_months is None else retention_months
+        archive_dir = Path(archive_dir or settings.REVIEWS_ARCHIVE_DIR)
+        cutoff = add_months(month_start(today or datetime.utcnow().date()), -retention_months)
+
+        archived = []
+        while True:
+            if not self._try_lock():
+                logger.info("Review partitions are being archived by another process")
+                self.db.rollback()
+                break
+
+            expired = [name for name, start in self.list_partitions() if add_months(start, 1) <= cutoff]
+            if not expired:
+                self.db.commit()
+                break
+
+            name = expired[0]
+            try:
+                path = self._export_parquet(name, archive_dir)
+                self.db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+                self.db.execute(text(f"DROP TABLE {name}"))
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+
+            logger.info(f"Archived {name} to {path}")
+            archived.append(path)
+        return archived
+
+    def _export_parquet(self, partition: str, archive_dir: Path) -> Path:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Archiving reviews requires pyarrow (poetry install --with archive)")
+
+        schema = pa.schema([
+            ("id", pa.int64()),
+            ("user_id", pa.string()),
+            ("word_pair_id", pa.int64()),
+            ("user_card_id", pa.int64()),
+            ("quality", pa.int16()),
+            ("response_time_ms", pa.int32()),
+            ("source", pa.string()),
+            ("session_id", pa.string()),
+            ("ease_factor_before", pa.int32()),
+            ("ease_factor_after", pa.int32()),
+            ("interval_before", pa.int32()),
+            ("interval_after", pa.int32()),
+            ("reviewed_at", pa.timestamp("us")),
+            ("client_review_id", pa.string()),
+        ])
+
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        path = archive_dir / f"{partition}.parquet"
+        tmp_path = path.with_suffix(".parquet.tmp")
+
+        # Server-side cursor: the partition is streamed, never loaded whole
+        connection = self.db.connection().connection
+        with connection.cursor(name=f"archive_{partition}") as cursor:
+            cursor.itersize = settings.REVIEWS_ARCHIVE_BATCH_SIZE
+            cursor.execute(ARCHIVE_QUERY.format(partition=partition))
+
+            with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+                while True:
+                    rows = cursor.fetchmany(settings.REVIEWS_ARCHIVE_BATCH_SIZE)
+                    if not rows:
+                        break
+                    columns = list(zip(*rows))
+                    writer.write_batch(pa.RecordBatch.from_arrays(
+                        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                        schema=schema
+                    ))
+
+        os.replace(tmp_path, path)
+        return path
+
+    def _lock(self) -> None:
+        self.db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MAINTENANCE_LOCK_ID})
+
+    def _try_lock(self) -> bool:
+        return self.db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:lock_id)"), {"lock_id": MAINTENANCE_LOCK_ID}
+        ).scalar()
+
+
+def run_partition_maintenance() -> None:
+    """Create upcoming partitions and, if enabled, archive expired ones"""
+
+    db = SessionLocal()
+    try:
+        partition_service = PartitionService(db)
+        created = partition_service.ensure_partitions()
+        if created:
+            logger.info(f"Created review partitions: {', '.join(created)}")
+        if settings.REVIEWS_ARCHIVE_ENABLED:
+            partition_service.archive_partitions()
+    finally:
+        db.close()
+
+
+def run_startup_maintenance() -> None:
+    """Create missing tables and upcoming review partitions; once per deployment under gunicorn"""
+
+    import app.models  # noqa: F401  registers every table on Base.metadata
+
+    Base.metadata.create_all(bind=engine)
+    # Logged, not raised: a failed archive run must not keep the API from starting
+    try:
+        run_partition_maintenance()
+    except Exception as e:
+        logger.error(f"Review partition maintenance failed: {e}")
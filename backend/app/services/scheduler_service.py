@@ -0,0 +1,116 @@
+import json
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Protocol
+
+from app.core.config import settings
+from app.models.user_card import UserCard
+from app.services.fsrs_service import FSRSService
+from app.services.sm2_service import SM2Service
+
+
+class Scheduler(Protocol):
+    """Spaced repetition algorithm that schedules a UserCard after a review"""
+
+    name: str
+
+    def schedule(self, card: UserCard, quality: int, now: datetime) -> None:
+        """Update the card's scheduling fields and due_date in place"""
+        ...
+
+
+class SM2Scheduler:
+    name = "sm2"
+
+    def __init__(self, sm2: Optional[SM2Service] = None):
+        self.sm2 = sm2 or SM2Service()
+
+    def schedule(self, card: UserCard, quality: int, now: datetime) -> None:
+        result = self.sm2.calculate_next_interval(
+            quality=quality,
+            ease_factor=float(card.ease_factor or SM2Service.INITIAL_EASE_FACTOR),
+            interval_days=card.interval_days or 0,
+            repetition_count=card.repetition_count or 0
+        )
+
+        interval_days = result.interval_days
+        if quality >= 3 and card.due_date is not None and card.interval_days:
+            interval_days = self.sm2.adjust_for_overdue(
+                interval_days,
+                (now - card.due_date).days,
+                result.ease_factor
+            )
+
+        card.ease_factor = result.ease_factor
+        card.interval_days = interval_days
+        card.repetition_count = result.repetition_count
+        card.due_date = now + timedelta(days=interval_days)
+
+
+class FSRSScheduler:
+    name = "fsrs"
+
+    def __init__(self, fsrs: Optional[FSRSService] = None):
+        self.fsrs = fsrs or FSRSService()
+        # SM-2 fields are still maintained so switching back keeps working
+        self.sm2 = SM2Service()
+
+    def schedule(self, card: UserCard, quality: int, now: datetime) -> None:
+        stability, difficulty = self._memory_state(card)
+        elapsed_days = (now - card.last_reviewed_at).total_seconds() / 86400 if card.last_reviewed_at else 0.0
+
+        result = self.fsrs.calculate_next_interval(
+            quality=quality,
+            stability=stability,
+            difficulty=difficulty,
+            elapsed_days=elapsed_days
+        )
+        sm2_result = self.sm2.calculate_next_interval(
+            quality=quality,
+            ease_factor=float(card.ease_factor or SM2Service.INITIAL_EASE_FACTOR),
+            interval_days=card.interval_days or 0,
+            repetition_count=card.repetition_count or 0
+        )
+
+        card.stability = result.stability
+        card.difficulty = result.difficulty
+        card.ease_factor = sm2_result.ease_factor
+        card.repetition_count = sm2_result.repetition_count
+        card.interval_days = result.interval_days
+        card.due_date = now + timedelta(days=result.interval_days)
+
+    def _memory_state(self, card: UserCard):
+        if card.stability is not None and card.difficulty is not None:
+            return float(card.stability), float(card.difficulty)
+        if card.last_reviewed_at is None:
+            return None, None
+
+        # Card reviewed under SM-2: seed stability from its current interval
+        # and difficulty from how far the ease factor sits below the default
+        ease_factor = float(card.ease_factor or SM2Service.INITIAL_EASE_FACTOR)
+        difficulty = self.fsrs.initial_difficulty(3) + (SM2Service.INITIAL_EASE_FACTOR - ease_factor) * 4
+        return (
+            max(FSRSService.MIN_STABILITY, float(card.interval_days or 0)),
+            max(1.0, min(10.0, difficulty))
+        )
+
+
+def load_fsrs_weights(path: Optional[str]):
+    """Read weights written by app.analytics.fsrs_fit (None -> FSRS defaults)"""
+    if not path:
+        return None
+    with open(path) as f:
+        return json.load(f)["weights"]
+
+
+@lru_cache()
+def get_scheduler() -> Scheduler:
+    """Scheduler selected by settings.SCHEDULER"""
+    if settings.SCHEDULER == FSRSScheduler.name:
+        return FSRSScheduler(FSRSService(
+            weights=load_fsrs_weights(settings.FSRS_WEIGHTS_PATH),
+            desired_retention=settings.FSRS_DESIRED_RETENTION
+        ))
+    if settings.SCHEDULER == SM2Scheduler.name:
+        return SM2Scheduler()
+    raise ValueError(f"Unknown scheduler: {settings.SCHEDULER}")
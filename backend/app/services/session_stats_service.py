@@ -0,0 +1,223 @@
+import secrets
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import NotFoundException
+from app.core.redis import redis_service
+from app.models.review import Review
+from app.models.session import StudySession
+from app.schemas.study import StudySessionStats
+
+EPOCH = datetime(1970, 1, 1)
+
+# Adds a review batch to the session's counters, but only to a complete hash:
+# a missing one (expired, Redis was down) is rebuilt from the review log on read.
+# Without one, any rebuild in progress may have missed this batch: dropping its
+# marker makes it discard its result
+RECORD_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'built') == 0 then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+redis.call('HINCRBY', KEYS[1], 'cards', ARGV[1])
+redis.call('HINCRBY', KEYS[1], 'correct', ARGV[2])
+redis.call('HINCRBY', KEYS[1], 'points', ARGV[3])
+redis.call('HINCRBY', KEYS[1], 'response_ms', ARGV[4])
+redis.call('HINCRBY', KEYS[1], 'timed', ARGV[5])
+local first = tonumber(redis.call('HGET', KEYS[1], 'first') or '')
+if not first or tonumber(ARGV[6]) < first then
+    redis.call('HSET', KEYS[1], 'first', ARGV[6])
+end
+local last = tonumber(redis.call('HGET', KEYS[1], 'last') or '')
+if not last or tonumber(ARGV[7]) > last then
+    redis.call('HSET', KEYS[1], 'last', ARGV[7])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[8])
+return 1
+"""
+
+# Marks a rebuild from the review log as started, unless the counters exist
+REBUILD_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'built') == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'rebuilding', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# Stores rebuilt counters only if no batch was recorded since the rebuild
+# started (its marker is still there) and nobody else stored them first
+STORE_REBUILT_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'rebuilding') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# Seconds a rebuild marker outlives a rebuild that never finished
+REBUILD_MARKER_TTL_SECONDS = 60
+
+
+def _timestamp(moment: datetime) -> int:
+    return int((moment - EPOCH).total_seconds())
+
+
+class SessionStatsService:
+    """
+    Per-session review statistics.
+
+    Review batches add to running counters in a Redis hash, started empty
+    when the session is created, so the end-of-session screen costs one
+    HGETALL. Sessions without a hash (older or expired ones) are
+    aggregated once from their reviews through ix_reviews_session_id and
+    the result is cached the same way, unless a batch was recorded while
+    the aggregate ran; the next read then aggregates again.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _key(user_id: str, session_id: UUID) -> str:
+        return f"session_stats:{user_id}:{session_id}"
+
+    async def start(self, user_id: str, session_id: UUID) -> None:
+        """Start empty counters for a new session"""
+        await self._store(user_id, session_id, {"built": 1, "started": _timestamp(datetime.utcnow())})
+
+    async def record(
+        self,
+        user_id: str,
+        session_id: UUID,
+        cards: int,
+        correct: int,
+        points: int,
+        response_times: List[int],
+        first_review: datetime,
+        last_review: datetime
+    ) -> None:
+        """Add a committed review batch to the session's counters"""
+
+        try:
+            await redis_service.run_script(RECORD_SCRIPT, [self._key(user_id, session_id)], [
+                cards, correct, points, sum(response_times), len(response_times),
+                _timestamp(first_review), _timestamp(last_review), settings.SESSION_STATS_TTL_SECONDS
+            ])
+        except RedisError:
+            pass
+
+    async def get(self, user_id: str, session_id: UUID) -> StudySessionStats:
+        try:
+            counters = await redis_service.hgetall(self._key(user_id, session_id))
+        except RedisError:
+            counters = {}
+
+        if "built" not in counters:
+            counters = await self._rebuild(user_id, session_id)
+
+        counters = {field: int(value) for field, value in counters.items()}
+        started_at = datetime.utcfromtimestamp(counters.get("started", counters.get("first")))
+        time_spent_seconds = counters["last"] - counters["first"] if "first" in counters else 0
+
+        cards = counters.get("cards", 0)
+        correct = counters.get("correct", 0)
+        timed = counters.get("timed", 0)
+        return StudySessionStats(
+            session_id=session_id,
+            started_at=started_at,
+            cards_studied=cards,
+            cards_correct=correct,
+            average_response_time=counters.get("response_ms", 0) / timed if timed else None,
+            accuracy=correct / cards * 100 if cards else 0.0,
+            points_earned=counters.get("points", 0),
+            time_spent_minutes=time_spent_seconds // 60
+        )
+
+    async def _rebuild(self, user_id: str, session_id: UUID) -> Dict[str, int]:
+        """Counters aggregated from the review log, cached unless a batch raced the aggregate"""
+
+        key = self._key(user_id, session_id)
+        token = secrets.token_hex(8)
+        try:
+            await redis_service.run_script(REBUILD_SCRIPT, [key], [token, REBUILD_MARKER_TTL_SECONDS])
+        except RedisError:
+            pass
+
+        counters = self._aggregate(user_id, session_id)
+        if "first" not in counters:
+            # No reviews yet: the session itself must exist
+            counters["started"] = _timestamp(self._session_started_at(user_id, session_id))
+
+        fields = [item for field, value in counters.items() for item in (field, value)]
+        try:
+            await redis_service.run_script(
+                STORE_REBUILT_SCRIPT, [key], [token, settings.SESSION_STATS_TTL_SECONDS, *fields]
+            )
+        except RedisError:
+            pass
+        return counters
+
+    def _aggregate(self, user_id: str, session_id: UUID) -> Dict[str, int]:
+        """Counters of a session rebuilt from its reviews"""
+
+        # Imported here: study_service imports this module
+        from app.services.study_service import StudyService
+
+        # Points depend on quality and the new ease factor, so rows are grouped by both
+        rows = self.db.query(
+            Review.quality,
+            Review.ease_factor_after,
+            func.count(),
+            func.coalesce(func.sum(Review.response_time_ms), 0),
+            func.count(Review.response_time_ms),
+            func.min(Review.reviewed_at),
+            func.max(Review.reviewed_at),
+        ).filter(
+            Review.session_id == session_id,
+            Review.user_id == user_id
+        ).group_by(Review.quality, Review.ease_factor_after).all()
+
+        counters = {"built": 1, "cards": 0, "correct": 0, "points": 0, "response_ms": 0, "timed": 0}
+        first: Optional[datetime] = None
+        last: Optional[datetime] = None
+        for quality, ease_factor_after, count, response_ms, timed, group_first, group_last in rows:
+            ease_factor = (ease_factor_after or 250) / 100
+            counters["cards"] += count
+            counters["correct"] += count if quality >= 3 else 0
+            counters["points"] += count * StudyService._calculate_points(quality, ease_factor)
+            counters["response_ms"] += int(response_ms)
+            counters["timed"] += timed
+            first = group_first if first is None else min(first, group_first)
+            last = group_last if last is None else max(last, group_last)
+
+        if first is not None:
+            counters["first"] = _timestamp(first)
+            counters["last"] = _timestamp(last)
+        return counters
+
+    def _session_started_at(self, user_id: str, session_id: UUID) -> datetime:
+        created_at = self.db.query(StudySession.created_at).filter(
+            StudySession.id == session_id,
+            StudySession.user_id == user_id
+        ).scalar()
+        if created_at is None:
+            raise NotFoundException("Study session not found")
+        return created_at
+
+    async def _store(self, user_id: str, session_id: UUID, counters: Dict[str, int]) -> None:
+        try:
+            await redis_service.hset_many(
+                self._key(user_id, session_id), counters, ex=settings.SESSION_STATS_TTL_SECONDS
+            )
+        except RedisError:
+            pass
@@ -0,0 +1,148 @@
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+
+import orjson
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.exceptions import PairLinguaException, RateLimitException
+from app.core.rate_limit import RateLimit, rate_limiter
+from app.schemas.study import ReviewBatch, ReviewItem, StudyCard, StudyCardsRequest
+from app.services.study_service import StudyService
+
+logger = logging.getLogger(__name__)
+
+REVIEW_LIMIT = RateLimit.parse(settings.RATE_LIMIT_REVIEW)
+
+
+class StudyChannel:
+    """
+    State of one WebSocket study connection.
+
+    The cards on screen (`active`) and a prefetched queue of replacements
+    live in memory for the whole connection, so a review costs one frame
+    each way: the client sends the review, the server answers with the
+    result and the next card from the queue. The queue is topped up once
+    it drops below STUDY_WS_PREFETCH / 2, excluding every card the client
+    already holds. Each database operation uses a short session of its
+    own, so an idle connection does not pin a pooled connection. Reviews
+    share the RATE_LIMIT_REVIEW bucket with POST /study/cards/review.
+
+    Client frames: {"type": "review", "word_pair_id", "quality",
+    "response_time_ms"?, "source"?} and {"type": "ping"}, as JSON text.
+    Server frames: "session", "result", "error" and "pong"; a bad frame or
+    a failed review gets an "error" frame and the connection stays open.
+    """
+
+    def __init__(self, user_id: str, request: StudyCardsRequest):
+        self.user_id = user_id
+        self.request = request
+        self.session_id = None
+        self.active: Dict[int, Dict[str, Any]] = {}
+        self.queue: Deque[Dict[str, Any]] = deque()
+
+    async def start(self) -> str:
+        """Load the first cards plus the prefetch queue; returns the "session" frame"""
+
+        cards, total_due = await self._fetch(self.request.limit + settings.STUDY_WS_PREFETCH)
+        for card in cards[:self.request.limit]:
+            self.active[card["id"]] = card
+        self.queue.extend(cards[self.request.limit:])
+
+        return self._frame(
+            "session",
+            session_id=self.session_id,
+            cards=list(self.active.values()),
+            total_due=total_due
+        )
+
+    async def handle(self, message: Optional[str]) -> str:
+        """Answer one client frame; None stands for a binary frame"""
+
+        if message is None:
+            return self._frame("error", message="Frames must be JSON text")
+        try:
+            payload = orjson.loads(message)
+        except orjson.JSONDecodeError:
+            return self._frame("error", message="Invalid JSON")
+        if not isinstance(payload, dict):
+            return self._frame("error", message="Frames must be JSON objects")
+
+        if payload.get("type") == "ping":
+            return self._frame("pong")
+        if payload.get("type") == "review":
+            try:
+                return await self._review(payload)
+            except Exception:
+                logger.exception(f"Study socket review failed for user {self.user_id}")
+                return self._frame("error", message="Review could not be processed")
+        return self._frame("error", message=f"Unknown frame type: {payload.get('type')}")
+
+    async def _review(self, payload: Dict[str, Any]) -> str:
+        try:
+            item = ReviewItem.model_validate({key: value for key, value in payload.items() if key != "type"})
+        except ValidationError as e:
+            return self._frame("error", message=str(e))
+
+        if settings.RATE_LIMIT_ENABLED:
+            try:
+                await rate_limiter.hit("review", f"user:{self.user_id}", REVIEW_LIMIT)
+            except RateLimitException as e:
+                return self._frame("error", message=e.message, retry_after=e.retry_after)
+
+        db = SessionLocal()
+        try:
+            response = await StudyService(db).submit_review_batch(
+                self.user_id, ReviewBatch(items=[item], session_id=self.session_id)
+            )
+        except PairLinguaException as e:
+            return self._frame("error", message=e.message)
+        finally:
+            db.close()
+
+        self.active.pop(item.word_pair_id, None)
+        if len(self.queue) < settings.STUDY_WS_PREFETCH // 2:
+            await self._refill()
+
+        replacement = self.queue.popleft() if self.queue else None
+        if replacement is not None:
+            self.active[replacement["id"]] = replacement
+
+        return self._frame(
+            "result",
+            result=response.results[0].model_dump(),
+            points=response.total_points_earned,
+            achievements_unlocked=response.achievements_unlocked,
+            replacement=replacement
+        )
+
+    async def _refill(self) -> None:
+        cards, _ = await self._fetch(settings.STUDY_WS_PREFETCH - len(self.queue), self._known_ids())
+        self.queue.extend(cards)
+
+    async def _fetch(self, limit: int, exclude_ids: Optional[Set[int]] = None):
+        db = SessionLocal()
+        try:
+            response = await StudyService(db).get_due_cards(
+                self.user_id,
+                self.request.model_copy(update={"limit": max(1, min(limit, 50))}),
+                exclude_ids or ()
+            )
+        finally:
+            db.close()
+
+        self.session_id = response.session_id
+        return [self._card(card) for card in response.cards], response.total_due
+
+    def _known_ids(self) -> Set[int]:
+        return set(self.active) | {card["id"] for card in self.queue}
+
+    @staticmethod
+    def _card(card: StudyCard) -> Dict[str, Any]:
+        return card.model_dump()
+
+    @staticmethod
+    def _frame(frame_type: str, **fields: Any) -> str:
+        return orjson.dumps({"type": frame_type, **fields}).decode()
@@ -1,25 +1,38 @@
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import List, Optional, Dict, Any, Iterable, Set
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, text
 import uuid
 import random
 
+import orjson
+
 from app.models.user import User
-from app.models.word_pair import WordPair
 from app.models.user_card import UserCard
 from app.models.review import Review
 from app.models.session import StudySession
 from app.models.achievement import Achievement, UserAchievement
 from app.services.sm2_service import SM2Service
 from app.services.word_service import WordService
+from app.services.due_forecast_service import DueForecastService, DueLoadBalancer
+from app.services.card_service import CardService
+from app.services.card_state_service import CardState, CardStateService
+from app.services.session_stats_service import SessionStatsService
 from app.schemas.study import (
     StudyCardsRequest, StudyCardsResponse, StudyCard,
     ReviewBatch, ReviewBatchResponse, ReviewResult,
+    SyncReviewItem, ReviewSyncChunk, ReviewSyncResponse,
     SessionReplaceRequest, SessionReplaceResponse
 )
+from app.core.config import settings
 from app.core.redis import redis_service
-from app.core.exceptions import NotFoundException, ValidationException
+from app.core.database import stick_to_primary
+from app.core.http_cache import bump_version, user_progress_key
+from app.core.single_flight import SingleFlight
+from app.core.exceptions import ConflictException, NotFoundException, ValidationException
+
+due_cards_flight = SingleFlight("due_cards")
 
 
 class StudyService:
@@ -27,23 +40,18 @@ class StudyService:
         self.db = db
         self.sm2_service = SM2Service()
         self.word_service = WordService(db)
+        self.due_forecast_service = DueForecastService(db)
+        self.card_service = CardService(db)
+        self.card_state_service = CardStateService(db)
+        self.session_stats_service = SessionStatsService(db)
     
     async def get_due_cards(
         self, 
         user_id: str, 
-        request: StudyCardsRequest
+        request: StudyCardsRequest,
+        exclude_ids: Iterable[int] = ()
     ) -> StudyCardsResponse:
-        """Get cards due for review using spaced repetition"""
-        
-        # Check cache first
-        cache_key = f"due_cards:{user_id}:{request.limit}"
-        cached_data = await redis_service.get(cache_key)
-        
-        if cached_data:
-            # Return cached data if available
-            import json
-            data = json.loads(cached_data)
-            return StudyCardsResponse(**data)
+        """Get cards due for review using spaced repetition, skipping the session's active cards and exclude_ids"""
         
         user = self.db.query(User).filter(User.id == user_id).first()
         if not user:
@@ -53,74 +61,69 @@ class StudyService:
         session = await self._get_or_create_session(user_id)
         
         due_cards = []
-        
-        # 1. Get overdue cards (highest priority)
-        overdue_query = self.db.query(UserCard).join(WordPair).filter(
-            UserCard.user_id == user_id,
-            UserCard.due_date < func.now(),
-            UserCard.is_suspended == False,
-            WordPair.is_active == True,
-            ~UserCard.word_pair_id.in_(session.active_pair_ids or [])
-        ).order_by(UserCard.due_date)
-        
-        if request.cefr_levels:
-            overdue_query = overdue_query.filter(WordPair.cefr_level.in_(request.cefr_levels))
-        
-        overdue_cards = overdue_query.limit(request.limit // 2).all()
-        due_cards.extend(overdue_cards)
+        excluded_ids = list(set(session.active_pair_ids or []) | set(exclude_ids))
+        
+        # 1. Get overdue cards (highest priority) from the packed card state snapshot
+        snapshot = await self.card_state_service.get(user_id)
+        overdue = snapshot.overdue(datetime.utcnow(), set(excluded_ids))
+        overdue_limit = request.limit // 2
+        word_pairs: Dict[int, Dict[str, Any]] = {}
+        while len(due_cards) < overdue_limit:
+            candidates = list(islice(overdue, overdue_limit * 2))
+            if not candidates:
+                break
+            
+            # Inactive words are absent from the catalog lookup
+            candidate_pairs = await self.word_service.get_word_pairs_by_ids(
+                card.word_pair_id for card in candidates
+            )
+            for card in candidates:
+                word_pair = candidate_pairs.get(card.word_pair_id)
+                if word_pair is None:
+                    continue
+                if request.cefr_levels and word_pair["cefr_level"] not in request.cefr_levels:
+                    continue
+                due_cards.append(card)
+                word_pairs[card.word_pair_id] = word_pair
+                if len(due_cards) == overdue_limit:
+                    break
         
         # 2. Get new cards if requested
         remaining_slots = request.limit - len(due_cards)
         if request.include_new and remaining_slots > 0:
-            new_cards_query = self.db.query(WordPair).filter(
-                WordPair.is_active == True,
-                ~WordPair.id.in_(
-                    self.db.query(UserCard.word_pair_id).filter(
-                        UserCard.user_id == user_id
-                    )
-                ),
-                ~WordPair.id.in_(session.active_pair_ids or [])
-            ).order_by(
-                WordPair.frequency_rank.nulls_last(),
-                func.random()
+            new_word_pairs = await self.card_service.select_new_word_pairs(
+                user_id, request.cefr_levels, remaining_slots, excluded_ids
             )
             
-            if request.cefr_levels:
-                new_cards_query = new_cards_query.filter(
-                    WordPair.cefr_level.in_(request.cefr_levels)
-                )
-            
-            new_word_pairs = new_cards_query.limit(remaining_slots).all()
-            
-            # Create UserCard entries for new words
+            # New words are shown without a card row; it is created on the first review
+            now = datetime.utcnow()
             for word_pair in new_word_pairs:
-                user_card = UserCard(
-                    user_id=user_id,
-                    word_pair_id=word_pair.id,
-                    due_date=func.now()  # Available immediately
-                )
-                self.db.add(user_card)
-                due_cards.append(user_card)
+                due_cards.append(self.card_service.new_card(user_id, word_pair.id, now))
         
-        self.db.commit()
+        # Word pair content comes from the catalog cache, not per-card queries
+        word_pairs.update(await self.word_service.get_word_pairs_by_ids(
+            user_card.word_pair_id for user_card in due_cards
+            if user_card.word_pair_id not in word_pairs
+        ))
         
         # Convert to StudyCard format
         study_cards = []
         for user_card in due_cards:
-            word_pair = user_card.word_pair if hasattr(user_card, 'word_pair') else \
-                       self.db.query(WordPair).filter(WordPair.id == user_card.word_pair_id).first()
+            word_pair = word_pairs.get(user_card.word_pair_id)
+            if word_pair is None:
+                continue
             
             # Determine exercise type
             exercise_type = self._determine_exercise_type(user_card, request.exercise_types)
             
             study_card = StudyCard(
-                id=word_pair.id,
-                spanish_word=word_pair.spanish_word,
-                russian_word=word_pair.russian_word if exercise_type != "typing" else None,
-                audio_url=word_pair.audio_url,
-                cefr_level=word_pair.cefr_level,
+                id=word_pair["id"],
+                spanish_word=word_pair["spanish_word"],
+                russian_word=word_pair["russian_word"] if exercise_type != "typing" else None,
+                audio_url=word_pair["audio_url"],
+                cefr_level=word_pair["cefr_level"],
                 type=exercise_type,
-                distractors=self._generate_distractors(word_pair) if exercise_type == "multiple_choice" else [],
+                distractors=await self._generate_distractors(word_pair) if exercise_type == "multiple_choice" else [],
                 ease_factor=float(user_card.ease_factor),
                 due_date=user_card.due_date,
                 is_new=user_card.total_reviews == 0,
@@ -134,28 +137,41 @@ class StudyService:
         session.updated_at = func.now()
         self.db.commit()
         
-        # Count total due cards
-        total_due = self.db.query(UserCard).filter(
-            UserCard.user_id == user_id,
-            UserCard.due_date <= func.now(),
-            UserCard.is_suspended == False
-        ).count()
+        # Count cards due by the end of the user's local day
+        total_due = (await self.due_forecast_service.count_due(user_id, user.timezone)).today
         
-        response = StudyCardsResponse(
+        return StudyCardsResponse(
             cards=study_cards,
             total_due=total_due,
             session_id=session.id,
             estimated_time_minutes=len(study_cards) * 2  # 2 minutes per card estimate
         )
+    
+    async def get_due_cards_payload(
+        self,
+        user_id: str,
+        request: StudyCardsRequest
+    ) -> bytes:
+        """Get due cards as pre-serialized JSON, returned as-is on a cache hit"""
         
-        # Cache response for 60 seconds
-        await redis_service.set(
-            cache_key, 
-            response.json(), 
-            ex=60
-        )
+        cache_key = self._due_cards_cache_key(user_id, request)
+        cached_payload = await redis_service.get_raw(cache_key)
+        if cached_payload is not None:
+            return cached_payload
         
-        return response
+        async def build_payload() -> bytes:
+            response = await self.get_due_cards(user_id, request)
+            payload = orjson.dumps(response.model_dump())
+            
+            # Cache response for 60 seconds
+            await redis_service.set_raw(cache_key, payload, ex=60)
+            
+            return payload
+        
+        # Duplicate requests (double-fired fetches, several tabs) share one build
+        return await due_cards_flight.do(
+            cache_key, build_payload, lambda: redis_service.get_raw(cache_key)
+        )
     
     async def submit_review_batch(
         self,
@@ -164,32 +180,107 @@ class StudyService:
     ) -> ReviewBatchResponse:
         """Process a batch of reviews and update SM-2 intervals"""
         
+        return await self._apply_reviews(user_id, review_batch.items, review_batch.session_id)
+    
+    async def sync_reviews(
+        self,
+        user_id: str,
+        chunk: ReviewSyncChunk
+    ) -> ReviewSyncResponse:
+        """Apply a chunk of an offline review log in client order, skipping reviews synced before"""
+        
+        # Serializes syncs of one user, so a resent chunk cannot race the original.
+        # Not waited for: the original may be in flight on this very event loop
+        locked = self.db.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"),
+            {"key": f"review_sync:{user_id}"}
+        ).scalar()
+        if not locked:
+            raise ConflictException("Another sync of this review log is in progress, retry shortly")
+        
+        # Client timestamps are kept as sent, so a resent review matches its log row
+        items = sorted(
+            (
+                item.model_copy(update={"reviewed_at": self._naive_utc(item.reviewed_at)})
+                for item in chunk.items
+            ),
+            key=lambda item: item.reviewed_at
+        )
+        latest = datetime.utcnow() + timedelta(seconds=settings.SYNC_MAX_CLOCK_SKEW_SECONDS)
+        if items[-1].reviewed_at > latest:
+            raise ValidationException("Reviews are dated in the future, check the device clock")
+        
+        synced_ids = self._synced_review_ids(user_id, items)
+        fresh_items = []
+        for item in items:
+            if item.client_review_id not in synced_ids:
+                synced_ids.add(item.client_review_id)
+                fresh_items.append(item)
+        
+        if not fresh_items:
+            self.db.commit()
+            return ReviewSyncResponse(
+                results=[],
+                total_points_earned=0,
+                accuracy=0,
+                streak_updated=False,
+                applied=0,
+                duplicates=len(items)
+            )
+        
+        response = await self._apply_reviews(user_id, fresh_items, chunk.session_id)
+        return ReviewSyncResponse(
+            **response.model_dump(),
+            applied=len(fresh_items),
+            duplicates=len(items) - len(fresh_items),
+            synced_until=fresh_items[-1].reviewed_at
+        )
+    
+    async def _apply_reviews(
+        self,
+        user_id: str,
+        items: List,
+        session_id: Optional[uuid.UUID] = None
+    ) -> ReviewBatchResponse:
+        """
+        Schedule the reviewed cards and log the reviews in one transaction.
+        
+        Items are applied in the given order; sync items carry their own
+        reviewed_at and client_review_id, other reviews happen now.
+        """
+        
         results = []
         total_points = 0
         correct_count = 0
-        
-        for review_item in review_batch.items:
-            # Get user card
-            user_card = self.db.query(UserCard).filter(
-                UserCard.user_id == user_id,
-                UserCard.word_pair_id == review_item.word_pair_id
-            ).first()
-            
-            if not user_card:
-                # Create new user card if it doesn't exist
-                user_card = UserCard(
-                    user_id=user_id,
-                    word_pair_id=review_item.word_pair_id
-                )
-                self.db.add(user_card)
-                self.db.flush()  # Get ID
+        now = datetime.utcnow()
+        
+        # Forecast of the user's upcoming due days, used to flatten review peaks
+        timezone_name = self.db.query(User.timezone).filter(User.id == user_id).scalar()
+        forecast = await self.due_forecast_service.get_forecast(user_id, timezone_name)
+        load_balancer = DueLoadBalancer(forecast) if settings.DUE_LOAD_BALANCING else None
+        
+        # Cards of first reviews are created in one conflict-safe insert
+        word_pair_ids = {item.word_pair_id for item in items}
+        user_cards = self._load_cards(user_id, word_pair_ids)
+        missing_ids = word_pair_ids - user_cards.keys()
+        if missing_ids:
+            self.card_service.ensure_cards(user_id, missing_ids)
+            user_cards.update(self._load_cards(user_id, missing_ids))
+        
+        for review_item in items:
+            user_card = user_cards[review_item.word_pair_id]
+            reviewed_at = getattr(review_item, "reviewed_at", None) or now
             
             # Store previous state for review record
             prev_ease_factor = float(user_card.ease_factor)
             prev_interval = user_card.interval_days
+            prev_due_date = user_card.due_date
             
-            # Update SM-2 parameters
-            user_card.schedule_next_review(review_item.quality)
+            # Update SM-2 parameters; an offline review older than the card's
+            # latest one is logged and counted but does not move the schedule back
+            if user_card.last_reviewed_at is None or reviewed_at >= user_card.last_reviewed_at:
+                user_card.schedule_next_review(review_item.quality, now=reviewed_at, load_balancer=load_balancer)
+                forecast.move(prev_due_date, user_card.due_date)
             
             # Update statistics
             user_card.total_reviews += 1
@@ -216,11 +307,13 @@ class StudyService:
                 quality=review_item.quality,
                 response_time_ms=review_item.response_time_ms,
                 source=review_item.source,
-                session_id=review_batch.session_id,
+                session_id=session_id,
+                client_review_id=getattr(review_item, "client_review_id", None),
                 ease_factor_before=int(prev_ease_factor * 100),
                 ease_factor_after=int(user_card.ease_factor * 100),
                 interval_before=prev_interval,
-                interval_after=user_card.interval_days
+                interval_after=user_card.interval_days,
+                reviewed_at=reviewed_at
             )
             self.db.add(review_record)
             
@@ -241,14 +334,34 @@ class StudyService:
         streak_updated = await self._update_user_streak(user_id, correct_count > 0)
         
         # Check for achievements
-        achievements = await self._check_achievements(user_id, review_batch.items)
+        achievements = await self._check_achievements(user_id, items)
         
-        self.db.commit()
+        # Read before the commit expires the cards
+        card_states = [CardState.of(user_card) for user_card in user_cards.values()]
         
-        # Clear cache
-        await redis_service.delete(f"due_cards:{user_id}*")
+        self.db.commit()
+        await self.due_forecast_service.save(user_id, forecast)
+        await stick_to_primary(user_id)
+        
+        # Clear cache and invalidate ETags of progress-dependent responses
+        await redis_service.delete_pattern(f"due_cards:{user_id}:*")
+        version = await bump_version(user_progress_key(user_id))
+        await self.card_state_service.record(user_id, card_states, version)
+        
+        if session_id is not None and items:
+            reviewed_at = [getattr(item, "reviewed_at", None) or now for item in items]
+            await self.session_stats_service.record(
+                user_id,
+                session_id,
+                cards=len(items),
+                correct=correct_count,
+                points=total_points,
+                response_times=[item.response_time_ms for item in items if item.response_time_ms is not None],
+                first_review=min(reviewed_at),
+                last_review=max(reviewed_at)
+            )
         
-        accuracy = (correct_count / len(review_batch.items)) * 100 if review_batch.items else 0
+        accuracy = (correct_count / len(items)) * 100 if items else 0
         
         return ReviewBatchResponse(
             results=results,
@@ -303,6 +416,43 @@ class StudyService:
     
     # Helper methods
     
+    @staticmethod
+    def _due_cards_cache_key(user_id: str, request: StudyCardsRequest) -> str:
+        """Cache key covering every request parameter that changes the response"""
+        
+        exercise_types = ",".join(sorted(request.exercise_types or []))
+        cefr_levels = ",".join(sorted(request.cefr_levels or []))
+        return (
+            f"due_cards:{user_id}:{request.limit}:{int(request.include_new)}:"
+            f"{exercise_types}:{cefr_levels}"
+        )
+    
+    def _synced_review_ids(self, user_id: str, items: List[SyncReviewItem]) -> Set[uuid.UUID]:
+        """Client review ids of the items that are already in the review log"""
+        
+        # The reviewed_at range restricts the lookup to the partitions the chunk covers
+        rows = self.db.query(Review.client_review_id).filter(
+            Review.user_id == user_id,
+            Review.client_review_id.in_([item.client_review_id for item in items]),
+            Review.reviewed_at.between(items[0].reviewed_at, items[-1].reviewed_at)
+        ).all()
+        return {row.client_review_id for row in rows}
+    
+    @staticmethod
+    def _naive_utc(moment: datetime) -> datetime:
+        if moment.tzinfo is None:
+            return moment
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    def _load_cards(self, user_id: str, word_pair_ids: Iterable[int]) -> Dict[int, UserCard]:
+        """The user's cards for the given words, keyed by word pair id"""
+        
+        cards = self.db.query(UserCard).filter(
+            UserCard.user_id == user_id,
+            UserCard.word_pair_id.in_(list(word_pair_ids))
+        ).all()
+        return {card.word_pair_id: card for card in cards}
+    
     async def _get_or_create_session(self, user_id: str) -> StudySession:
         """Get existing session or create new one"""
         
@@ -322,6 +472,7 @@ class StudyService:
             )
             self.db.add(session)
             self.db.flush()
+            await self.session_stats_service.start(user_id, session.id)
         
         return session
     
@@ -345,36 +496,39 @@ class StudyService:
         else:
             return "matching"  # Easier exercise for struggling cards
     
-    def _generate_distractors(self, word_pair: WordPair) -> List[str]:
+    async def _generate_distractors(self, word_pair: Dict[str, Any]) -> List[str]:
         """Generate distractor options for multiple choice"""
         
-        # Get similar words (same CEFR level or similar frequency)
-        similar_words = self.db.query(WordPair).filter(
-            WordPair.id != word_pair.id,
-            WordPair.is_active == True,
-            or_(
-                WordPair.cefr_level == word_pair.cefr_level,
-                WordPair.frequency_rank.between(
-                    (word_pair.frequency_rank or 1000) - 100,
-                    (word_pair.frequency_rank or 1000) + 100
-                )
-            )
-        ).order_by(func.random()).limit(3).all()
+        # Prefer words of the same CEFR level, fall back to the whole catalog
+        distractors = []
+        if word_pair["cefr_level"]:
+            level_pairs = await self.word_service.get_level_pairs(word_pair["cefr_level"])
+            distractors = self._sample_translations(level_pairs, word_pair, 3)
         
-        distractors = [w.russian_word for w in similar_words]
-        
-        # If not enough similar words, get random ones
         if len(distractors) < 3:
-            random_words = self.db.query(WordPair).filter(
-                WordPair.id != word_pair.id,
-                WordPair.is_active == True
-            ).order_by(func.random()).limit(3 - len(distractors)).all()
-            
-            distractors.extend([w.russian_word for w in random_words])
+            all_pairs = await self.word_service.get_level_pairs(None)
+            for translation in self._sample_translations(all_pairs, word_pair, 3):
+                if len(distractors) < 3 and translation not in distractors:
+                    distractors.append(translation)
         
         return distractors[:3]
     
-    def _calculate_points(self, quality: int, ease_factor: float) -> int:
+    @staticmethod
+    def _sample_translations(
+        candidates: List[List[Any]],
+        word_pair: Dict[str, Any],
+        count: int
+    ) -> List[str]:
+        """Pick up to count random translations other than the word pair's own"""
+        
+        sample = random.sample(candidates, min(len(candidates), count + 1))
+        return [
+            russian_word for pair_id, russian_word, _ in sample
+            if pair_id != word_pair["id"] and russian_word != word_pair["russian_word"]
+        ][:count]
+    
+    @staticmethod
+    def _calculate_points(quality: int, ease_factor: float) -> int:
         """Calculate points earned for a review"""
         
         base_points = [0, 1, 2, 5, 10, 15][quality]  # Points by quality
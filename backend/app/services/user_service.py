@@ -9,14 +9,19 @@ from app.models.review import Review
 from app.schemas.user import (
     UserUpdate, UserStats, UserStatsDetailed,
 )
+from app.core.database import replica_reads
 from app.core.exceptions import NotFoundException, ValidationException
 from app.core.security import create_password_hash, verify_password
 from app.schemas.word import WordPair
+from app.services.card_state_service import LEARNING, SUSPENDED, CardStateService
+from app.services.due_forecast_service import DueForecastService
 
 
 class UserService:
     def __init__(self, db: Session):
         self.db = db
+        self.due_forecast_service = DueForecastService(db)
+        self.card_state_service = CardStateService(db)
     
     def get_user_profile(self, user_id: str) -> User:
         """Get user profile with all related data"""
@@ -32,7 +37,7 @@ class UserService:
         
         return user
     
-    def update_user_profile(self, user_id: str, update_data: UserUpdate) -> User:
+    async def update_user_profile(self, user_id: str, update_data: UserUpdate) -> User:
         """Update user profile"""
         
         user = self.get_user_profile(user_id)
@@ -57,38 +62,30 @@ class UserService:
         self.db.commit()
         self.db.refresh(user)
         
+        # Due buckets are keyed by local day
+        if 'timezone' in update_dict:
+            await self.due_forecast_service.invalidate(user_id)
+        
         return user
     
+    @replica_reads
     async def get_user_stats(self, user_id: str) -> UserStats:
         """Get user's learning statistics"""
         
         user = self.get_user_profile(user_id)
         
-        # Total cards created for user
-        total_cards = self.db.query(UserCard).filter(
-            UserCard.user_id == user_id
-        ).count()
+        # Card counts come from the packed card state snapshot
+        snapshot = await self.card_state_service.get(user_id)
+        total_cards = len(snapshot)
         
-        # Cards due for review
-        cards_due = self.db.query(UserCard).filter(
-            UserCard.user_id == user_id,
-            UserCard.due_date <= func.now(),
-            UserCard.is_suspended == False
-        ).count()
+        # Cards due for review by the end of the user's local day
+        cards_due = (await self.due_forecast_service.count_due(user_id, user.timezone)).today
         
         # Cards considered "learned" (reviewed 3+ times with good accuracy)
-        cards_learned = self.db.query(UserCard).filter(
-            UserCard.user_id == user_id,
-            UserCard.total_reviews >= 3,
-            UserCard.accuracy >= 70.0
-        ).count()
+        cards_learned = snapshot.learned_count(min_reviews=3, min_accuracy=70.0)
         
         # Overall accuracy
-        accuracy_result = self.db.query(
-            func.avg(UserCard.accuracy)
-        ).filter(UserCard.user_id == user_id).scalar()
-        
-        accuracy = float(accuracy_result or 0.0)
+        accuracy = snapshot.average_accuracy()
         
         # Current streak (simplified - days with study activity)
         current_streak = await self._calculate_current_streak(user_id)
@@ -133,6 +130,7 @@ class UserService:
             weekly_stats=weekly_stats
         )
     
+    @replica_reads
     async def get_user_detailed_stats(
         self, 
         user_id: str, 
@@ -187,25 +185,13 @@ class UserService:
             cards_by_level[level or "Unknown"] = count
         
         # Cards by status
-        learning_cards = self.db.query(UserCard).filter(
-            UserCard.user_id == user_id,
-            UserCard.is_learning == True
-        ).count()
-        
-        graduated_cards = self.db.query(UserCard).filter(
-            UserCard.user_id == user_id,
-            UserCard.is_learning == False
-        ).count()
-        
-        suspended_cards = self.db.query(UserCard).filter(
-            UserCard.user_id == user_id,
-            UserCard.is_suspended == True
-        ).count()
+        snapshot = await self.card_state_service.get(user_id)
+        learning_cards = snapshot.flag_count(LEARNING)
         
         cards_by_status = {
             "learning": learning_cards,
-            "graduated": graduated_cards,
-            "suspended": suspended_cards
+            "graduated": len(snapshot) - learning_cards,
+            "suspended": snapshot.flag_count(SUSPENDED)
         }
         
         # Performance metrics
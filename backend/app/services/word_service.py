@@ -1,21 +1,27 @@
-from typing import List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_
 
 from app.models.word_pair import WordPair
 from app.models.user_card import UserCard
 from app.schemas.word import (
+    WordPair as WordPairSchema,
     WordPairCreate, WordPairUpdate, WordPairSearch, 
     WordPairBatchCreate, WordPairWithUserProgress
 )
+from app.core.cache import catalog_cache
+from app.core.database import replica_reads
 from app.core.exceptions import NotFoundException, ConflictException
 
+CEFR_LEVELS = ("A1", "A2", "B1", "B2", "C1", "C2")
+
 
 class WordService:
     def __init__(self, db: Session):
         self.db = db
     
-    def get_word_pairs(
+    @replica_reads
+    async def get_word_pairs(
         self, 
         search: WordPairSearch,
         user_id: Optional[str] = None
@@ -135,7 +141,56 @@ class WordService:
         
         return word_pair
     
-    def create_word_pair(self, word_data: WordPairCreate) -> WordPair:
+    async def get_word_pair_cached(self, word_pair_id: int) -> Dict[str, Any]:
+        """Get single word pair snapshot, served from the catalog cache"""
+        
+        return await catalog_cache.get_or_load(
+            f"word_pair:{word_pair_id}",
+            lambda: self._snapshot(self.get_word_pair(word_pair_id))
+        )
+    
+    async def get_word_pairs_by_ids(self, word_pair_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Get active word pair snapshots by ID, loading cache misses in one query"""
+        
+        word_pair_ids = list(dict.fromkeys(word_pair_ids))
+        cached = await catalog_cache.get_many(f"word_pair:{pair_id}" for pair_id in word_pair_ids)
+        snapshots = {snapshot["id"]: snapshot for snapshot in cached.values()}
+        
+        missing_ids = [pair_id for pair_id in word_pair_ids if pair_id not in snapshots]
+        if missing_ids:
+            word_pairs = self.db.query(WordPair).filter(
+                WordPair.id.in_(missing_ids),
+                WordPair.is_active == True
+            ).all()
+            
+            loaded = {word_pair.id: self._snapshot(word_pair) for word_pair in word_pairs}
+            await catalog_cache.set_many({
+                f"word_pair:{pair_id}": snapshot for pair_id, snapshot in loaded.items()
+            })
+            snapshots.update(loaded)
+        
+        return snapshots
+    
+    async def get_level_pairs(self, cefr_level: Optional[str] = None) -> List[List[Any]]:
+        """
+        Get compact [id, russian_word, frequency_rank] rows of active pairs
+        for a CEFR level (or the whole catalog), ordered by frequency rank.
+        """
+        
+        def load() -> List[List[Any]]:
+            query = self.db.query(
+                WordPair.id, WordPair.russian_word, WordPair.frequency_rank
+            ).filter(WordPair.is_active == True)
+            
+            if cefr_level:
+                query = query.filter(WordPair.cefr_level == cefr_level)
+            
+            rows = query.order_by(WordPair.frequency_rank.nulls_last(), WordPair.id).all()
+            return [[row.id, row.russian_word, row.frequency_rank] for row in rows]
+        
+        return await catalog_cache.get_or_load(f"cefr_pairs:{cefr_level or 'all'}", load)
+    
+    async def create_word_pair(self, word_data: WordPairCreate) -> WordPair:
         """Create a new word pair"""
         
         # Check for duplicates
@@ -154,9 +209,11 @@ class WordService:
         self.db.commit()
         self.db.refresh(word_pair)
         
+        await self._invalidate_catalog()
+        
         return word_pair
     
-    def create_word_pairs_batch(self, batch_data: WordPairBatchCreate) -> List[WordPair]:
+    async def create_word_pairs_batch(self, batch_data: WordPairBatchCreate) -> List[WordPair]:
         """Create multiple word pairs in batch"""
         
         created_pairs = []
@@ -175,9 +232,11 @@ class WordService:
         for pair in created_pairs:
             self.db.refresh(pair)
         
+        await self._invalidate_catalog()
+        
         return created_pairs
     
-    def update_word_pair(self, word_pair_id: int, update_data: WordPairUpdate) -> WordPair:
+    async def update_word_pair(self, word_pair_id: int, update_data: WordPairUpdate) -> WordPair:
         """Update existing word pair"""
         
         word_pair = self.get_word_pair(word_pair_id)
@@ -189,15 +248,19 @@ class WordService:
         self.db.commit()
         self.db.refresh(word_pair)
         
+        await self._invalidate_catalog(word_pair_id)
+        
         return word_pair
     
-    def delete_word_pair(self, word_pair_id: int) -> bool:
+    async def delete_word_pair(self, word_pair_id: int) -> bool:
         """Soft delete word pair"""
         
         word_pair = self.get_word_pair(word_pair_id)
         word_pair.is_active = False
         
         self.db.commit()
+        
+        await self._invalidate_catalog(word_pair_id)
         return True
     
     def get_random_word_pairs(
@@ -220,3 +283,18 @@ class WordService:
         query = query.order_by(func.random())
         
         return query.limit(limit).all()
+
+    
+    # Helper methods
+    
+    @staticmethod
+    def _snapshot(word_pair: WordPair) -> Dict[str, Any]:
+        """Serialize word pair into a JSON-safe dict for the catalog cache"""
+        return WordPairSchema.model_validate(word_pair).model_dump(mode="json")
+    
+    async def _invalidate_catalog(self, *word_pair_ids: int) -> None:
+        """Drop cached pairs and level lists on every worker"""
+        
+        keys = [f"word_pair:{pair_id}" for pair_id in word_pair_ids]
+        keys += [f"cefr_pairs:{level}" for level in CEFR_LEVELS + ("all",)]
+        await catalog_cache.invalidate(*keys)
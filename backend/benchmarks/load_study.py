@@ -0,0 +1,231 @@
+"""
+Load test for the study flow against a running backend.
+
+Each virtual user registers (or logs in as a seeded bench user), then loops
+over GET /study/cards/due -> POST /study/cards/review -> POST /study/session/replace.
+Reports latency percentiles per endpoint, SQL queries per request from the
+backend's Server-Timing header and, when --database-url is given, the
+database-wide statement count from pg_stat_statements.
+
+    python -m benchmarks.load_study --base-url http://localhost:8000/api/v1 \\
+        --users 200 --concurrency 50 --iterations 10 --database-url postgresql://...
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.seed import BENCH_PASSWORD, user_email
+
+PERCENTILES = (50, 90, 95, 99)
+SERVER_TIMING_QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+class Recorder:
+    """Collects latencies and status codes per endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.queries: Dict[str, List[int]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, name: str, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+
+        self.latencies[name].append((time.perf_counter() - started) * 1000)
+        self.statuses[name][response.status_code] += 1
+
+        match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+        if match:
+            self.queries[name].append(int(match.group(1)))
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    @property
+    def total_requests(self) -> int:
+        return sum(len(values) for values in self.latencies.values())
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        report = {}
+        for name, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            row = {"count": len(values), "errors": self.errors[name]}
+            for percentile in PERCENTILES:
+                row[f"p{percentile}"] = _percentile(values, percentile)
+            row["max"] = values[-1] if values else 0.0
+            queries = self.queries[name]
+            row["queries"] = sum(queries) / len(queries) if queries else None
+            report[name] = row
+        return report
+
+
+def _percentile(sorted_values: List[float], percentile: int) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(percentile / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+async def run_virtual_user(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    index: int,
+    args: argparse.Namespace
+) -> None:
+    if args.seeded_users:
+        email = user_email(index % args.seeded_users + 1)
+    else:
+        email = f"load_{uuid.uuid4().hex[:12]}@example.com"
+        await recorder.call("register", client.post(
+            "/auth/register",
+            json={"email": email, "password": BENCH_PASSWORD}
+        ))
+
+    login = await recorder.call("login", client.post(
+        "/auth/login",
+        json={"email": email, "password": BENCH_PASSWORD}
+    ))
+    if login is None or login.status_code != 200:
+        return
+
+    for _ in range(args.iterations):
+        due = await recorder.call("cards_due", client.get(
+            "/study/cards/due", params={"limit": args.cards}
+        ))
+        if due is None or due.status_code != 200:
+            continue
+
+        payload = due.json()
+        cards = payload.get("cards", [])
+        if not cards:
+            continue
+
+        await recorder.call("cards_review", client.post("/study/cards/review", json={
+            "session_id": payload["session_id"],
+            "items": [
+                {
+                    "word_pair_id": card["id"],
+                    "quality": random.choice([2, 3, 4, 4, 5]),
+                    "response_time_ms": random.randint(800, 6000),
+                    "source": card.get("type", "matching"),
+                }
+                for card in cards
+            ],
+        }))
+
+        await recorder.call("session_replace", client.post("/study/session/replace", json={
+            "session_id": payload["session_id"],
+            "completed_word_pair_id": cards[0]["id"],
+        }))
+
+
+def read_statement_count(database_url: Optional[str]) -> Optional[int]:
+    """Total statements executed in the current database according to pg_stat_statements"""
+
+    if not database_url:
+        return None
+
+    import psycopg2
+
+    connection = psycopg2.connect(database_url.replace("postgresql+psycopg2://", "postgresql://"))
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT coalesce(sum(calls), 0) FROM pg_stat_statements "
+                "WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())"
+            )
+            return int(cursor.fetchone()[0])
+    finally:
+        connection.close()
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async def worker(index: int) -> None:
+        async with semaphore:
+            # One client per virtual user keeps its session cookies separate
+            async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+                await run_virtual_user(client, recorder, index, args)
+
+    statements_before = read_statement_count(args.database_url)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(args.users)))
+    elapsed = time.perf_counter() - started
+    statements_after = read_statement_count(args.database_url)
+
+    result = {
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "iterations": args.iterations,
+        "elapsed_seconds": elapsed,
+        "requests": recorder.total_requests,
+        "throughput_rps": recorder.total_requests / elapsed if elapsed else 0.0,
+        "endpoints": recorder.summary(),
+    }
+    if statements_before is not None and recorder.total_requests:
+        result["queries_per_request"] = (statements_after - statements_before) / recorder.total_requests
+
+    return result
+
+
+def print_report(result: Dict) -> None:
+    header = f"{'endpoint':<18}{'count':>8}{'errors':>8}" + "".join(
+        f"{'p' + str(p):>10}" for p in PERCENTILES
+    ) + f"{'max':>10}{'queries':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, row in result["endpoints"].items():
+        print(
+            f"{name:<18}{row['count']:>8}{row['errors']:>8}"
+            + "".join(f"{row['p' + str(p)]:>10.1f}" for p in PERCENTILES)
+            + f"{row['max']:>10.1f}"
+            + (f"{row['queries']:>10.1f}" if row["queries"] is not None else f"{'-':>10}")
+        )
+    print()
+    print(f"requests: {result['requests']} in {result['elapsed_seconds']:.1f}s "
+          f"({result['throughput_rps']:.1f} req/s), latencies in ms")
+    if "queries_per_request" in result:
+        print(f"queries per request (pg_stat_statements): {result['queries_per_request']:.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the PairLingua study flow")
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--users", type=int, default=50, help="Virtual users in total")
+    parser.add_argument("--concurrency", type=int, default=10, help="Virtual users running at once")
+    parser.add_argument("--iterations", type=int, default=5, help="Study loops per virtual user")
+    parser.add_argument("--cards", type=int, default=10, help="Cards requested per /cards/due call")
+    parser.add_argument("--seeded-users", type=int, default=0,
+                        help="Log in as bench_user_1..N from benchmarks.seed instead of registering")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--database-url", help="Read pg_stat_statements to report queries per request")
+    parser.add_argument("--output", help="Write the JSON result to this file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Query-plan regression check for the hot user_cards queries.
+
+EXPLAINs the statements the services actually run, built by the same
+query functions and compiled for PostgreSQL, for the seeded bench user
+with the most cards. Fails if the planner stops using the expected index
+(or the expected scan type on it), so a change to the ORM query that
+breaks its index shows up here. Run it after
+`make bench-seed ... --cards-per-user N`:
+
+    python -m benchmarks.plans --database-url postgresql://...
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Select
+from sqlalchemy.dialects import postgresql
+
+DUE_QUEUE_INDEX = "ix_user_cards_due_queue"
+USER_WORD_INDEX = "ix_user_cards_user_word"
+
+
+def plan_checks() -> List[Tuple[str, Callable[[str], Select], str, Tuple[str, ...]]]:
+    """(name, statement for a user id, expected index, node types accepted on it)"""
+
+    from app.core.config import settings
+    from app.services.card_state_service import card_state_query
+    from app.services.due_forecast_service import forecast_query, user_timezone
+
+    return [
+        (
+            "card state snapshot rebuild (CardStateService._build)",
+            card_state_query,
+            USER_WORD_INDEX,
+            ("Index Scan", "Bitmap Index Scan"),
+        ),
+        (
+            "due forecast rebuild (DueForecastService._build_forecast)",
+            lambda user_id: forecast_query(
+                user_id,
+                user_timezone(None),
+                datetime.utcnow() + timedelta(days=settings.DUE_FORECAST_DAYS + 1)
+            ),
+            DUE_QUEUE_INDEX,
+            ("Index Only Scan",),
+        ),
+    ]
+
+
+def walk(plan: Dict) -> Iterator[Dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+def find_bench_user(cursor) -> Optional[str]:
+    cursor.execute("""
+        SELECT user_cards.user_id::text
+        FROM user_cards JOIN users ON users.id = user_cards.user_id
+        WHERE users.email LIKE 'bench_user_%%@example.com'
+        GROUP BY user_cards.user_id
+        ORDER BY count(*) DESC
+        LIMIT 1
+    """)
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def check_plans(database_url: str, verbose: bool = False) -> List[str]:
+    """Return a description of every check whose plan no longer uses its index"""
+
+    import psycopg2
+
+    connection = psycopg2.connect(database_url.replace("postgresql+psycopg2://", "postgresql://"))
+    # VACUUM cannot run inside a transaction block
+    connection.autocommit = True
+    failures = []
+    try:
+        with connection.cursor() as cursor:
+            user_id = find_bench_user(cursor)
+            if user_id is None:
+                return ["no bench user with cards; run benchmarks.seed with --cards-per-user first"]
+
+            # Right after seeding the visibility map is empty, and without it the
+            # planner has no reason to prefer the index-only scan of the forecast
+            cursor.execute("VACUUM ANALYZE user_cards")
+            for name, build, index, accepted in plan_checks():
+                compiled = build(user_id).compile(dialect=postgresql.psycopg2.dialect())
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+                plan = cursor.fetchone()[0][0]["Plan"]
+                if verbose:
+                    print(json.dumps(plan, indent=2))
+
+                nodes = [node["Node Type"] for node in walk(plan) if node.get("Index Name") == index]
+                if not any(node in accepted for node in nodes):
+                    used = sorted({node["Node Type"] for node in walk(plan)})
+                    failures.append(f"{name}: expected {' or '.join(accepted)} on {index}, got {used}")
+                else:
+                    print(f"ok   {name}: {', '.join(nodes)} on {index}")
+    finally:
+        connection.close()
+
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check query plans of the hot user_cards queries")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--verbose", action="store_true", help="Print full JSON plans")
+    args = parser.parse_args()
+
+    failures = check_plans(args.database_url, args.verbose)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Generate benchmark seed data in the style of scripts/seed-data.sql.
+
+Emits set-based SQL (generate_series) so millions of rows load in seconds:
+
+    python -m benchmarks.seed --users 1000 --pairs 5000 > /tmp/bench-seed.sql
+    python -m benchmarks.seed --users 1000 --pairs 5000 --apply --database-url postgresql://...
+
+Seeded users log in as bench_user_<n>@example.com with BENCH_PASSWORD.
+"""
+import argparse
+import sys
+
+import bcrypt
+
+BENCH_PASSWORD = "BenchPass123"
+BENCH_TAG = "bench"
+
+
+def user_email(n: int) -> str:
+    return f"bench_user_{n}@example.com"
+
+
+def generate_sql(
+    users: int,
+    pairs: int,
+    cards_per_user: int = 0,
+    reviews_per_card: int = 0,
+    reset: bool = False
+) -> str:
+    """Build the seed script for the requested data volume"""
+
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt()).decode()
+
+    statements = [
+        "-- PairLingua benchmark seed data",
+        "CREATE EXTENSION IF NOT EXISTS pg_stat_statements;",
+    ]
+
+    if reset:
+        statements += [
+            "DELETE FROM users WHERE email LIKE 'bench_user_%@example.com';",
+            f"DELETE FROM word_pairs WHERE '{BENCH_TAG}' = ANY(tags);",
+        ]
+
+    statements.append(f"""
+-- Word pairs spread across CEFR levels with unique frequency ranks
+INSERT INTO word_pairs (spanish_word, russian_word, cefr_level, frequency_rank, tags, examples)
+SELECT
+    'palabra_' || g,
+    'слово_' || g,
+    (ARRAY['A1', 'A2', 'B1', 'B2', 'C1', 'C2'])[1 + (g % 6)],
+    100000 + g,
+    ARRAY['{BENCH_TAG}'],
+    '[]'::jsonb
+FROM generate_series(1, {pairs}) AS g;""")
+
+    statements.append(f"""
+-- Users sharing one precomputed bcrypt hash
+INSERT INTO users (email, password_hash, nickname, is_active, is_verified)
+SELECT 'bench_user_' || g || '@example.com', '{password_hash}', 'bench_user_' || g, true, true
+FROM generate_series(1, {users}) AS g
+ON CONFLICT (email) DO NOTHING;""")
+
+    if cards_per_user > 0:
+        statements.append(f"""
+-- Card history: due dates spread over +-30 days around now
+INSERT INTO user_cards (
+    user_id, word_pair_id, ease_factor, repetition_count, interval_days,
+    due_date, last_reviewed_at, total_reviews, correct_reviews, accuracy
+)
+SELECT
+    u.id,
+    wp.id,
+    1.3 + random() * 1.7,
+    (random() * 6)::int,
+    (random() * 60)::int,
+    now() + (random() * 60 - 30) * interval '1 day',
+    now() - random() * interval '30 days',
+    {max(reviews_per_card, 1)},
+    {max(reviews_per_card, 1)},
+    1.0
+FROM users u
+CROSS JOIN LATERAL (
+    SELECT id FROM word_pairs
+    WHERE '{BENCH_TAG}' = ANY(tags)
+    ORDER BY random()
+    LIMIT {cards_per_user}
+) AS wp
+WHERE u.email LIKE 'bench_user_%@example.com'
+ON CONFLICT (user_id, word_pair_id) DO NOTHING;""")
+
+    if cards_per_user > 0 and reviews_per_card > 0:
+        statements.append(f"""
+-- Review log: reviews_per_card rows per card over the last 90 days
+INSERT INTO reviews (
+    user_id, word_pair_id, user_card_id, quality, response_time_ms, source,
+    ease_factor_before, ease_factor_after, interval_before, interval_after, reviewed_at
+)
+SELECT
+    uc.user_id,
+    uc.word_pair_id,
+    uc.id,
+    (random() * 5)::int,
+    500 + (random() * 5000)::int,
+    'bench',
+    250, 250, 1, 1,
+    now() - random() * interval '90 days'
+FROM user_cards uc
+JOIN users u ON u.id = uc.user_id
+CROSS JOIN generate_series(1, {reviews_per_card})
+WHERE u.email LIKE 'bench_user_%@example.com';""")
+
+    statements.append("ANALYZE;")
+    return "\n".join(statements) + "\n"
+
+
+def apply_sql(database_url: str, sql: str) -> None:
+    import psycopg2
+
+    connection = psycopg2.connect(database_url.replace("postgresql+psycopg2://", "postgresql://"))
+    try:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+    finally:
+        connection.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed PairLingua with benchmark data")
+    parser.add_argument("--users", type=int, default=100, help="Number of seeded users")
+    parser.add_argument("--pairs", type=int, default=2000, help="Number of word pairs")
+    parser.add_argument("--cards-per-user", type=int, default=0, help="Existing cards per user")
+    parser.add_argument("--reviews-per-card", type=int, default=0, help="Review log rows per card")
+    parser.add_argument("--reset", action="store_true", help="Remove previous benchmark data first")
+    parser.add_argument("--apply", action="store_true", help="Execute instead of printing SQL")
+    parser.add_argument("--database-url", help="PostgreSQL URL used with --apply")
+    args = parser.parse_args()
+
+    sql = generate_sql(
+        users=args.users,
+        pairs=args.pairs,
+        cards_per_user=args.cards_per_user,
+        reviews_per_card=args.reviews_per_card,
+        reset=args.reset
+    )
+
+    if not args.apply:
+        sys.stdout.write(sql)
+        return
+
+    if not args.database_url:
+        parser.error("--database-url is required with --apply")
+    apply_sql(args.database_url, sql)
+    print(f"Seeded {args.users} users and {args.pairs} word pairs")
+
+
+if __name__ == "__main__":
+    main()
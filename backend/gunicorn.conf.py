@@ -0,0 +1,50 @@
+# Production server: gunicorn master with uvicorn workers
+#   gunicorn -c gunicorn.conf.py
+# SIGTERM drains workers for up to SERVER_GRACEFUL_TIMEOUT seconds. SIGHUP restarts workers
+# gracefully, but with preload_app they keep the code the master imported: deploy new code
+# by restarting the master (or set SERVER_PRELOAD=false to make SIGHUP load it)
+from app.core.config import settings
+from app.core.server import worker_count
+
+wsgi_app = "app.main:app"
+worker_class = "app.core.server.PairLinguaWorker"
+bind = f"{settings.SERVER_HOST}:{settings.SERVER_PORT}"
+workers = 1 if settings.DEBUG else worker_count()
+
+# Import the app once in the master so workers share its memory copy-on-write;
+# code reload needs a fresh import in every worker instead
+preload_app = settings.SERVER_PRELOAD and not settings.DEBUG
+reload = settings.DEBUG
+
+# A preloaded master creates tables and review partitions once in on_starting,
+# instead of every worker doing it in its lifespan
+if preload_app:
+    settings.SERVER_STARTUP_MAINTENANCE = False
+
+# Only these peers may set the client address through X-Forwarded-For
+forwarded_allow_ips = settings.TRUSTED_PROXIES
+
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT
+keepalive = settings.SERVER_KEEPALIVE
+
+# Recycle workers now and then to bound memory growth; jitter keeps them from restarting together
+max_requests = settings.SERVER_MAX_REQUESTS
+max_requests_jitter = settings.SERVER_MAX_REQUESTS_JITTER
+
+accesslog = None  # requests are logged by the app's middleware
+errorlog = "-"
+loglevel = "info"
+
+
+def on_starting(server):
+    if preload_app:
+        from app.core.database import dispose_engines
+        from app.services.partition_service import run_startup_maintenance
+        run_startup_maintenance()
+        dispose_engines()
+
+
+def post_fork(server, worker):
+    # Pools created while the master imported the app must not be shared with the children
+    from app.core.database import dispose_engines
+    dispose_engines(close=False)
@@ -66,6 +66,8 @@ CREATE TABLE IF NOT EXISTS user_cards (
     repetition_count INTEGER DEFAULT 0,
     interval_days INTEGER DEFAULT 0,
     due_date TIMESTAMP,
+    stability DOUBLE PRECISION,
+    difficulty DOUBLE PRECISION,
     last_quality SMALLINT,
     last_reviewed_at TIMESTAMP,
     total_reviews INTEGER DEFAULT 0,
@@ -79,9 +81,11 @@ CREATE TABLE IF NOT EXISTS user_cards (
     UNIQUE(user_id, word_pair_id)
 );
 
--- Reviews table
+-- Reviews table: append-only log, range-partitioned by month.
+-- Monthly partitions are created by the backend on startup (PartitionService);
+-- the default partition only catches rows outside them.
 CREATE TABLE IF NOT EXISTS reviews (
-    id BIGSERIAL PRIMARY KEY,
+    id BIGSERIAL,
     user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     word_pair_id BIGINT NOT NULL REFERENCES word_pairs(id) ON DELETE CASCADE,
     user_card_id BIGINT NOT NULL REFERENCES user_cards(id) ON DELETE CASCADE,
@@ -89,12 +93,16 @@ CREATE TABLE IF NOT EXISTS reviews (
     response_time_ms INTEGER,
     source VARCHAR(50) DEFAULT 'web',
     session_id UUID,
+    client_review_id UUID,
     ease_factor_before INTEGER,
     ease_factor_after INTEGER,
     interval_before INTEGER,
     interval_after INTEGER,
-    reviewed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    reviewed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, reviewed_at)
+) PARTITION BY RANGE (reviewed_at);
+
+CREATE TABLE IF NOT EXISTS reviews_default PARTITION OF reviews DEFAULT;
 
 -- Study sessions table
 CREATE TABLE IF NOT EXISTS study_sessions (
@@ -154,14 +162,21 @@ CREATE INDEX IF NOT EXISTS ix_word_pairs_cefr_level ON word_pairs(cefr_level);
 CREATE INDEX IF NOT EXISTS ix_word_pairs_frequency_rank ON word_pairs(frequency_rank);
 CREATE INDEX IF NOT EXISTS ix_word_pairs_is_active ON word_pairs(is_active);
 CREATE INDEX IF NOT EXISTS ix_word_pairs_tags ON word_pairs USING GIN(tags);
+-- New-card order: range scans from the user's frontier (see StudyService._select_new_word_pairs)
+CREATE INDEX IF NOT EXISTS ix_word_pairs_new_card_order ON word_pairs((coalesce(frequency_rank, 2147483647)), id) WHERE is_active;
+CREATE INDEX IF NOT EXISTS ix_word_pairs_level_new_card_order ON word_pairs(cefr_level, (coalesce(frequency_rank, 2147483647)), id) WHERE is_active;
+-- Catalog change feed: pairs changed after a client's version (see CatalogFeedService)
+CREATE INDEX IF NOT EXISTS ix_word_pairs_updated_at ON word_pairs(updated_at, id);
 
 CREATE INDEX IF NOT EXISTS ix_user_cards_user_id ON user_cards(user_id);
 CREATE INDEX IF NOT EXISTS ix_user_cards_due_date ON user_cards(due_date);
-CREATE INDEX IF NOT EXISTS ix_user_cards_user_due ON user_cards(user_id, due_date);
 
-CREATE INDEX IF NOT EXISTS ix_reviews_user_id ON reviews(user_id);
+-- Created on the partitioned parent, so every partition gets its own copy
 CREATE INDEX IF NOT EXISTS ix_reviews_reviewed_at ON reviews(reviewed_at);
 CREATE INDEX IF NOT EXISTS ix_reviews_user_date ON reviews(user_id, reviewed_at);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_reviews_client_review ON reviews(user_id, client_review_id, reviewed_at)
+    WHERE client_review_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS ix_reviews_session_id ON reviews(session_id) WHERE session_id IS NOT NULL;
 
 CREATE INDEX IF NOT EXISTS ix_tokens_blacklist_expires ON tokens_blacklist(expires_at);
 CREATE INDEX IF NOT EXISTS ix_tokens_blacklist_jti ON tokens_blacklist(jti);
@@ -170,10 +185,10 @@ CREATE INDEX IF NOT EXISTS ix_achievements_code ON achievements(code);
 CREATE INDEX IF NOT EXISTS ix_user_achievements_user ON user_achievements(user_id);
 CREATE INDEX IF NOT EXISTS ix_user_achievements_earned ON user_achievements(user_id, earned_at);
 
--- Create partial index for due cards (performance optimization)
-CREATE INDEX IF NOT EXISTS ix_user_cards_due_now 
-ON user_cards(user_id, due_date) 
-WHERE due_date <= CURRENT_TIMESTAMP AND is_suspended = false;
+-- Due queue: per-user range scan in due order, index-only for counts and id lookups
+CREATE INDEX IF NOT EXISTS ix_user_cards_due_queue
+ON user_cards(user_id, due_date) INCLUDE (word_pair_id)
+WHERE NOT is_suspended;
 
 -- Update triggers for updated_at timestamps
 CREATE OR REPLACE FUNCTION update_updated_at_column()